@@ -1,3 +1,17 @@
 from django.contrib import admin
+from .models import PushedSection, PushOutbox
 
-# Register your models here.
+
+@admin.register(PushOutbox)
+class PushOutboxAdmin(admin.ModelAdmin):
+    list_display = ('report_date', 'sink', 'status', 'attempts', 'next_attempt_at', 'last_status_code', 'sent_at')
+    list_filter = ('sink', 'status')
+    ordering = ('-report_date', '-created_at')
+    exclude = ('payload',)
+
+
+@admin.register(PushedSection)
+class PushedSectionAdmin(admin.ModelAdmin):
+    list_display = ('report_date', 'sink', 'region', 'section_hash', 'pushed_at')
+    list_filter = ('sink', 'region')
+    ordering = ('-report_date', 'region')
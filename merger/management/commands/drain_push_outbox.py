@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from merger import outbox
+from merger.models import PushOutbox
+from report_dashboard.models import JobRun
+
+
+class Command(BaseCommand):
+    help = 'Delivers merged payloads from the push outbox that have not been delivered yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Deliveries to run at once per sink (default: MERGE_PUSH_WORKERS).')
+        parser.add_argument(
+            '--loop',
+            type=int,
+            default=0,
+            metavar='SECONDS',
+            help='Keep draining, sleeping this many seconds between passes.'
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Put pushes that ran out of attempts back in the queue first.'
+        )
+
+    def report(self, entry):
+        if entry.status == PushOutbox.Status.SENT:
+            self.stdout.write(self.style.SUCCESS(f"✅ [{entry.sink}] {entry.report_date}: pushed (attempt {entry.attempts})."))
+        elif entry.status == PushOutbox.Status.FAILED:
+            self.stdout.write(self.style.ERROR(f"❌ [{entry.sink}] {entry.report_date}: giving up after {entry.attempts} attempts: {entry.last_error}"))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ [{entry.sink}] {entry.report_date}: attempt {entry.attempts} failed ({entry.last_error}); next try at {entry.next_attempt_at:%Y-%m-%d %H:%M:%S}."
+            ))
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            requeued = PushOutbox.objects.filter(status=PushOutbox.Status.FAILED).update(
+                status=PushOutbox.Status.PENDING, attempts=0, next_attempt_at=timezone.now(),
+            )
+            self.stdout.write(f"🔁 Re-queued {requeued} failed pushes.")
+
+        while True:
+            started_at, started = timezone.now(), time.perf_counter()
+            counts = outbox.drain(workers=options['workers'], on_result=self.report)
+            if any(counts.values()):
+                # Passes that found nothing due are not worth a history row.
+                JobRun.record(
+                    'drain_push_outbox', started_at, JobRun.Status.SUCCESS, push_seconds=time.perf_counter() - started,
+                )
+            pending = PushOutbox.objects.filter(status=PushOutbox.Status.PENDING).count()
+            self.stdout.write(
+                f"📤 Outbox pass: {counts['sent']} sent, {counts['retrying']} retrying, "
+                f"{counts['failed']} failed, {pending} still queued."
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
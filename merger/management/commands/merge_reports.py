@@ -1,13 +1,25 @@
 # merger/management/commands/merge_reports.py
 
+import copy
 import os
 import json
 import re 
-import requests
-from glob import glob
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from nrldc_app.models import Nrldc2AData, Nrldc2CData
+from srldc_app.models import Srldc2AData, Srldc2CData
+from wrldc_app.models import Wrldc2AData, Wrldc2CData
+from posoco.models import PosocoTableA, PosocoTableG
+from pipeline import archive
+from pipeline.artifacts import artifacts_between, load_artifact_json
+from merger import outbox
+from merger.sinks import get_sinks
+from report_dashboard.models import AutomationJob, JobRun
 
 # Your original functions and data structures remain unchanged
 def extract_date_from_filename(filename):
@@ -33,12 +45,8 @@ def extract_date_from_filename(filename):
                 continue
     return None
 
-report_dirs = {
-    'NRLDC': 'downloads/NRLDC',
-    'SRLDC': 'downloads/SRLDC',
-    'WRLDC': 'downloads/WRLDC',
-    'POSOCO': 'downloads/POSOCO'
-}
+# Regions are looked up in the pipeline artifact index, which the ingest commands keep current.
+REGIONS = ['NRLDC', 'SRLDC', 'WRLDC', 'POSOCO']
 
 empty_templates = {
     # ... (this dictionary is unchanged) ...
@@ -102,8 +110,36 @@ empty_templates = {
 }
 
 
+# --- Database-backed merge (--from-db) ---
+
+def _posoco_rows(key_field, columns):
+    """Rebuilds POSOCO's [{row_key: {column: value}}] shape from values() rows."""
+    def serialize(rows):
+        table = {row[key_field]: {label: row[field] for field, label in columns} for row in rows}
+        return [table] if table else []
+    return serialize
+
+
+_POSOCO_REGION_COLUMNS = [('nr', 'NR'), ('wr', 'WR'), ('sr', 'SR'), ('er', 'ER'), ('ner', 'NER')]
+
+# Each table is serialized from values() on the template's columns, except POSOCO whose rows are keyed by category.
+DB_TABLES = {
+    'NRLDC': {'nrldc_table_2A': (Nrldc2AData, list), 'nrldc_table_2C': (Nrldc2CData, list)},
+    'SRLDC': {'srldc_table_2A': (Srldc2AData, list), 'srldc_table_2C': (Srldc2CData, list)},
+    'WRLDC': {'wrldc_table_2A': (Wrldc2AData, list), 'wrldc_table_2C': (Wrldc2CData, list)},
+    'POSOCO': {
+        'posoco_table_a': (PosocoTableA, _posoco_rows('category', _POSOCO_REGION_COLUMNS + [('total', 'TOTAL')])),
+        'posoco_table_g': (PosocoTableG, _posoco_rows('fuel_type', _POSOCO_REGION_COLUMNS + [('all_india', 'All India'), ('share_percent', '% Share')])),
+    },
+}
+DB_FIELDS = {
+    'posoco_table_a': ['category', 'nr', 'wr', 'sr', 'er', 'ner', 'total'],
+    'posoco_table_g': ['fuel_type', 'nr', 'wr', 'sr', 'er', 'ner', 'all_india', 'share_percent'],
+}
+
+
 class Command(BaseCommand):
-    help = 'Merges the latest JSON reports from all sources and pushes to an API.'
+    help = 'Merges the latest JSON reports from all sources and queues them for every sink in MERGE_SINKS.'
 
     # NEW: Add the --date argument
     def add_arguments(self, parser):
@@ -112,102 +148,217 @@ class Command(BaseCommand):
             type=str,
             help='Merge reports for a specific date in YYYY-MM-DD format. Defaults to today.'
         )
+        parser.add_argument(
+            '--from',
+            dest='from_date',
+            type=str,
+            help='First date of a range to merge in one pass (YYYY-MM-DD); use with --to.'
+        )
+        parser.add_argument(
+            '--to',
+            dest='to_date',
+            type=str,
+            help='Last date of the range, inclusive (YYYY-MM-DD).'
+        )
+        parser.add_argument(
+            '--from-db',
+            action='store_true',
+            help='Build each region from the report tables in the database instead of the downloaded JSON files.'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Deliver the full payload even if every region matches what each sink last received.'
+        )
+
+    def empty_region(self, region):
+        # Copied so that setting 'date' on one day's payload does not leak into the shared template.
+        return copy.deepcopy(empty_templates.get(region, {}))
+
+    def apply_templates(self, region, restructured_data):
+        # Validate against template
+        template = empty_templates.get(region, {})
+        for table_key, template_value in template.items():
+            if table_key != 'date' and (not restructured_data.get(table_key) or not any(restructured_data.get(table_key))):
+                self.stdout.write(self.style.WARNING(f"⚠️ Missing or empty table '{table_key}' for {region}, applying empty template."))
+                restructured_data[table_key] = template_value
+        return restructured_data
+
+    def region_from_artifact(self, region, artifact, target_date_str, report_date):
+        if artifact is None:
+            self.stdout.write(self.style.WARNING(f"No indexed report for '{target_date_str}' for {region}, using empty template."))
+            return self.empty_region(region)
+        try:
+            data = load_artifact_json(artifact)
+            inner_data = data.get(region, data)
+            region_data = self.apply_templates(region, {'date': report_date, **inner_data}) # Use report_date
+            self.stdout.write(self.style.SUCCESS(f"✅ Merged data for {region} from {artifact.json_path}"))
+            return region_data
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"Error reading {artifact.json_path} for {region}: {e}, using empty template."))
+            return self.empty_region(region)
+
+    def load_db_rows(self, start, end):
+        """One values() query per table for the whole range; returns {(table_key, report_date): [rows]}."""
+        rows_by_table = defaultdict(list)
+        for region, tables in DB_TABLES.items():
+            for table_key, (model, _) in tables.items():
+                fields = DB_FIELDS.get(table_key) or list(empty_templates[region][table_key][0])
+                rows = model.objects.filter(report_date__range=(start, end)).order_by('report_date', 'id')
+                for row in rows.values('report_date', *fields):
+                    rows_by_table[(table_key, row.pop('report_date'))].append(row)
+        return rows_by_table
+
+    def region_from_db(self, region, rows_by_table, target_date, report_date):
+        """Builds a region's section from the preloaded rows, in the same shape as its JSON file."""
+        region_data = {'date': report_date}
+        for table_key, (_, serialize) in DB_TABLES[region].items():
+            region_data[table_key] = serialize(rows_by_table.get((table_key, target_date), []))
+        region_data = self.apply_templates(region, region_data)
+        self.stdout.write(self.style.SUCCESS(f"✅ Merged data for {region} from the database"))
+        return region_data
+
+    def merge_range(self, start, end, from_db=False):
+        """
+        Returns [(report_date, merged_data)] for every target date in [start, end], loading the
+        whole range with one query per table (or one index lookup) instead of once per day.
+        """
+        if from_db:
+            rows_by_table = self.load_db_rows(start, end)
+        else:
+            artifacts = artifacts_between(start, end)
+
+        merged = []
+        target_date = start
+        while target_date <= end:
+            # The date for the API payload and final report (always the day before the target)
+            report_date = (target_date - timedelta(days=1)).strftime('%Y-%m-%d')
+            merged_data = {}
+            for region in REGIONS:
+                if from_db:
+                    region_data = self.region_from_db(region, rows_by_table, target_date, report_date)
+                else:
+                    region_data = self.region_from_artifact(
+                        region, artifacts.get((region, target_date)), target_date.strftime('%Y-%m-%d'), report_date
+                    )
+
+                # Set the final date for the payload
+                if region_data:
+                    region_data['date'] = report_date
+                merged_data[region] = region_data
+            merged.append((report_date, merged_data))
+            target_date += timedelta(days=1)
+        return merged
+
+    def payload_to_push(self, sink, report_date, merged_data, force):
+        """Returns the payload to send to sink for report_date, or None when nothing changed since its last delivery."""
+        changed, unchanged = outbox.changed_regions(sink.name, report_date, merged_data)
+        if force:
+            changed, unchanged = list(merged_data), []
+        if unchanged:
+            self.stdout.write(f"⏭️ [{sink.name}] {report_date} unchanged since the last delivery: {', '.join(unchanged)}")
+
+        if not changed:
+            self.stdout.write(self.style.SUCCESS(f"✅ [{sink.name}] Nothing changed for {report_date}; skipped."))
+            return None
+        if sink.partial:
+            self.stdout.write(f"📤 [{sink.name}] {report_date}: sending changed regions: {', '.join(changed)}")
+            return {region: merged_data[region] for region in changed}
+        self.stdout.write(f"📤 [{sink.name}] {report_date}: sending full payload; changed regions: {', '.join(changed)}")
+        return merged_data
+
+    def deliver(self, merged, force):
+        """
+        Queues each day's payload for every sink that lacks it and returns how many were queued.
+        Delivery is left to drain_push_outbox, which run_scheduler queues while the outbox has due entries,
+        so a slow sink cannot hold up the merge.
+        """
+        sinks = get_sinks()
+        if force:
+            self.stdout.write("\n🔁 --force: delivering every region regardless of what was delivered before.")
+        queued = 0
+        for report_date, merged_data in merged:
+            for sink in sinks.values():
+                payload = self.payload_to_push(sink, report_date, merged_data, force)
+                if payload is not None:
+                    outbox.enqueue(sink.name, report_date, payload)
+                    queued += 1
+        if queued:
+            self.stdout.write(f"\n📥 Queued {queued} payloads for: {', '.join(sinks)}; drain_push_outbox delivers them.")
+        return queued
+
+    def add_timing(self, field, started):
+        self.timings[field] = self.timings.get(field, 0) + time.perf_counter() - started
+
+    def save_local(self, report_date, merged_data, filename):
+        started = time.perf_counter()
+        # Archived under the run date (the payload's date + 1), like the source archives it is built from.
+        run_date = (datetime.strptime(report_date, '%Y-%m-%d') + timedelta(days=1)).date()
+        archive.append(archive.MERGED, run_date.isoformat(), merged_data)
+        output_dir = os.path.join('downloads', 'overall_json')
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, filename)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(merged_data, f, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f"\nMerged latest reports for {report_date} saved to {output_path}"))
+        AutomationJob.mark_data_available('merge_reports', timezone.now().date())
+        self.add_timing('json_seconds', started)
+
+    def parse_date(self, value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError("Date format is incorrect. Please use YYYY-MM-DD.")
 
     def handle(self, *args, **options):
+        # JSON write durations for this run's JobRun; summed over the days of a range.
+        self.timings = {}
+        started_at = timezone.now()
+        try:
+            if options.get('from_date') or options.get('to_date'):
+                self.handle_range(options)
+            else:
+                self.handle_date(options)
+        except Exception as e:
+            JobRun.record('merge_reports', started_at, JobRun.Status.FAILED, error=str(e), **self.timings)
+            raise
+        JobRun.record('merge_reports', started_at, JobRun.Status.SUCCESS, **self.timings)
+
+    def handle_date(self, options):
         # NEW: Determine the target date dynamically
         date_str_option = options.get('date')
         if date_str_option:
-            try:
-                # Use the date provided by the user
-                target_datetime = datetime.strptime(date_str_option, '%Y-%m-%d')
-            except ValueError:
-                raise CommandError("Date format is incorrect. Please use YYYY-MM-DD.")
+            # Use the date provided by the user
+            target_date = self.parse_date(date_str_option)
         else:
             # Default to today if no date is provided
-            target_datetime = datetime.now()
-
-        # The date for finding report files
-        target_date_str = target_datetime.strftime('%Y-%m-%d')
-        # The date for the API payload and final report (always the day before the target)
-        report_date = (target_datetime - timedelta(days=1)).strftime('%Y-%m-%d')
+            target_date = datetime.now().date()
 
-        BASE_API_URL = "http://172.16.7.118:8003/api/tamilnadu/wind/api.grid.php"
-        api_url_with_date = f"{BASE_API_URL}?date={report_date}"
-        merged_data = {}
+        merged = self.merge_range(target_date, target_date, from_db=options['from_db'])
 
-        for region, report_dir in report_dirs.items():
-            region_data = None
-            try:
-                # UPDATED LOGIC: Find the latest subdirectory for the target date
-                subdirs_for_date = [
-                    d for d in os.listdir(report_dir)
-                    if os.path.isdir(os.path.join(report_dir, d)) and d.startswith(f'report_{target_date_str}')
-                ]
-                
-                if subdirs_for_date:
-                    # Sort to get the latest directory (e.g., ..._09-31-20 is newer than ..._09-30-26)
-                    latest_subdir_name = sorted(subdirs_for_date)[-1]
-                    full_subdir = os.path.join(report_dir, latest_subdir_name)
-                    
-                    # Find the JSON file inside the latest subdirectory
-                    json_files = glob(os.path.join(full_subdir, '*.json'))
-                    
-                    if json_files:
-                        json_file_name = json_files[0] # Assume only one JSON per folder
-                        try:
-                            with open(json_file_name, 'r', encoding='utf-8') as f:
-                                data = json.load(f)
-                            
-                            inner_data = data.get(region, data)
-                            restructured_data = {'date': report_date, **inner_data} # Use report_date
-                            
-                            # Validate against template
-                            template = empty_templates.get(region, {})
-                            for table_key, template_value in template.items():
-                                if table_key != 'date' and (not restructured_data.get(table_key) or not any(restructured_data.get(table_key))):
-                                    self.stdout.write(self.style.WARNING(f"⚠️ Missing or empty table '{table_key}' for {region}, applying empty template."))
-                                    restructured_data[table_key] = template_value
-                            
-                            region_data = restructured_data
-                            self.stdout.write(self.style.SUCCESS(f"✅ Merged data for {region} from {json_file_name}"))
-
-                        except Exception as e:
-                            self.stdout.write(self.style.ERROR(f"Error reading {json_file_name} for {region}: {e}, using empty template."))
-                            region_data = empty_templates.get(region, {})
-                    else:
-                        self.stdout.write(self.style.WARNING(f"No JSON files found in {full_subdir} for {region}, using empty template."))
-                        region_data = empty_templates.get(region, {})
-                else:
-                    self.stdout.write(self.style.WARNING(f"No subdir for '{target_date_str}' in {report_dir} for {region}, using empty template."))
-                    region_data = empty_templates.get(region, {})
+        # --- SAVE LOCALLY, then QUEUE FOR EVERY SINK (through the outbox) ---
+        [(report_date, merged_data)] = merged
+        timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        self.save_local(report_date, merged_data, f'merged_reports_{timestamp}.json')
 
-            except (FileNotFoundError, NotADirectoryError):
-                self.stdout.write(self.style.ERROR(f"Directory not found: {report_dir}, using empty template."))
-                region_data = empty_templates.get(region, {})
+        self.deliver(merged, options['force'])
 
-            # Set the final date for the payload
-            if region_data:
-                region_data['date'] = report_date
-            merged_data[region] = region_data
+    def handle_range(self, options):
+        if not (options.get('from_date') and options.get('to_date')):
+            raise CommandError("--from and --to must be given together.")
+        if options.get('date'):
+            raise CommandError("--date cannot be combined with --from/--to.")
+        start, end = self.parse_date(options['from_date']), self.parse_date(options['to_date'])
+        if start > end:
+            raise CommandError("--from must not be after --to.")
 
-        # --- API PUSH and SAVE LOCALLY (Unchanged) ---
-        headers = {"Content-Type": "application/json"}
-        try:
-            self.stdout.write(f"\nAttempting to push data to: {api_url_with_date}...")
-            response = requests.post(api_url_with_date, headers=headers, json=merged_data, timeout=30)
-            if response.status_code in [200, 201]:
-                self.stdout.write(self.style.SUCCESS(f"✅ Successfully pushed data to API. Status Code: {response.status_code}"))
-                self.stdout.write(f"Response text: {response.text}")
-            else:
-                self.stdout.write(self.style.ERROR(f"Failed to push data. Status Code: {response.status_code}"))
-                self.stdout.write(f"Error Response: {response.text}")
-        except requests.exceptions.RequestException as e:
-            raise CommandError(f"🚨 An error occurred while trying to connect to the API: {e}")
+        merged = self.merge_range(start, end, from_db=options['from_db'])
 
-        output_dir = os.path.join('downloads', 'overall_json')
-        os.makedirs(output_dir, exist_ok=True)
         timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-        output_path = os.path.join(output_dir, f'merged_reports_{timestamp}.json')
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(merged_data, f, indent=2, ensure_ascii=False)
-        self.stdout.write(self.style.SUCCESS(f"\nMerged latest reports for {report_date} saved to {output_path}"))
\ No newline at end of file
+        for report_date, merged_data in merged:
+            self.save_local(report_date, merged_data, f'merged_reports_{timestamp}_{report_date}.json')
+
+        queued = self.deliver(merged, options['force'])
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ Merged {len(merged)} days: {queued} payloads queued in the push outbox."
+        ))
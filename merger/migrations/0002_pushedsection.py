@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merger', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PushedSection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_date', models.DateField()),
+                ('region', models.CharField(max_length=20)),
+                ('section_hash', models.CharField(max_length=64)),
+                ('pushed_at', models.DateTimeField()),
+            ],
+            options={
+                'unique_together': {('report_date', 'region')},
+            },
+        ),
+    ]
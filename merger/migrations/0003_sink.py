@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merger', '0002_pushedsection'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='pushedsection',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='pushedsection',
+            name='sink',
+            field=models.CharField(default='grid_api', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='pushoutbox',
+            name='sink',
+            field=models.CharField(default='grid_api', max_length=50),
+        ),
+        migrations.AlterUniqueTogether(
+            name='pushedsection',
+            unique_together={('sink', 'report_date', 'region')},
+        ),
+    ]
@@ -1,3 +1,48 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class PushOutbox(models.Model):
+    """A merged payload waiting to be delivered to one sink, kept until it is delivered."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        SENDING = 'sending', 'Sending'
+        SENT = 'sent', 'Sent'
+        FAILED = 'failed', 'Failed'
+        SUPERSEDED = 'superseded', 'Superseded'
+
+    sink = models.CharField(max_length=50, default='grid_api')
+    report_date = models.DateField()
+    payload = models.TextField()
+    payload_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_status_code = models.PositiveIntegerField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.sink} | {self.report_date} | {self.status} | attempt {self.attempts}"
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+
+
+class PushedSection(models.Model):
+    """Hash of one region's section as last delivered to a sink for a report date, used to skip unchanged pushes."""
+
+    sink = models.CharField(max_length=50, default='grid_api')
+    report_date = models.DateField()
+    region = models.CharField(max_length=20)
+    section_hash = models.CharField(max_length=64)
+    pushed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.sink} | {self.report_date} | {self.region} | {self.section_hash[:12]}"
+
+    class Meta:
+        unique_together = ('sink', 'report_date', 'region')
@@ -0,0 +1,224 @@
+"""
+Durable outbox for merged payloads.
+
+merge_reports only queues one PushOutbox row per configured sink (see merger.sinks); run_scheduler
+queues drain_push_outbox whenever entries are due, which delivers to all sinks at once. Anything
+a sink did not accept stays queued and is re-sent with exponential backoff, running at most
+MERGE_PUSH_WORKERS deliveries per sink so that one slow consumer cannot hold up the others.
+
+Every delivered region section is hashed into PushedSection per sink, so a merge whose regions
+all match what a sink already has can be skipped, or reduced to the changed regions.
+"""
+import datetime
+import hashlib
+import json
+import logging
+import random
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from merger.models import PushedSection, PushOutbox
+from merger.sinks import get_sinks
+
+logger = logging.getLogger(__name__)
+
+# A push still marked as sending after this long belongs to a process that died mid-request.
+STALE_CLAIM = datetime.timedelta(minutes=10)
+
+
+def enqueue(sink_name, report_date, merged_data):
+    """Queues merged_data for one sink; an identical payload still waiting in its queue is reused."""
+    payload = json.dumps(merged_data, ensure_ascii=False)
+    payload_hash = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    existing = PushOutbox.objects.filter(
+        sink=sink_name, report_date=report_date, payload_hash=payload_hash,
+        status__in=[PushOutbox.Status.PENDING, PushOutbox.Status.SENDING],
+    ).first()
+    if existing:
+        return existing
+
+    # A newer payload for the same date replaces anything of that date not yet delivered to this sink.
+    PushOutbox.objects.filter(sink=sink_name, report_date=report_date, status=PushOutbox.Status.PENDING).update(
+        status=PushOutbox.Status.SUPERSEDED, updated_at=timezone.now(),
+    )
+    return PushOutbox.objects.create(
+        sink=sink_name, report_date=report_date, payload=payload, payload_hash=payload_hash,
+    )
+
+
+def section_hash(section):
+    return hashlib.sha256(json.dumps(section, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def changed_regions(sink_name, report_date, merged_data):
+    """Splits merged_data's regions into (changed, unchanged) against what the sink last received."""
+    delivered = dict(
+        PushedSection.objects.filter(sink=sink_name, report_date=report_date).values_list('region', 'section_hash')
+    )
+    changed, unchanged = [], []
+    for region, section in merged_data.items():
+        (unchanged if delivered.get(region) == section_hash(section) else changed).append(region)
+    return changed, unchanged
+
+
+def record_delivered(entry):
+    now = timezone.now()
+    for region, section in json.loads(entry.payload).items():
+        PushedSection.objects.update_or_create(
+            sink=entry.sink, report_date=entry.report_date, region=region,
+            defaults={'section_hash': section_hash(section), 'pushed_at': now},
+        )
+
+
+def backoff_delay(attempts):
+    first, longest = settings.MERGE_PUSH_BACKOFF
+    delay = min(first * 2 ** (attempts - 1), longest)
+    return datetime.timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _retry_or_fail(entry, sink):
+    """Schedules the next attempt of an undelivered entry with backoff, or fails it once its sink's attempts are used up."""
+    if sink is None or entry.attempts >= sink.max_attempts:
+        entry.status = PushOutbox.Status.FAILED
+    else:
+        entry.status = PushOutbox.Status.PENDING
+        entry.next_attempt_at = timezone.now() + backoff_delay(entry.attempts)
+
+
+def attempt(pk, sinks=None):
+    """
+    Delivers one queued entry if no other process has claimed it, and records the outcome.
+    Returns (entry, detail); entry is None when the entry was not ours to send.
+    """
+    now = timezone.now()
+    claimed = PushOutbox.objects.filter(pk=pk, status=PushOutbox.Status.PENDING).update(
+        status=PushOutbox.Status.SENDING, updated_at=now,
+    )
+    if not claimed:
+        return None, None
+
+    entry = PushOutbox.objects.get(pk=pk)
+    sink = (sinks or get_sinks()).get(entry.sink)
+    entry.attempts += 1
+    detail = None
+    if sink is None:
+        entry.last_error = f"Sink '{entry.sink}' is no longer configured in MERGE_SINKS."
+    else:
+        try:
+            ok, entry.last_status_code, detail = sink.deliver(entry.report_date, entry.payload)
+            if ok:
+                entry.status = PushOutbox.Status.SENT
+                entry.sent_at = timezone.now()
+                entry.last_error = None
+            else:
+                entry.last_error = f"HTTP {entry.last_status_code}: {(detail or '')[:500]}"
+        except Exception as e:
+            entry.last_error = str(e)
+
+    if entry.status != PushOutbox.Status.SENT:
+        _retry_or_fail(entry, sink)
+    with transaction.atomic():
+        if entry.status == PushOutbox.Status.SENT:
+            record_delivered(entry)
+        entry.save()
+    return entry, detail
+
+
+def release_stale_claims():
+    return PushOutbox.objects.filter(
+        status=PushOutbox.Status.SENDING, updated_at__lt=timezone.now() - STALE_CLAIM,
+    ).update(status=PushOutbox.Status.PENDING, updated_at=timezone.now())
+
+
+def due_entries():
+    return list(PushOutbox.objects.filter(
+        status=PushOutbox.Status.PENDING, next_attempt_at__lte=timezone.now(),
+    ).order_by('report_date').values_list('pk', 'sink'))
+
+
+def has_due():
+    return PushOutbox.objects.filter(status=PushOutbox.Status.PENDING, next_attempt_at__lte=timezone.now()).exists()
+
+
+def _record_database_error(pk, sink_name, sinks, error):
+    """
+    Records an attempt whose outcome could not be saved because of a database error like any other
+    failed delivery: one more attempt, and a retry after backoff or failure. Returns the entry.
+    """
+    logger.error("Push outbox entry %s (%s): database error: %s", pk, sink_name, error)
+    try:
+        # attempt() saves nothing until its final save, so this holds the attempts made before this one.
+        entry = PushOutbox.objects.get(pk=pk)
+    except DatabaseError:
+        entry = PushOutbox(pk=pk, sink=sink_name)
+    entry.attempts += 1
+    entry.last_error = f"Database error: {error}"
+    _retry_or_fail(entry, sinks.get(sink_name))
+    try:
+        PushOutbox.objects.filter(
+            pk=pk, status__in=[PushOutbox.Status.PENDING, PushOutbox.Status.SENDING],
+        ).update(
+            status=entry.status, attempts=entry.attempts, next_attempt_at=entry.next_attempt_at,
+            last_error=entry.last_error, updated_at=timezone.now(),
+        )
+    except DatabaseError:
+        # The claim is then released after STALE_CLAIM and the entry retried.
+        logger.exception("Could not record the failed attempt of push outbox entry %s", pk)
+    return entry
+
+
+def _attempt_in_thread(pk, sinks):
+    try:
+        return attempt(pk, sinks)
+    finally:
+        connections.close_all()
+
+
+def drain(workers=None, on_result=None, pks=None):
+    """
+    Delivers every due entry (or just the given pks). Each sink gets its own pool of `workers`
+    threads, so all sinks are served at the same time. Returns counts by resulting status.
+    """
+    release_stale_claims()
+    counts = {'sent': 0, 'retrying': 0, 'failed': 0}
+    if pks is None:
+        entries = due_entries()
+    else:
+        entries = list(PushOutbox.objects.filter(pk__in=pks).values_list('pk', 'sink'))
+    if not entries:
+        return counts
+
+    by_sink = defaultdict(list)
+    for pk, sink_name in entries:
+        by_sink[sink_name].append(pk)
+
+    sinks = get_sinks()
+    pools = {name: ThreadPoolExecutor(max_workers=workers or settings.MERGE_PUSH_WORKERS) for name in by_sink}
+    try:
+        futures = {
+            pools[name].submit(_attempt_in_thread, pk, sinks): (pk, name)
+            for name, sink_pks in by_sink.items() for pk in sink_pks
+        }
+        for future in as_completed(futures):
+            try:
+                entry, _ = future.result()
+            except DatabaseError as e:
+                entry = _record_database_error(*futures[future], sinks, e)
+            if entry is None:
+                continue
+            if entry.status == PushOutbox.Status.SENT:
+                counts['sent'] += 1
+            elif entry.status == PushOutbox.Status.FAILED:
+                counts['failed'] += 1
+            else:
+                counts['retrying'] += 1
+            if on_result:
+                on_result(entry)
+    finally:
+        for pool in pools.values():
+            pool.shutdown()
+    return counts
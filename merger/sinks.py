@@ -0,0 +1,97 @@
+"""
+Destinations for merged payloads.
+
+settings.MERGE_SINKS maps a sink name to its options; 'type' picks the class below. Every sink has
+its own timeout, retry budget and outbox rows, so a slow or broken consumer only delays itself.
+"""
+import gzip
+import os
+import threading
+import time
+
+import requests
+from django.conf import settings
+
+
+class Sink:
+    def __init__(self, name, options):
+        self.name = name
+        self.options = options
+        self.timeout = options.get('timeout', settings.MERGE_PUSH_TIMEOUT)
+        self.max_attempts = options.get('max_attempts', settings.MERGE_PUSH_MAX_ATTEMPTS)
+        # Whether the consumer merges payloads that only carry the changed regions.
+        self.partial = options.get('partial', False)
+
+    def describe(self, report_date):
+        raise NotImplementedError
+
+    def deliver(self, report_date, payload):
+        """Delivers one JSON payload (str). Returns (ok, status_code, detail)."""
+        raise NotImplementedError
+
+
+class HttpSink(Sink):
+    """POSTs the payload to options['url']?date=<report_date>, gzip-compressed when options['gzip'] is set."""
+
+    def describe(self, report_date):
+        return f"{self.options['url']}?date={report_date}"
+
+    def deliver(self, report_date, payload):
+        body = payload.encode('utf-8')
+        headers = {"Content-Type": "application/json"}
+        if self.options.get('gzip'):
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        response = requests.post(self.describe(report_date), data=body, headers=headers, timeout=self.timeout)
+        return response.status_code in [200, 201], response.status_code, response.text
+
+
+class DirectorySink(Sink):
+    """Keeps the latest payload of each date as <path>/merged_reports_<report_date>.json."""
+
+    def describe(self, report_date):
+        return os.path.join(self.options['path'], f"merged_reports_{report_date}.json")
+
+    def deliver(self, report_date, payload):
+        path = self.describe(report_date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        return True, None, path
+
+
+class QueueSink(Sink):
+    """
+    Local stand-in for a message queue: each payload becomes one message file in <path>/new/.
+    Messages are written under <path>/tmp/ first, so a consumer never sees a partial one;
+    consumers claim a message by renaming it out of new/.
+    """
+
+    def describe(self, report_date):
+        return os.path.join(self.options['path'], 'new')
+
+    def deliver(self, report_date, payload):
+        message_name = f"{time.time_ns()}_{os.getpid()}_{threading.get_ident()}_{report_date}.json"
+        tmp_dir = os.path.join(self.options['path'], 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        os.makedirs(self.describe(report_date), exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, message_name)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        message_path = os.path.join(self.describe(report_date), message_name)
+        os.replace(tmp_path, message_path)
+        return True, None, message_path
+
+
+SINK_TYPES = {
+    'http': HttpSink,
+    'directory': DirectorySink,
+    'queue': QueueSink,
+}
+
+
+def get_sinks():
+    """Returns {name: Sink} for every sink configured in settings.MERGE_SINKS."""
+    return {name: SINK_TYPES[options['type']](name, options) for name, options in settings.MERGE_SINKS.items()}
@@ -0,0 +1,16 @@
+from unittest import mock
+
+from pipeline.tests.base import InlineExecutor, TempDirTestCase
+
+
+class OutboxTestCase(TempDirTestCase):
+    """Runs outbox.drain's deliveries on the test thread, without closing the test's connection after each."""
+
+    def setUp(self):
+        super().setUp()
+        for patcher in [
+            mock.patch('merger.outbox.ThreadPoolExecutor', InlineExecutor),
+            mock.patch('merger.outbox.connections'),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
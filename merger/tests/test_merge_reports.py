@@ -0,0 +1,148 @@
+import datetime
+import io
+import json
+import os
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from merger import outbox
+from merger.models import PushOutbox
+from merger.tests.base import OutboxTestCase
+from nrldc_app.models import Nrldc2AData
+from pipeline import archive, signals
+from posoco.models import PosocoTableA
+from report_dashboard.models import JobRun
+
+REPORT_DATE = datetime.date(2025, 3, 1)
+
+
+class MergeReportsTests(OutboxTestCase):
+    def setUp(self):
+        super().setUp()
+        settings_override = override_settings(MERGE_SINKS={
+            'drop_folder': {'type': 'directory', 'path': os.path.join(self.tmp_dir, 'drop')},
+            'local_queue': {'type': 'queue', 'path': os.path.join(self.tmp_dir, 'queue')},
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def merge(self, *args):
+        call_command('merge_reports', '--date', '2025-03-02', *args, stdout=io.StringIO())
+
+    def test_the_merge_queues_a_row_per_sink_and_delivers_nothing(self):
+        self.merge()
+
+        self.assertEqual(
+            sorted(PushOutbox.objects.values_list('sink', 'report_date', 'status')),
+            [('drop_folder', REPORT_DATE, PushOutbox.Status.PENDING), ('local_queue', REPORT_DATE, PushOutbox.Status.PENDING)],
+        )
+        self.assertFalse(os.path.exists('drop'))
+        self.assertFalse(os.path.exists('queue'))
+        # The merged file is written before anything is queued.
+        self.assertEqual(self.merged_file()['NRLDC']['date'], '2025-03-01')
+        # Archived under the run date, like the source records it was built from.
+        [(archived_date, archived)] = archive.read_range(archive.MERGED)
+        self.assertEqual((archived_date, archived), ('2025-03-02', self.merged_file()))
+        self.assertIsNone(JobRun.objects.get(script_name='merge_reports').push_seconds)
+
+    def merged_file(self):
+        [saved] = os.listdir(os.path.join('downloads', 'overall_json'))
+        with open(os.path.join('downloads', 'overall_json', saved), encoding='utf-8') as f:
+            return json.load(f)
+
+    def write_nrldc(self, total):
+        name = f"nrldc_{total}.json"
+        with open(name, 'w', encoding='utf-8') as f:
+            json.dump({'NRLDC': {'nrldc_table_2A': [{'state': 'PUNJAB', 'total': total}], 'nrldc_table_2C': [{'state': 'NR'}]}}, f)
+        # Indexed under the run date; the payload carries the day before.
+        signals.report_written.send(sender='NRLDC', report_date=datetime.date(2025, 3, 2), json_path=name, pdf_path=None)
+
+    def queued_payloads(self, sink):
+        entries = PushOutbox.objects.filter(sink=sink, status=PushOutbox.Status.PENDING)
+        return [json.loads(entry.payload) for entry in entries]
+
+    def test_regions_are_read_from_the_artifact_index(self):
+        self.write_nrldc(10)
+        self.merge()
+
+        merged = self.merged_file()
+        self.assertEqual(merged['NRLDC']['nrldc_table_2A'], [{'state': 'PUNJAB', 'total': 10}])
+        self.assertEqual(merged['NRLDC']['date'], '2025-03-01')
+        # Regions with nothing indexed fall back to their empty template.
+        self.assertEqual(merged['SRLDC']['srldc_table_2A'][0]['thermal'], None)
+
+    def test_regions_are_built_from_the_report_tables_with_from_db(self):
+        run_date = datetime.date(2025, 3, 2)
+        Nrldc2AData.objects.create(report_date=run_date, state='PUNJAB', thermal=5.0)
+        Nrldc2AData.objects.create(report_date=run_date + datetime.timedelta(days=1), state='DELHI')
+        PosocoTableA.objects.create(report_date=run_date, category='energy', nr='12', total='40')
+        self.merge('--from-db')
+
+        merged = self.merged_file()
+        [punjab] = merged['NRLDC']['nrldc_table_2A']
+        self.assertEqual((punjab['state'], punjab['thermal'], punjab['hydro']), ('PUNJAB', 5.0, None))
+        # Empty tables get their template, as in the JSON path.
+        self.assertEqual(len(merged['NRLDC']['nrldc_table_2C']), 11)
+        # POSOCO keeps its {category: {region: value}} shape.
+        self.assertEqual(merged['POSOCO']['posoco_table_a'], [
+            {'energy': {'NR': '12', 'WR': None, 'SR': None, 'ER': None, 'NER': None, 'TOTAL': '40'}},
+        ])
+        self.assertEqual(merged['POSOCO']['date'], '2025-03-01')
+
+    def test_only_changed_regions_are_queued_for_partial_sinks(self):
+        with self.settings(MERGE_SINKS={
+            'full': {'type': 'directory', 'path': 'full'},
+            'partial': {'type': 'directory', 'path': 'partial', 'partial': True},
+        }):
+            self.write_nrldc(10)
+            self.merge()
+            outbox.drain()
+
+            self.write_nrldc(11)
+            self.merge()
+            [full] = self.queued_payloads('full')
+            [partial] = self.queued_payloads('partial')
+
+        self.assertEqual(sorted(full), ['NRLDC', 'POSOCO', 'SRLDC', 'WRLDC'])
+        self.assertEqual(list(partial), ['NRLDC'])
+        self.assertEqual(partial['NRLDC']['nrldc_table_2A'][0]['total'], 11)
+
+    def test_a_range_is_merged_in_one_pass(self):
+        for day in range(2, 5):
+            Nrldc2AData.objects.create(report_date=datetime.date(2025, 3, day), state='PUNJAB', thermal=float(day))
+        with CaptureQueriesContext(connection) as queries:
+            call_command('merge_reports', '--from', '2025-03-02', '--to', '2025-03-04', '--from-db', stdout=io.StringIO())
+
+        # One query per table for the whole range, not one per day.
+        self.assertEqual(len([q for q in queries if 'FROM "nrldc_app_nrldc2adata"' in q['sql']]), 1)
+        saved = sorted(os.listdir(os.path.join('downloads', 'overall_json')))
+        self.assertEqual([name[-15:] for name in saved], ['2025-03-01.json', '2025-03-02.json', '2025-03-03.json'])
+        with open(os.path.join('downloads', 'overall_json', saved[2]), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['NRLDC']['nrldc_table_2A'][0]['thermal'], 4.0)
+        self.assertEqual(PushOutbox.objects.filter(sink='drop_folder').count(), 3)
+
+    def test_range_options_are_checked(self):
+        for args in [
+            ['--from', '2025-03-02'],
+            ['--from', '2025-03-04', '--to', '2025-03-02'],
+            ['--from', '2025-03-02', '--to', '2025-03-04', '--date', '2025-03-02'],
+        ]:
+            with self.subTest(args=args), self.assertRaises(CommandError):
+                call_command('merge_reports', *args, stdout=io.StringIO())
+
+    def test_draining_fans_out_to_every_sink_and_unchanged_merges_are_not_queued_again(self):
+        self.merge()
+        self.assertEqual(outbox.drain(), {'sent': 2, 'retrying': 0, 'failed': 0})
+
+        with open(os.path.join('drop', 'merged_reports_2025-03-01.json'), encoding='utf-8') as f:
+            self.assertEqual(sorted(json.load(f)), ['NRLDC', 'POSOCO', 'SRLDC', 'WRLDC'])
+        self.assertEqual(len(os.listdir(os.path.join('queue', 'new'))), 1)
+
+        self.merge()
+        self.assertEqual(PushOutbox.objects.count(), 2)
+        self.merge('--force')
+        self.assertEqual(PushOutbox.objects.filter(status=PushOutbox.Status.PENDING).count(), 2)
+        self.assertTrue(outbox.has_due())
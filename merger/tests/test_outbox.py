@@ -0,0 +1,133 @@
+import datetime
+
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from merger import outbox
+from merger.models import PushedSection, PushOutbox
+from merger.sinks import Sink
+from merger.tests.base import OutboxTestCase
+
+REPORT_DATE = datetime.date(2025, 3, 1)
+
+
+class FakeSink(Sink):
+    """Answers with the queued results in turn and remembers what it was sent."""
+
+    def __init__(self, results, **options):
+        super().__init__('fake', options)
+        self.results = list(results)
+        self.delivered = []
+
+    def deliver(self, report_date, payload):
+        self.delivered.append(payload)
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@override_settings(MERGE_PUSH_BACKOFF=(60, 3600))
+class OutboxTests(TestCase):
+    def test_identical_payload_reuses_the_queued_entry(self):
+        first = outbox.enqueue('fake', REPORT_DATE, {'NRLDC': {'a': 1}})
+        second = outbox.enqueue('fake', REPORT_DATE, {'NRLDC': {'a': 1}})
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(PushOutbox.objects.count(), 1)
+
+    def test_newer_payload_supersedes_the_pending_one(self):
+        old = outbox.enqueue('fake', REPORT_DATE, {'NRLDC': {'a': 1}})
+        other_date = outbox.enqueue('fake', REPORT_DATE + datetime.timedelta(days=1), {'NRLDC': {'a': 1}})
+        new = outbox.enqueue('fake', REPORT_DATE, {'NRLDC': {'a': 2}})
+        old.refresh_from_db()
+        other_date.refresh_from_db()
+        self.assertEqual(old.status, PushOutbox.Status.SUPERSEDED)
+        self.assertEqual(other_date.status, PushOutbox.Status.PENDING)
+        self.assertEqual(new.status, PushOutbox.Status.PENDING)
+
+    def test_entry_claimed_elsewhere_is_not_sent_again(self):
+        entry = outbox.enqueue('fake', REPORT_DATE, {'NRLDC': {'a': 1}})
+        PushOutbox.objects.filter(pk=entry.pk).update(status=PushOutbox.Status.SENDING)
+        sink = FakeSink([(True, 200, '')])
+        self.assertEqual(outbox.attempt(entry.pk, {'fake': sink}), (None, None))
+        self.assertEqual(sink.delivered, [])
+
+    def test_failed_delivery_backs_off_then_gives_up(self):
+        entry = outbox.enqueue('fake', REPORT_DATE, {'NRLDC': {'a': 1}})
+        sink = FakeSink([(False, 503, 'busy'), ConnectionError('refused')], max_attempts=2)
+
+        before = timezone.now()
+        entry, _ = outbox.attempt(entry.pk, {'fake': sink})
+        self.assertEqual(entry.status, PushOutbox.Status.PENDING)
+        self.assertEqual(entry.attempts, 1)
+        self.assertEqual(entry.last_error, 'HTTP 503: busy')
+        # The first retry waits MERGE_PUSH_BACKOFF[0] seconds, give or take the 20% jitter.
+        delay = (entry.next_attempt_at - before).total_seconds()
+        self.assertGreaterEqual(delay, 48)
+        self.assertLessEqual(delay, 73)
+        self.assertEqual(outbox.due_entries(), [])
+
+        entry, _ = outbox.attempt(entry.pk, {'fake': sink})
+        self.assertEqual(entry.status, PushOutbox.Status.FAILED)
+        self.assertEqual(entry.attempts, 2)
+        self.assertEqual(entry.last_error, 'refused')
+
+    def test_backoff_doubles_up_to_the_longest_delay(self):
+        for attempts, expected in [(1, 60), (2, 120), (3, 240), (10, 3600)]:
+            seconds = outbox.backoff_delay(attempts).total_seconds()
+            self.assertGreaterEqual(seconds, expected * 0.8)
+            self.assertLessEqual(seconds, expected * 1.2)
+
+    def test_delivery_records_the_sent_regions(self):
+        merged = {'NRLDC': {'a': 1}, 'SRLDC': {'b': 2}}
+        entry = outbox.enqueue('fake', REPORT_DATE, merged)
+        entry, _ = outbox.attempt(entry.pk, {'fake': FakeSink([(True, 200, '')])})
+        self.assertEqual(entry.status, PushOutbox.Status.SENT)
+        self.assertEqual(PushedSection.objects.filter(sink='fake', report_date=REPORT_DATE).count(), 2)
+
+        changed, unchanged = outbox.changed_regions('fake', REPORT_DATE, {'NRLDC': {'a': 1}, 'SRLDC': {'b': 3}})
+        self.assertEqual(changed, ['SRLDC'])
+        self.assertEqual(unchanged, ['NRLDC'])
+
+    def test_stale_claims_are_released(self):
+        entry = outbox.enqueue('fake', REPORT_DATE, {'NRLDC': {'a': 1}})
+        PushOutbox.objects.filter(pk=entry.pk).update(
+            status=PushOutbox.Status.SENDING,
+            updated_at=timezone.now() - outbox.STALE_CLAIM - datetime.timedelta(minutes=1),
+        )
+        self.assertEqual(outbox.release_stale_claims(), 1)
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, PushOutbox.Status.PENDING)
+
+
+@override_settings(MERGE_PUSH_BACKOFF=(60, 3600))
+class DrainTests(OutboxTestCase):
+    def drain(self, sink):
+        results = []
+        with mock.patch('merger.outbox.get_sinks', return_value={'fake': sink}):
+            counts = outbox.drain(on_result=results.append)
+        return counts, results
+
+    def test_each_result_is_reported_and_counted(self):
+        outbox.enqueue('fake', REPORT_DATE, {'NRLDC': {'a': 1}})
+        outbox.enqueue('fake', REPORT_DATE + datetime.timedelta(days=1), {'NRLDC': {'a': 1}})
+        counts, results = self.drain(FakeSink([(True, 200, ''), (False, 500, 'oops')]))
+
+        self.assertEqual(counts, {'sent': 1, 'retrying': 1, 'failed': 0})
+        self.assertEqual(sorted(entry.status for entry in results), [PushOutbox.Status.PENDING, PushOutbox.Status.SENT])
+
+    def test_a_database_error_is_recorded_as_a_failed_attempt(self):
+        entry = outbox.enqueue('fake', REPORT_DATE, {'NRLDC': {'a': 1}})
+        with mock.patch('merger.outbox.record_delivered', side_effect=OperationalError('database is locked')):
+            with self.assertLogs('merger.outbox', 'ERROR'):
+                counts, [result] = self.drain(FakeSink([(True, 200, '')]))
+
+        self.assertEqual(counts, {'sent': 0, 'retrying': 1, 'failed': 0})
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), (PushOutbox.Status.PENDING, 1))
+        self.assertEqual(entry.last_error, 'Database error: database is locked')
+        self.assertGreater(entry.next_attempt_at, timezone.now())
+        self.assertEqual((result.pk, result.status, result.attempts), (entry.pk, entry.status, 1))
@@ -4,19 +4,44 @@ import os
 import pandas as pd
 import json
 import logging
-from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.core.management.base import CommandError
 from nrldc_app.models import Nrldc2AData, Nrldc2CData
+from pipeline import publication
+from pipeline.cache import cached_json
+from pipeline.checkpoints import ReportRun, ReportStages
+from pipeline.leases import LeasedCommand
+from pipeline.tables import upsert_rows
 from tabula.io import read_pdf
 
+NRLDC_BASE_URL = settings.UPSTREAM_URLS['NRLDC']
+NRLDC_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "application/json",
+    "X-Requested-With": "XMLHttpRequest",
+    "Referer": "https://nrldc.in/reports/daily-psp",
+}
 
-class Command(BaseCommand):
+
+def nrldc_documents_url(day, base_url=NRLDC_BASE_URL):
+    """Returns the daily PSP document-list URL for documents published on day."""
+    day_str = day.strftime("%Y-%m-%d")
+    return f"{base_url}/get-documents-list/111?start_date={day_str}&end_date={day_str}"
+
+
+def nrldc_download_url(file_name, base_url=NRLDC_BASE_URL):
+    """Returns the download URL for a file_name taken from the document list."""
+    return f"{base_url}/download-file?any=Reports%2FDaily%2FDaily%20PSP%20Report%2F{file_name}"
+
+
+class Command(LeasedCommand):
     help = 'Download today\'s NRDC report and extract tables 2(A) and 2(C) to a single JSON file and save to DB'
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'logs')
-        os.makedirs(log_dir, exist_ok=True)
-        log_file = os.path.join(log_dir, 'nrldc.log')
+        # Written to LOG_DIR so the dashboard's log panel can tail it.
+        os.makedirs(settings.LOG_DIR, exist_ok=True)
+        log_file = os.path.join(settings.LOG_DIR, 'nrldc.log')
 
         self.logger = logging.getLogger('nrldc_logger')
         self.logger.setLevel(logging.INFO)
@@ -165,7 +190,8 @@ class Command(BaseCommand):
             return None
         return str(value).strip() if value is not None else None
 
-    def extract_tables_from_pdf(self, pdf_path, output_dir, report_date):
+    def read_tables(self, pdf_path):
+        """Extract stage: reads every table in the PDF with tabula."""
         self.write("🔍 Extracting tables from PDF...")
 
         try:
@@ -183,14 +209,17 @@ class Command(BaseCommand):
             raise CommandError("❌ No tables found in the PDF.")
 
         self.write(self.style.SUCCESS(f"✅ Found {len(tables)} tables."))
+        return tables
 
+    def clean_tables(self, tables):
+        """Clean stage: cuts tables 2(A) and 2(C) out of the raw tables and renames their columns."""
         all_content_df = pd.DataFrame()
         for df in tables:
             all_content_df = pd.concat([all_content_df, df], ignore_index=True)
 
         all_content_df_cleaned = all_content_df.dropna(axis=0, how='all')
 
-        combined_json_data = {}
+        frames = {}
 
         # Extract Table 2(A)
         sub_2A = self.extract_subtable_by_markers(
@@ -218,39 +247,8 @@ class Command(BaseCommand):
                 'Consumption (Net MU)': 'consumption',
             }
             sub_2A_renamed = sub_2A.rename(columns=column_mapping_2A)
-            sub_2A_filtered = sub_2A_renamed[[col for col in column_mapping_2A.values() if col in sub_2A_renamed.columns]]
-
-            combined_json_data['nrldc_table_2A'] = sub_2A_filtered.to_dict(orient='records')
+            frames['nrldc_table_2A'] = sub_2A_renamed[[col for col in column_mapping_2A.values() if col in sub_2A_renamed.columns]]
             self.write(self.style.SUCCESS(f"✅ Table 2(A) extracted for combined JSON."))
-
-            for index, row_data in sub_2A_filtered.iterrows():
-                try:
-                    obj, created = Nrldc2AData.objects.update_or_create(
-                        report_date=report_date,
-                        state=self._safe_string(row_data.get('state')),
-                        defaults={
-                            'thermal': self._safe_float(row_data.get('thermal')),
-                            'hydro': self._safe_float(row_data.get('hydro')),
-                            'gas_naptha_diesel': self._safe_float(row_data.get('gas_naptha_diesel')),
-                            'solar': self._safe_float(row_data.get('solar')),
-                            'wind': self._safe_float(row_data.get('wind')),
-                            'other_biomass': self._safe_float(row_data.get('other_biomass')),
-                            'total': self._safe_float(row_data.get('total')),
-                            'drawal_sch': self._safe_float(row_data.get('drawal_sch')),
-                            'act_drawal': self._safe_float(row_data.get('act_drawal')),
-                            'ui': self._safe_float(row_data.get('ui')),
-                            'requirement': self._safe_float(row_data.get('requirement')),
-                            'shortage': self._safe_float(row_data.get('shortage')),
-                            'consumption': self._safe_float(row_data.get('consumption')),
-                        }
-                    )
-                    if created:
-                        self.write(self.style.SUCCESS(f"➕ Created Table 2A entry for {report_date} - {row_data.get('state')}"))
-                    else:
-                        self.write(self.style.SUCCESS(f"🔄 Updated Table 2A entry for {report_date} - {row_data.get('state')}"))
-                except Exception as e:
-                    self.write(self.style.ERROR(f"❌ Error saving Table 2A row to DB (State: {row_data.get('state')}): {e}"), level='error')
-            self.write(self.style.SUCCESS(f"✅ Table 2(A) data saved to database."))
         else:
             self.write(self.style.WARNING("⚠️ Table 2(A) not found or extraction failed."), level='warning')
 
@@ -282,96 +280,133 @@ class Command(BaseCommand):
             }
 
             sub_2C_renamed = sub_2C.rename(columns=column_mapping_2C)
-            sub_2C_filtered = sub_2C_renamed[[col for col in column_mapping_2C.values() if col in sub_2C_renamed.columns]]
-
-            combined_json_data['nrldc_table_2C'] = sub_2C_filtered.to_dict(orient='records')
+            frames['nrldc_table_2C'] = sub_2C_renamed[[col for col in column_mapping_2C.values() if col in sub_2C_renamed.columns]]
             self.write(self.style.SUCCESS(f"✅ Table 2(C) extracted for combined JSON."))
-
-            for index, row_data in sub_2C_filtered.iterrows():
-                try:
-                    obj, created = Nrldc2CData.objects.update_or_create(
-                        report_date=report_date,
-                        state=self._safe_string(row_data.get('state')),
-                        defaults={
-                            'max_demand': self._safe_float(row_data.get('max_demand')),
-                            'time_max': self._safe_string(row_data.get('time_max')),
-                            'shortage_during': self._safe_float(row_data.get('shortage_during')),
-                            'req_max_demand': self._safe_float(row_data.get('req_max_demand')),
-                            'max_req_day': self._safe_float(row_data.get('max_req_day')),
-                            'time_max_req': self._safe_string(row_data.get('time_max_req')),
-                            'shortage_max_req': self._safe_float(row_data.get('shortage_max_req')),
-                            'demand_met_max_req': self._safe_float(row_data.get('demand_met_max_req')),
-                            'min_demand_met': self._safe_float(row_data.get('min_demand_met')),
-                            'time_min_demand': self._safe_string(row_data.get('time_min_demand')),
-                            'ace_max': self._safe_float(row_data.get('ace_max')),
-                            'ace_min': self._safe_float(row_data.get('ace_min')),
-                            'time_ace_max': self._safe_string(row_data.get('time_ace_max')),
-                            'time_ace_min': self._safe_string(row_data.get('time_ace_min')),
-                        }
-                    )
-                    if created:
-                        self.write(self.style.SUCCESS(f"➕ Created Table 2C entry for {report_date} - {row_data.get('state')}"))
-                    else:
-                        self.write(self.style.SUCCESS(f"🔄 Updated Table 2C entry for {report_date} - {row_data.get('state')}"))
-                except Exception as e:
-                    self.write(self.style.ERROR(f"❌ Error saving Table 2C row to DB (State: {self._safe_string(row_data.get('state'))}): {e}"), level='error')
-            self.write(self.style.SUCCESS(f"✅ Table 2(C) data saved to database."))
         else:
             self.write(self.style.WARNING("⚠️ Table 2(C) not found or extraction failed."), level='warning')
 
+        return frames
+
+    def persist_tables(self, frames, report_date):
+        """Persist stage: upserts the cleaned rows into Nrldc2AData and Nrldc2CData, one bulk write per table."""
+        if 'nrldc_table_2A' in frames:
+            rows = []
+            for index, row_data in frames['nrldc_table_2A'].iterrows():
+                state = self._safe_string(row_data.get('state'))
+                if not state:
+                    continue
+                rows.append({
+                    'report_date': report_date,
+                    'state': state,
+                    'thermal': self._safe_float(row_data.get('thermal')),
+                    'hydro': self._safe_float(row_data.get('hydro')),
+                    'gas_naptha_diesel': self._safe_float(row_data.get('gas_naptha_diesel')),
+                    'solar': self._safe_float(row_data.get('solar')),
+                    'wind': self._safe_float(row_data.get('wind')),
+                    'other_biomass': self._safe_float(row_data.get('other_biomass')),
+                    'total': self._safe_float(row_data.get('total')),
+                    'drawal_sch': self._safe_float(row_data.get('drawal_sch')),
+                    'act_drawal': self._safe_float(row_data.get('act_drawal')),
+                    'ui': self._safe_float(row_data.get('ui')),
+                    'requirement': self._safe_float(row_data.get('requirement')),
+                    'shortage': self._safe_float(row_data.get('shortage')),
+                    'consumption': self._safe_float(row_data.get('consumption')),
+                })
+            saved = upsert_rows(Nrldc2AData, rows)
+            self.write(self.style.SUCCESS(f"✅ Table 2(A): {saved} row(s) saved to database for {report_date}."))
+
+        if 'nrldc_table_2C' in frames:
+            rows = []
+            for index, row_data in frames['nrldc_table_2C'].iterrows():
+                state = self._safe_string(row_data.get('state'))
+                if not state:
+                    continue
+                rows.append({
+                    'report_date': report_date,
+                    'state': state,
+                    'max_demand': self._safe_float(row_data.get('max_demand')),
+                    'time_max': self._safe_string(row_data.get('time_max')),
+                    'shortage_during': self._safe_float(row_data.get('shortage_during')),
+                    'req_max_demand': self._safe_float(row_data.get('req_max_demand')),
+                    'max_req_day': self._safe_float(row_data.get('max_req_day')),
+                    'time_max_req': self._safe_string(row_data.get('time_max_req')),
+                    'shortage_max_req': self._safe_float(row_data.get('shortage_max_req')),
+                    'demand_met_max_req': self._safe_float(row_data.get('demand_met_max_req')),
+                    'min_demand_met': self._safe_float(row_data.get('min_demand_met')),
+                    'time_min_demand': self._safe_string(row_data.get('time_min_demand')),
+                    'ace_max': self._safe_float(row_data.get('ace_max')),
+                    'ace_min': self._safe_float(row_data.get('ace_min')),
+                    'time_ace_max': self._safe_string(row_data.get('time_ace_max')),
+                    'time_ace_min': self._safe_string(row_data.get('time_ace_min')),
+                })
+            saved = upsert_rows(Nrldc2CData, rows)
+            self.write(self.style.SUCCESS(f"✅ Table 2(C): {saved} row(s) saved to database for {report_date}."))
+
+    def write_json(self, frames, output_dir, report_date):
+        """JSON stage: writes the cleaned tables to nrldc_DDMMYYYY.json in output_dir and returns its path."""
+        combined_json_data = {key: df.to_dict(orient='records') for key, df in frames.items()}
+
         if combined_json_data:
-            # Save JSON file with current date in 'nrldc_DDMMYYYY.json' format
-            today = datetime.datetime.now()
-            json_name = f"nrldc_{today.strftime('%d%m%Y')}.json"
+            # Save JSON file with the report date in 'nrldc_DDMMYYYY.json' format
+            json_name = f"nrldc_{report_date.strftime('%d%m%Y')}.json"
             json_path = os.path.join(output_dir, json_name)
             with open(json_path, 'w', encoding='utf-8') as f:
                 json.dump(combined_json_data, f, indent=4, ensure_ascii=False)
             self.stdout.write(self.style.SUCCESS(f"✅ Combined tables saved to: {json_path}"))
+            return json_path
         else:
             self.write(self.style.WARNING("⚠️ No tables were successfully extracted to create a combined JSON file."), level='warning')
 
-    def handle(self, *args, **options):
-        today = datetime.date.today()
-        today_str = today.strftime("%Y-%m-%d")
-        project_name = "NRLDC"
+    def report_stages(self, output_dir, report_date):
+        return ReportStages(
+            'NRLDC', report_date, self.read_tables, self.clean_tables,
+            lambda frames: self.persist_tables(frames, report_date),
+            lambda frames: self.write_json(frames, output_dir, report_date),
+        )
 
-        if Nrldc2AData.objects.filter(report_date=today).exists() or \
-           Nrldc2CData.objects.filter(report_date=today).exists():
-            self.write(self.style.SUCCESS(f"✅ Pass: Report data for {today_str} already exists in the database. Skipping download and extraction."))
-            return
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Bypass the shared metadata cache and always query the NRLDC document list.'
+        )
 
-        url = f"https://nrldc.in/get-documents-list/111?start_date={today_str}&end_date={today_str}"
-        headers = {
-            "User-Agent": "Mozilla/5.0",
-            "Accept": "application/json",
-            "X-Requested-With": "XMLHttpRequest",
-            "Referer": "https://nrldc.in/reports/daily-psp",
-        }
+    def download_report(self, today, use_cache=True):
+        """Download stage: looks up today's document and downloads it; returns (pdf_path, output_dir)."""
+        today_str = today.strftime("%Y-%m-%d")
+        url = nrldc_documents_url(today)
+        headers = NRLDC_HEADERS
 
-        self.write(f"🌐 Fetching NRDC report metadata for {today_str}...")
-        try:
+        def fetch_documents():
             response = requests.get(url, headers=headers)
             response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            raise CommandError(f"❌ Error fetching NRDC metadata: {e}")
+            return response.json()
 
+        self.write(f"🌐 Fetching NRDC report metadata for {today_str}...")
         try:
-            data = response.json()
-        except Exception as e:
+            # Empty listings are not cached so a late-published report is picked up on the next poll.
+            data = cached_json(
+                'nrldc_documents', url, fetch_documents,
+                bypass=not use_cache,
+                cache_if=lambda d: d.get("recordsFiltered", 0) > 0,
+            )
+        except ValueError as e:
             raise CommandError(f"❌ Failed to parse JSON response: {e}")
+        except requests.exceptions.RequestException as e:
+            raise CommandError(f"❌ Error fetching NRDC metadata: {e}")
 
         if data.get("recordsFiltered", 0) == 0:
             self.write(self.style.WARNING(f"⚠️ No report available for today ({today_str}). This might be due to weekends, holidays, or late publishing."), level='warning')
-            return
+            return None, None
 
         file_info = data["data"][0]
         file_name = file_info["file_name"]
         title = file_info["title"]
 
-        download_url = f"https://nrldc.in/download-file?any=Reports%2FDaily%2FDaily%20PSP%20Report%2F{file_name}"
+        download_url = nrldc_download_url(file_name)
 
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        output_dir = os.path.join("downloads", project_name, f"report_{timestamp}")
+        output_dir = os.path.join("downloads", "NRLDC", f"report_{timestamp}")
         os.makedirs(output_dir, exist_ok=True)
         self.write(f"📁 Created output directory: {output_dir}")
 
@@ -381,10 +416,28 @@ class Command(BaseCommand):
         try:
             pdf_response = requests.get(download_url, headers=headers)
             pdf_response.raise_for_status()
+            publication.note_response(pdf_response)
             with open(pdf_path, "wb") as f:
                 f.write(pdf_response.content)
             self.write(self.style.SUCCESS(f"✅ Downloaded report to: {pdf_path}"))
         except Exception as e:
             raise CommandError(f"❌ Failed to download PDF: {e}")
 
-        self.extract_tables_from_pdf(pdf_path, output_dir, today)
+        return pdf_path, output_dir
+
+    def handle(self, *args, **options):
+        today = datetime.date.today()
+        today_str = today.strftime("%Y-%m-%d")
+        project_name = "NRLDC"
+        run = ReportRun(project_name, today)
+
+        if not run.is_resumed and (Nrldc2AData.objects.filter(report_date=today).exists() or
+                                   Nrldc2CData.objects.filter(report_date=today).exists()):
+            self.write(self.style.SUCCESS(f"✅ Pass: Report data for {today_str} already exists in the database. Skipping download and extraction."))
+            return
+
+        pdf_path, output_dir = run.download(self.download_report, today, not options.get('no_cache', False))
+        if pdf_path is None:
+            return
+
+        self.report_stages(output_dir, today).process(run, pdf_path)
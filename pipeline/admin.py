@@ -0,0 +1,30 @@
+from django.contrib import admin
+from .models import JobLease, PublicationObservation, ReportArtifact, ReportCheckpoint
+
+
+@admin.register(ReportCheckpoint)
+class ReportCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('source', 'report_date', 'completed_stage', 'updated_at', 'last_error')
+    list_filter = ('source', 'completed_stage')
+    ordering = ('-report_date', 'source')
+
+
+@admin.register(ReportArtifact)
+class ReportArtifactAdmin(admin.ModelAdmin):
+    list_display = ('source', 'report_date', 'json_path', 'updated_at')
+    list_filter = ('source',)
+    ordering = ('-report_date', 'source')
+
+
+@admin.register(PublicationObservation)
+class PublicationObservationAdmin(admin.ModelAdmin):
+    list_display = ('source', 'report_date', 'first_seen_at', 'last_modified')
+    list_filter = ('source',)
+    ordering = ('-report_date', 'source')
+
+
+@admin.register(JobLease)
+class JobLeaseAdmin(admin.ModelAdmin):
+    list_display = ('name', 'owner', 'token', 'acquired_at', 'expires_at')
+    search_fields = ('name', 'owner')
+    ordering = ('name',)
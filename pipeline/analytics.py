@@ -0,0 +1,244 @@
+"""
+Columnar, memory-mapped copy of the report tables for dashboard analytics.
+
+refresh() snapshots every table of a source into ANALYTICS_DIR/<table_key>/<version>/ as one
+.npy file per column: report_date as datetime64[D], numeric fields as float64 (POSOCO's and WRLDC's
+numbers are stored as text and are parsed), and text fields as int32 codes into a label list kept in the
+table's manifest.json. The manifest is swapped in atomically, so readers never see a half-written
+version. Readers np.load() the columns with mmap_mode='r': every web worker maps the same files
+and the OS page cache holds one copy. Aggregations are plain NumPy over those arrays.
+A source is refreshed after each successful ReportRun (pipeline.signals.run_finished).
+"""
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import models
+from django.dispatch import receiver
+
+from pipeline import signals
+from pipeline.tables import REPORT_TABLES
+
+# The row label of each table: the state, or POSOCO's category / fuel type.
+KEY_FIELDS = ('state', 'category', 'fuel_type')
+# Text columns that are not row labels: the time of day a maximum or minimum was reached.
+TIME_FIELD_PREFIX = 'time'
+MANIFEST_NAME = 'manifest.json'
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+# --- Building ---
+
+def column_kind(field):
+    """'date', 'float' or 'category' for the fields the store keeps, else None; export_parquet types columns by it too."""
+    if isinstance(field, models.DateField) and field.name == 'report_date':
+        return 'date'
+    if isinstance(field, models.FloatField):
+        return 'float'
+    if isinstance(field, models.CharField):
+        # Labels and times stay text; every other CharField holds a number stored as text.
+        if field.name in KEY_FIELDS or field.name.startswith(TIME_FIELD_PREFIX):
+            return 'category'
+        return 'float'
+    return None
+
+
+def to_float(values):
+    """Parses numbers stored as text; blanks, '-' and anything else that is not a number become NaN."""
+    if values.dtype == object:
+        values = pd.to_numeric(pd.Series(values).astype('string').str.replace(',', '', regex=False), errors='coerce')
+    return np.asarray(values, dtype='float64')
+
+
+def refresh_table(table_key, model):
+    """Writes a new version of one table's columns and points its manifest at it."""
+    kinds = {}
+    for field in model._meta.concrete_fields:
+        kind = column_kind(field)
+        if kind:
+            kinds[field.attname] = kind
+
+    rows = list(model.objects.order_by('report_date', 'pk').values_list(*kinds))
+    frame = pd.DataFrame.from_records(rows, columns=list(kinds))
+
+    table_dir = os.path.join(settings.ANALYTICS_DIR, table_key)
+    version = f"{time.time_ns()}"
+    version_dir = os.path.join(table_dir, version)
+    os.makedirs(version_dir)
+    manifest = {'version': version, 'rows': len(frame), 'columns': {}}
+    for name, kind in kinds.items():
+        column = {'kind': kind}
+        if kind == 'date':
+            values = pd.to_datetime(frame[name]).to_numpy(dtype='datetime64[D]')
+        elif kind == 'float':
+            values = to_float(frame[name].to_numpy())
+        else:
+            codes, labels = pd.factorize(frame[name], use_na_sentinel=True)
+            values = codes.astype('int32')
+            column['labels'] = [str(label) for label in labels]
+        np.save(os.path.join(version_dir, f"{name}.npy"), values)
+        manifest['columns'][name] = column
+
+    manifest_path = os.path.join(table_dir, MANIFEST_NAME)
+    with open(f"{manifest_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    # Older versions may still be mapped by a reader (and cannot be deleted on Windows then);
+    # whatever cannot be removed now goes on the next refresh.
+    for name in os.listdir(table_dir):
+        if name != version and os.path.isdir(os.path.join(table_dir, name)):
+            shutil.rmtree(os.path.join(table_dir, name), ignore_errors=True)
+    return manifest['rows']
+
+
+def refresh(source=None):
+    """Rebuilds the columns of one source's tables (or all of them). Returns {table_key: rows}."""
+    sources = [source] if source else list(REPORT_TABLES)
+    return {
+        table_key: refresh_table(table_key, model)
+        for name in sources
+        for table_key, model in REPORT_TABLES[name].items()
+    }
+
+
+def refresh_after_ingest(source):
+    """Refreshes a source's columns once its ingest has finished; a failure here must not fail the ingest."""
+    try:
+        refresh(source)
+    except Exception as e:
+        print(f"⚠️ Analytics refresh for {source} failed: {e}")
+
+
+@receiver(signals.run_finished, dispatch_uid='analytics.refresh')
+def _refresh_on_run_finished(sender, status, **kwargs):
+    if status == signals.SUCCESS:
+        refresh_after_ingest(sender)
+
+
+# --- Reading ---
+
+class Table:
+    def __init__(self, manifest, arrays):
+        self.manifest = manifest
+        self.arrays = arrays
+
+    def __len__(self):
+        return self.manifest['rows']
+
+    def labels(self, name):
+        return self.manifest['columns'][name]['labels']
+
+    @property
+    def key_field(self):
+        return next(name for name in KEY_FIELDS if name in self.arrays)
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+
+def load_table(table_key):
+    """Returns the current version of a table as memory-mapped arrays, or None before the first refresh."""
+    if not any(table_key in tables for tables in REPORT_TABLES.values()):
+        return None
+    manifest_path = os.path.join(settings.ANALYTICS_DIR, table_key, MANIFEST_NAME)
+    try:
+        mtime = os.stat(manifest_path).st_mtime_ns
+    except OSError:
+        return None
+    with _cache_lock:
+        cached = _cache.get(table_key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        version_dir = os.path.join(settings.ANALYTICS_DIR, table_key, manifest['version'])
+        arrays = {
+            # Zero-length arrays cannot be memory-mapped.
+            name: np.load(os.path.join(version_dir, f"{name}.npy"), mmap_mode='r' if manifest['rows'] else None)
+            for name in manifest['columns']
+        }
+        table = Table(manifest, arrays)
+        _cache[table_key] = (mtime, table)
+        return table
+
+
+# --- Aggregations ---
+
+def _date_mask(table, start, end):
+    dates = table['report_date']
+    mask = np.ones(len(table), dtype=bool)
+    if start:
+        mask &= dates >= np.datetime64(start, 'D')
+    if end:
+        mask &= dates <= np.datetime64(end, 'D')
+    return mask
+
+
+def monthly(table_key, metric, how='max', start=None, end=None):
+    """
+    Returns {label: {'YYYY-MM': value}}: the max, min, mean or sum of metric per row label and
+    calendar month, e.g. monthly('nrldc_table_2C', 'max_demand') for per-state monthly peaks.
+    """
+    table = load_table(table_key)
+    if table is None or not len(table):
+        return {}
+    values = table[metric]
+    codes = table[table.key_field]
+    mask = _date_mask(table, start, end) & ~np.isnan(values) & (codes >= 0)
+    if not mask.any():
+        return {}
+
+    values = values[mask]
+    codes = codes[mask]
+    months = table['report_date'][mask].astype('datetime64[M]')
+    first_month = months.min()
+    month_index = (months - first_month).astype('int64')
+    month_count = int(month_index.max()) + 1
+
+    # One group per (label, month); sort once and reduce each run of equal group ids.
+    groups = codes.astype('int64') * month_count + month_index
+    order = np.argsort(groups, kind='stable')
+    groups, values = groups[order], values[order]
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    if how == 'max':
+        reduced = np.maximum.reduceat(values, starts)
+    elif how == 'min':
+        reduced = np.minimum.reduceat(values, starts)
+    elif how in ('sum', 'mean'):
+        reduced = np.add.reduceat(values, starts)
+        if how == 'mean':
+            reduced = reduced / np.diff(np.r_[starts, len(values)])
+    else:
+        raise ValueError(f"Unknown aggregation '{how}'; use max, min, mean or sum.")
+
+    labels = table.labels(table.key_field)
+    result = {}
+    for group, value in zip(groups[starts].tolist(), reduced.tolist()):
+        label, month = divmod(group, month_count)
+        result.setdefault(labels[label], {})[str(first_month + month)] = value
+    return result
+
+
+def generation_mix(start=None, end=None, regions=('nr', 'wr', 'sr', 'er', 'ner')):
+    """Returns {region: {fuel_type: total}} from POSOCO table G, summed over [start, end]."""
+    table = load_table('posoco_table_g')
+    if table is None or not len(table):
+        return {}
+    mask = _date_mask(table, start, end)
+    codes = table['fuel_type'][mask]
+    valid = codes >= 0
+    labels = table.labels('fuel_type')
+    mix = {}
+    for region in regions:
+        values = np.nan_to_num(table[region][mask][valid])
+        totals = np.bincount(codes[valid], weights=values, minlength=len(labels))
+        mix[region.upper()] = dict(zip(labels, totals.tolist()))
+    return mix
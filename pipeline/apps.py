@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class PipelineConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'pipeline'
+
+    def ready(self):
+        # Connects the receivers of pipeline.signals.
+        from pipeline import analytics, artifacts, coverage, publication  # noqa: F401
@@ -0,0 +1,110 @@
+"""
+Append-only JSON Lines archive of report data.
+
+Each archive (one per source, plus 'merged') is a pair of files under ARCHIVE_DIR:
+<name>.jsonl holds one compact {"date": ..., "data": ...} record per line, and <name>.idx holds
+"<date> <offset> <length>" lines pointing at them. Writing a day is one append to each file;
+a rewritten day is appended again and the later index line wins. Reading the last N days is
+one seek to the oldest wanted record followed by a sequential read.
+
+Every archive is keyed by run date, the report_date the database rows carry, rather than the
+day the report describes (the day before): a source's record and the merged payload built from
+it share a date.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+MERGED = 'merged'
+LOCK_TIMEOUT = 30
+
+_thread_lock = threading.Lock()
+
+
+def _paths(name):
+    base = os.path.join(settings.ARCHIVE_DIR, name)
+    return f"{base}.jsonl", f"{base}.idx"
+
+
+@contextlib.contextmanager
+def _locked(name):
+    """Serialises appends across threads and processes (an O_EXCL lock file works on Windows too)."""
+    os.makedirs(settings.ARCHIVE_DIR, exist_ok=True)
+    lock_path = os.path.join(settings.ARCHIVE_DIR, f"{name}.lock")
+    with _thread_lock:
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                if time.monotonic() > deadline:
+                    # Left behind by a process that died while appending.
+                    os.remove(lock_path)
+                    continue
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            os.remove(lock_path)
+
+
+def append(name, report_date, data):
+    """Appends one day's data to the archive; a later append for the same date replaces it for readers."""
+    data_path, index_path = _paths(name)
+    line = json.dumps({'date': str(report_date), 'data': data}, ensure_ascii=False, separators=(',', ':')) + '\n'
+    encoded = line.encode('utf-8')
+    with _locked(name):
+        with open(data_path, 'ab') as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(encoded)
+        with open(index_path, 'a', encoding='utf-8') as f:
+            f.write(f"{report_date} {offset} {len(encoded)}\n")
+
+
+def read_index(name):
+    """Returns {date_str: (offset, length)} for the latest record of each date."""
+    index = {}
+    _, index_path = _paths(name)
+    if not os.path.exists(index_path):
+        return index
+    with open(index_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3:
+                index[parts[0]] = (int(parts[1]), int(parts[2]))
+    return index
+
+
+def read_range(name, start=None, end=None):
+    """Returns [(date_str, data)] for every archived date in [start, end], oldest first."""
+    index = read_index(name)
+    wanted = sorted(
+        (offset, length, day) for day, (offset, length) in index.items()
+        if (start is None or day >= str(start)) and (end is None or day <= str(end))
+    )
+    if not wanted:
+        return []
+    records = []
+    data_path, _ = _paths(name)
+    with open(data_path, 'rb') as f:
+        f.seek(wanted[0][0])
+        position = wanted[0][0]
+        for offset, length, day in wanted:
+            if offset != position:
+                # Skip over records superseded by a later append of the same date.
+                f.seek(offset)
+            records.append((day, json.loads(f.read(length))['data']))
+            position = offset + length
+    return sorted(records, key=lambda record: record[0])
+
+
+def read_last(name, days):
+    """Returns [(date_str, data)] for the most recent `days` archived dates, oldest first."""
+    dates = sorted(read_index(name))[-days:]
+    return read_range(name, dates[0], dates[-1]) if dates else []
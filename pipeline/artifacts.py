@@ -0,0 +1,64 @@
+"""
+Index of downloaded report artifacts.
+
+Every JSON an ingest writes for a (source, report_date) (the report_written signal) is recorded
+together with its SHA-256, so merge_reports can look a region up directly instead of scanning downloads/ and can
+tell when the file on disk is no longer the one that was indexed. The JSON is also appended to
+the source's JSON Lines archive (pipeline.archive) for history reads. Indexed files are read
+through pipeline.compaction, so they stay readable after compact_downloads compresses or bundles them.
+"""
+import hashlib
+import json
+
+from django.dispatch import receiver
+
+from pipeline import archive, signals
+from pipeline.compaction import file_sha256, read_report_bytes
+from pipeline.models import ReportArtifact
+from report_dashboard.models import SOURCE_SCRIPTS, AutomationJob
+
+
+class StaleArtifact(Exception):
+    """The indexed file is missing or was changed after it was recorded."""
+
+
+def record_artifact(source, report_date, json_path, pdf_path=None):
+    """
+    Points (source, report_date) at json_path, replacing whatever was indexed before, archives its
+    data and marks the source's dashboard job as having data for report_date.
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        archive.append(source, report_date, json.load(f))
+    artifact, _ = ReportArtifact.objects.update_or_create(
+        source=source,
+        report_date=report_date,
+        defaults={
+            'json_path': json_path,
+            'json_sha256': file_sha256(json_path),
+            'pdf_path': pdf_path or '',
+            'pdf_sha256': file_sha256(pdf_path) if pdf_path else '',
+        },
+    )
+    AutomationJob.mark_data_available(SOURCE_SCRIPTS[source], report_date)
+    return artifact
+
+
+@receiver(signals.report_written, dispatch_uid='artifacts.record_artifact')
+def _record_on_written(sender, report_date, json_path, pdf_path, **kwargs):
+    record_artifact(sender, report_date, json_path, pdf_path)
+
+
+def artifacts_between(start, end):
+    """Returns {(source, report_date): ReportArtifact} for every report indexed in [start, end], in one query."""
+    return {(a.source, a.report_date): a for a in ReportArtifact.objects.filter(report_date__range=(start, end))}
+
+
+def load_artifact_json(artifact):
+    """Reads the indexed JSON, refusing it if its hash no longer matches the index."""
+    try:
+        raw = read_report_bytes(artifact.json_path)
+    except OSError as e:
+        raise StaleArtifact(f"{artifact.json_path} is not readable: {e}")
+    if hashlib.sha256(raw).hexdigest() != artifact.json_sha256:
+        raise StaleArtifact(f"{artifact.json_path} changed after it was indexed.")
+    return json.loads(raw)
@@ -0,0 +1,66 @@
+"""
+Read-through cache for upstream metadata API responses (document lists, file lists).
+
+Entries live in the file-backed 'upstream' cache so every process - manual runs,
+dashboard triggers and scheduled polling - shares them.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def _get_cache():
+    return caches[settings.UPSTREAM_CACHE_ALIAS]
+
+
+def _store(cache, cache_key, data, ttl, stale):
+    cache.set(cache_key, {"fetched_at": time.time(), "data": data}, timeout=ttl + stale)
+
+
+def _revalidate(cache_key, fetch, ttl, stale, cache_if):
+    """Refreshes one entry; a short-lived lock key stops several processes refreshing it at once."""
+    lock_key = f"{cache_key}:refreshing"
+    cache = _get_cache()
+    if not cache.add(lock_key, True, timeout=60):
+        return
+    try:
+        data = fetch()
+        if cache_if is None or cache_if(data):
+            _store(cache, cache_key, data, ttl, stale)
+    except Exception as e:
+        print(f"⚠️ Background refresh of {cache_key} failed: {e}")
+    finally:
+        cache.delete(lock_key)
+
+
+def cached_json(endpoint, key, fetch, bypass=False, cache_if=None):
+    """
+    Returns the result of fetch() for (endpoint, key), served from the shared cache when possible.
+
+    UPSTREAM_CACHE_TTLS[endpoint] is (fresh_seconds, stale_seconds). Fresh entries are returned
+    as-is; entries past their TTL but inside the stale window are returned immediately and
+    refreshed in a background thread. bypass=True always calls upstream and refreshes the entry.
+    Only results for which cache_if(data) is true are stored.
+    """
+    ttl, stale = settings.UPSTREAM_CACHE_TTLS.get(endpoint, (0, 0))
+    cache_key = f"{endpoint}:{key}"
+    cache = _get_cache()
+
+    if not bypass and ttl:
+        entry = cache.get(cache_key)
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age < ttl:
+                return entry["data"]
+            if age < ttl + stale:
+                threading.Thread(
+                    target=_revalidate, args=(cache_key, fetch, ttl, stale, cache_if)
+                ).start()
+                return entry["data"]
+
+    data = fetch()
+    if ttl and (cache_if is None or cache_if(data)):
+        _store(cache, cache_key, data, ttl, stale)
+    return data
@@ -0,0 +1,171 @@
+"""
+Stage checkpoints for the ingest commands.
+
+Each report goes through download -> extract -> clean -> persist -> json. The last completed
+stage is kept in ReportCheckpoint and the outputs of the extract and clean stages are pickled
+next to the PDF, so a rerun after a failure only repeats the work that actually failed.
+How a run ended is sent as pipeline.signals.run_finished.
+"""
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from django.utils import timezone
+
+from pipeline import leases, signals
+from pipeline.models import ReportCheckpoint
+
+STAGES = [stage.value for stage in ReportCheckpoint.Stage]
+CHECKPOINT_DIR_NAME = '_checkpoint'
+
+
+class ReportStages:
+    """A source's functions for the stages after download, bound to one report's date and directory."""
+
+    def __init__(self, source, report_date, extract, clean, persist, write_json):
+        self.source = source
+        self.report_date = report_date
+        self.extract = extract  # pdf_path -> raw tables
+        self.clean = clean  # raw tables -> cleaned tables
+        self.persist = persist  # cleaned tables -> None; raises if rows cannot be saved
+        self.write_json = write_json  # cleaned tables -> path of the JSON written, or None
+
+    def process(self, run, pdf_path):
+        """Runs the stages through ReportRun run, skipping any its checkpoint shows as done. Returns the JSON path."""
+        tables = run.stage('extract', self.extract, pdf_path)
+        cleaned = run.stage('clean', self.clean, tables)
+        run.stage('persist', self._persist, cleaned)
+        return run.stage('json', self._write_json, cleaned, pdf_path)
+
+    def load(self, pdf_path, lease=None):
+        """
+        Runs the stages without checkpoints, as backfill does. The PDF is parsed before the transaction
+        opens, so the lease's row (lease, or the current command's) is only locked around the writes;
+        a failed write rolls the date back.
+        """
+        cleaned = self.clean(self.extract(pdf_path))
+        self._persist(cleaned, lease)
+        return self._write_json(cleaned, pdf_path)
+
+    def _persist(self, cleaned, lease=None):
+        # Nothing is written if this node lost the lease while it was stalled.
+        with leases.fenced(lease):
+            self.persist(cleaned)
+        signals.report_persisted.send(sender=self.source, report_date=self.report_date)
+
+    def _write_json(self, cleaned, pdf_path):
+        json_path = self.write_json(cleaned)
+        if json_path:
+            signals.report_written.send(
+                sender=self.source, report_date=self.report_date, json_path=json_path, pdf_path=pdf_path,
+            )
+        return json_path
+
+
+class ReportRun:
+    """Runs one (source, report_date) report through the stages, resuming an unfinished run."""
+
+    def __init__(self, source, report_date):
+        self.checkpoint = (
+            ReportCheckpoint.objects.filter(source=source, report_date=report_date).first()
+            or ReportCheckpoint(source=source, report_date=report_date)
+        )
+        if self.checkpoint.completed_stage == STAGES[-1]:
+            # The previous run finished; a new run starts from scratch.
+            self.checkpoint.completed_stage = None
+        self.started_at = timezone.now()
+        self.resumed = self.is_resumed
+        # Seconds taken by each stage run this time, and the tables extract found; sent with run_finished.
+        self.timings = {}
+        self.tables_found = None
+
+    @property
+    def is_resumed(self):
+        return self.checkpoint.completed_stage is not None
+
+    def is_done(self, stage):
+        completed = self.checkpoint.completed_stage
+        return completed is not None and STAGES.index(completed) >= STAGES.index(stage)
+
+    def _artifact_path(self, stage):
+        return os.path.join(self.checkpoint.report_dir, CHECKPOINT_DIR_NAME, f"{stage}.pkl")
+
+    def _mark(self, stage, **fields):
+        for name, value in fields.items():
+            setattr(self.checkpoint, name, value)
+        self.checkpoint.completed_stage = stage
+        self.checkpoint.last_error = None
+        self.checkpoint.save()
+
+    def _fail(self, stage, error):
+        self.checkpoint.last_error = f"{stage}: {error}"
+        if self.checkpoint.pk:
+            self.checkpoint.save(update_fields=['last_error', 'updated_at'])
+        self._finish(signals.FAILED, self.checkpoint.last_error)
+
+    def _timed(self, stage, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.timings[stage] = time.perf_counter() - started
+
+    def _finish(self, status, error=''):
+        signals.run_finished.send(
+            sender=self.checkpoint.source, report_date=self.checkpoint.report_date, status=status, error=error,
+            started_at=self.started_at, resumed=self.resumed, completed_stage=self.checkpoint.completed_stage,
+            pdf_path=self.checkpoint.pdf_path, timings=self.timings, tables_found=self.tables_found,
+        )
+
+    def download(self, func, *args):
+        """
+        Returns (pdf_path, report_dir), reusing the PDF of an unfinished run when it is still on disk.
+        func must return (pdf_path, report_dir), or (None, None) when nothing could be downloaded.
+        """
+        if self.is_done('download') and os.path.exists(self.checkpoint.pdf_path):
+            print(f"⏭️ Resuming {self.checkpoint.source} {self.checkpoint.report_date} "
+                  f"after '{self.checkpoint.completed_stage}' using {self.checkpoint.pdf_path}")
+            return self.checkpoint.pdf_path, self.checkpoint.report_dir
+
+        self.checkpoint.completed_stage = None
+        try:
+            pdf_path, report_dir = self._timed('download', func, *args)
+        except Exception as e:
+            self._fail('download', e)
+            raise
+        if pdf_path:
+            self._mark('download', pdf_path=pdf_path, report_dir=report_dir)
+        else:
+            self._finish(signals.NO_REPORT)
+        return pdf_path, report_dir
+
+    def stage(self, stage, func, *args):
+        """
+        Runs func(*args) for stage unless a previous run completed it; extract/clean outputs are checkpointed.
+        """
+        keeps_output = stage in ('extract', 'clean')
+        if self.is_done(stage):
+            if not keeps_output:
+                return None
+            if os.path.exists(self._artifact_path(stage)):
+                return pd.read_pickle(self._artifact_path(stage))
+
+        try:
+            result = self._timed(stage, func, *args)
+        except Exception as e:
+            self._fail(stage, e)
+            raise
+
+        if stage == 'extract' and hasattr(result, '__len__'):
+            self.tables_found = len(result)
+
+        if keeps_output:
+            os.makedirs(os.path.dirname(self._artifact_path(stage)), exist_ok=True)
+            pd.to_pickle(result, self._artifact_path(stage))
+        self._mark(stage)
+        if stage == STAGES[-1]:
+            shutil.rmtree(os.path.join(self.checkpoint.report_dir, CHECKPOINT_DIR_NAME), ignore_errors=True)
+            self._finish(signals.SUCCESS)
+        return result
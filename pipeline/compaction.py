@@ -0,0 +1,220 @@
+"""
+Compaction of the downloads/ tree, and a reader that finds files wherever compaction moved them.
+
+compact_downloads hard-links duplicate PDFs together, compresses JSON artifacts (zstd when the
+zstandard package is installed, gzip otherwise) and packs old report_<date>_* folders into one
+zip bundle per source and month under downloads/bundles/, recording every packed file in
+downloads/bundles/index.json. open_report_file()/read_report_bytes() take the original path of
+a file and return its original bytes whether it is still on disk, compressed, or bundled.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import zipfile
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is used instead
+    zstandard = None
+
+DOWNLOADS_DIR = 'downloads'
+BUNDLES_DIR_NAME = 'bundles'
+INDEX_NAME = 'index.json'
+COMPRESSED_SUFFIXES = ('.zst', '.gz')
+
+_index_cache = {}
+_index_lock = threading.Lock()
+
+
+# --- Compression ---
+
+def compression_suffix():
+    return '.zst' if zstandard else '.gz'
+
+
+def compress_bytes(data, suffix):
+    if suffix == '.zst':
+        return zstandard.ZstdCompressor(level=19).compress(data)
+    return gzip.compress(data, compresslevel=9)
+
+
+def decompress_bytes(data, suffix):
+    if suffix == '.zst':
+        if zstandard is None:
+            raise RuntimeError("This file is zstd-compressed; install the 'zstandard' package to read it.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if suffix == '.gz':
+        return gzip.decompress(data)
+    return data
+
+
+def _suffix_of(name):
+    return next((suffix for suffix in COMPRESSED_SUFFIXES if name.endswith(suffix)), '')
+
+
+# --- Bundle index ---
+
+def bundles_dir(downloads_dir=DOWNLOADS_DIR):
+    return os.path.join(downloads_dir, BUNDLES_DIR_NAME)
+
+
+def index_key(path, downloads_dir=DOWNLOADS_DIR):
+    """The index key of a file: its path relative to downloads_dir, with forward slashes."""
+    return os.path.relpath(os.path.abspath(path), os.path.abspath(downloads_dir)).replace(os.sep, '/')
+
+
+def load_bundle_index(downloads_dir=DOWNLOADS_DIR):
+    """Returns {index_key: {'bundle': zip name, 'member': member name}}, reloaded when the file changes."""
+    path = os.path.join(bundles_dir(downloads_dir), INDEX_NAME)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    with _index_lock:
+        cached = _index_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        _index_cache[path] = (mtime, index)
+        return index
+
+
+def save_bundle_index(index, downloads_dir=DOWNLOADS_DIR):
+    os.makedirs(bundles_dir(downloads_dir), exist_ok=True)
+    path = os.path.join(bundles_dir(downloads_dir), INDEX_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# --- Reader API ---
+
+def read_report_bytes(path, downloads_dir=DOWNLOADS_DIR):
+    """Returns the original contents of path, which may since have been compressed or bundled."""
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return f.read()
+    for suffix in COMPRESSED_SUFFIXES:
+        if os.path.exists(path + suffix):
+            with open(path + suffix, 'rb') as f:
+                return decompress_bytes(f.read(), suffix)
+
+    entry = load_bundle_index(downloads_dir).get(index_key(path, downloads_dir))
+    if entry is None:
+        raise FileNotFoundError(path)
+    with zipfile.ZipFile(os.path.join(bundles_dir(downloads_dir), entry['bundle'])) as bundle:
+        return decompress_bytes(bundle.read(entry['member']), _suffix_of(entry['member']))
+
+
+def open_report_file(path, downloads_dir=DOWNLOADS_DIR):
+    """Opens path for binary reading wherever compaction put it."""
+    if os.path.exists(path):
+        return open(path, 'rb')
+    return io.BytesIO(read_report_bytes(path, downloads_dir))
+
+
+def report_file_exists(path, downloads_dir=DOWNLOADS_DIR):
+    return (
+        os.path.exists(path)
+        or any(os.path.exists(path + suffix) for suffix in COMPRESSED_SUFFIXES)
+        or index_key(path, downloads_dir) in load_bundle_index(downloads_dir)
+    )
+
+
+# --- Compaction steps ---
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dedupe_files(paths):
+    """Replaces files with identical content by hard links to one copy. Returns (linked, bytes_saved)."""
+    first_by_hash = {}
+    linked = saved = 0
+    for path in sorted(paths):
+        digest = file_sha256(path)
+        original = first_by_hash.setdefault(digest, path)
+        if original == path or os.path.samefile(original, path):
+            continue
+        tmp_path = f"{path}.link"
+        try:
+            os.link(original, tmp_path)
+        except OSError:
+            # No hard links on this filesystem; leave the copy alone.
+            continue
+        size = os.path.getsize(path)
+        os.replace(tmp_path, path)
+        linked += 1
+        saved += size
+    return linked, saved
+
+
+def compress_file(path):
+    """Compresses path next to itself and removes the original. Returns the bytes saved."""
+    suffix = compression_suffix()
+    with open(path, 'rb') as f:
+        data = f.read()
+    tmp_path = f"{path}{suffix}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(compress_bytes(data, suffix))
+    os.replace(tmp_path, path + suffix)
+    saved = len(data) - os.path.getsize(path + suffix)
+    os.remove(path)
+    return saved
+
+
+def bundle_folders(source, month, folders, downloads_dir=DOWNLOADS_DIR):
+    """
+    Appends whole report folders to <source>_<month>.zip and indexes every file under its original
+    path. PDFs are stored once per content hash. Files are removed only after the bundle tests good.
+    Returns the number of files bundled.
+    """
+    os.makedirs(bundles_dir(downloads_dir), exist_ok=True)
+    bundle_name = f"{source}_{month}.zip"
+    bundle_path = os.path.join(bundles_dir(downloads_dir), bundle_name)
+    index = dict(load_bundle_index(downloads_dir))
+    bundled_paths = []
+
+    with zipfile.ZipFile(bundle_path, 'a', compression=zipfile.ZIP_STORED) as bundle:
+        members = set(bundle.namelist())
+        for folder in folders:
+            folder_name = os.path.basename(folder)
+            for name in sorted(os.listdir(folder)):
+                file_path = os.path.join(folder, name)
+                if not os.path.isfile(file_path):
+                    continue
+                if name.lower().endswith('.pdf'):
+                    member = f"pdf/{file_sha256(file_path)}.pdf"
+                else:
+                    member = f"{folder_name}/{name}"
+                if member not in members:
+                    # PDFs and compressed JSON gain nothing from deflate; plain files get it.
+                    compress_type = zipfile.ZIP_STORED if _suffix_of(name) or name.lower().endswith('.pdf') else zipfile.ZIP_DEFLATED
+                    bundle.write(file_path, member, compress_type=compress_type)
+                    members.add(member)
+                original = file_path[:-len(_suffix_of(name))] if _suffix_of(name) else file_path
+                index[index_key(original, downloads_dir)] = {'bundle': bundle_name, 'member': member}
+                bundled_paths.append(file_path)
+
+    with zipfile.ZipFile(bundle_path) as bundle:
+        bad_member = bundle.testzip()
+    if bad_member:
+        raise RuntimeError(f"{bundle_path} failed verification at {bad_member}; folders were left in place.")
+
+    save_bundle_index(index, downloads_dir)
+    for file_path in bundled_paths:
+        os.remove(file_path)
+    for folder in folders:
+        # Sub-folders (such as a leftover _checkpoint/) are not bundled and keep their folder alive.
+        if not os.listdir(folder):
+            os.rmdir(folder)
+    return len(bundled_paths)
@@ -0,0 +1,77 @@
+"""
+Which dates each report table has rows for, for the dashboard's coverage calendar.
+
+Each table's dates come from one GROUP BY report_date query, kept in the file-backed coverage
+cache (shared by the web server and the worker) until rows of that source are persisted (the
+report_persisted signal), or COVERAGE_CACHE_TTL passes. Any date range is then answered from the cached map, both for the
+calendar page and for find_gaps.
+"""
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+from django.dispatch import receiver
+
+from pipeline import signals
+from pipeline.tables import REPORT_TABLES, iter_tables
+
+
+def _get_cache():
+    return caches[settings.COVERAGE_CACHE_ALIAS]
+
+
+def _key(source, table_key):
+    return f"coverage:{source}:{table_key}"
+
+
+def table_dates(source, table_key):
+    """{report_date: row count} over the whole table."""
+    cache = _get_cache()
+    counts = cache.get(_key(source, table_key))
+    if counts is None:
+        model = REPORT_TABLES[source][table_key]
+        counts = dict(model.objects.order_by().values_list('report_date').annotate(rows=Count('pk')))
+        cache.set(_key(source, table_key), counts, timeout=settings.COVERAGE_CACHE_TTL)
+    return counts
+
+
+def dates_with_rows(source):
+    """Dates on which at least one of the source's tables has rows."""
+    return set().union(*(table_dates(source, table_key).keys() for table_key in REPORT_TABLES[source]))
+
+
+def invalidate(source):
+    """Drops a source's cached dates."""
+    _get_cache().delete_many([_key(source, table_key) for table_key in REPORT_TABLES.get(source, {})])
+
+
+@receiver(signals.report_persisted, dispatch_uid='coverage.invalidate')
+def _invalidate_on_persist(sender, **kwargs):
+    invalidate(sender)
+
+
+def calendar(start, end):
+    """
+    Coverage of every table between start and end for the calendar page: per table, one
+    [rows, level] pair per day from start, where level is 0 without rows, 1 with fewer rows than
+    the table usually has and 2 otherwise. The page lays the days out in weeks itself.
+    """
+    days = [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+    tables = []
+    for source, table_key, _ in iter_tables():
+        counts = table_dates(source, table_key)
+        # The table's usual row count (its most common one), so short days stand out.
+        usual = Counter(counts.values()).most_common(1)[0][0] if counts else 0
+        cells = []
+        for day in days:
+            rows = counts.get(day, 0)
+            cells.append([rows, 0 if not rows else (1 if rows < usual else 2)])
+        tables.append({
+            'source': source,
+            'table': table_key,
+            'days_covered': sum(1 for rows, _ in cells if rows),
+            'cells': cells,
+        })
+    return {'from': start.isoformat(), 'to': end.isoformat(), 'days': len(days), 'tables': tables}
@@ -0,0 +1,183 @@
+"""
+Database leases, so fetchers, backfills and job workers can run on several nodes at once.
+
+A lease is a JobLease row taken with SELECT ... FOR UPDATE. It stays held for JOB_LEASE_TTL
+seconds and a background heartbeat renews it every third of that. If a node dies, the lease
+expires and another node can take it. Each acquisition increments the row's token. Before
+writing data, the holder calls fence() inside its transaction. fence() locks the row and checks
+that the token is still its own. A node that stalled past its expiry and lost the lease is
+stopped there instead of overwriting the new holder's work.
+
+LeasedCommand takes a lease named after the command for the whole run; a run that finds it held
+raises LeaseHeld, which the job worker records as skipped. ReportStages writes each report inside
+fenced(), with the lease of the current thread or the one backfill took for the date.
+"""
+import contextlib
+import datetime
+import os
+import socket
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+from pipeline.models import JobLease
+
+_current = threading.local()
+
+
+class LeaseLost(Exception):
+    """The lease expired and was taken by another holder; stop before writing anything."""
+
+
+class LeaseHeld(Exception):
+    """Another node or process holds the command's lease, so this run did nothing."""
+
+
+def owner_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex[:8]}"
+
+
+class Lease:
+    def __init__(self, name, owner, token, ttl):
+        self.name = name
+        self.owner = owner
+        self.token = token
+        self.ttl = ttl
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._heartbeat = None
+
+    def renew(self):
+        """Pushes the expiry out again; marks the lease lost if it is no longer ours."""
+        renewed = JobLease.objects.filter(name=self.name, owner=self.owner, token=self.token).update(
+            expires_at=timezone.now() + datetime.timedelta(seconds=self.ttl),
+        )
+        if not renewed:
+            self.lost.set()
+        return bool(renewed)
+
+    def _beat(self):
+        try:
+            while not self._stop.wait(self.ttl / 3):
+                try:
+                    if not self.renew():
+                        return
+                except Exception:
+                    # The database may be briefly unreachable; the lease survives until it expires.
+                    pass
+        finally:
+            connections.close_all()
+
+    def start_heartbeat(self):
+        self._heartbeat = threading.Thread(target=self._beat, name=f"lease-{self.name}", daemon=True)
+        self._heartbeat.start()
+
+    def fence(self):
+        """
+        Call inside the transaction that writes the data. Locks the lease row until that transaction
+        ends (so nobody can take the lease over meanwhile) and raises LeaseLost if it is no longer ours.
+        """
+        row = JobLease.objects.select_for_update().filter(name=self.name).values('owner', 'token', 'expires_at').first()
+        if (
+            self.lost.is_set() or row is None or row['token'] != self.token or row['owner'] != self.owner
+            or row['expires_at'] <= timezone.now()
+        ):
+            self.lost.set()
+            raise LeaseLost(f"Lease '{self.name}' (token {self.token}) is no longer held by this process.")
+
+    def release(self):
+        self._stop.set()
+        if self._heartbeat:
+            self._heartbeat.join(timeout=5)
+        JobLease.objects.filter(name=self.name, owner=self.owner, token=self.token).update(
+            owner='', expires_at=timezone.now(),
+        )
+
+
+def acquire(name, ttl=None, start_heartbeat=True):
+    """Takes the lease if it is free or expired. Returns a Lease, or None while another holder has it."""
+    ttl = ttl or settings.JOB_LEASE_TTL
+    try:
+        with transaction.atomic():
+            JobLease.objects.get_or_create(name=name)
+    except IntegrityError:
+        # Created by another node at the same moment; it exists either way.
+        pass
+
+    owner = owner_id()
+    now = timezone.now()
+    with transaction.atomic():
+        row = JobLease.objects.select_for_update().get(name=name)
+        if row.owner and row.expires_at and row.expires_at > now:
+            return None
+        row.owner = owner
+        row.token += 1
+        row.acquired_at = now
+        row.expires_at = now + datetime.timedelta(seconds=ttl)
+        row.save()
+
+    lease = Lease(name, owner, row.token, ttl)
+    if start_heartbeat:
+        lease.start_heartbeat()
+    return lease
+
+
+def is_held(name):
+    return JobLease.objects.filter(name=name, expires_at__gt=timezone.now()).exclude(owner='').exists()
+
+
+@contextlib.contextmanager
+def hold(name, ttl=None):
+    """Yields the lease (also as current() for this thread), or None if someone else holds it."""
+    lease = acquire(name, ttl)
+    if lease is None:
+        yield None
+        return
+    previous = getattr(_current, 'lease', None)
+    _current.lease = lease
+    try:
+        yield lease
+    finally:
+        _current.lease = previous
+        lease.release()
+
+
+def current():
+    """The lease held by this thread's current command or backfill date, if any."""
+    return getattr(_current, 'lease', None)
+
+
+@contextlib.contextmanager
+def fenced(lease=None):
+    """A transaction for writes that must only land while lease (default: current()) is still held."""
+    lease = lease or current()
+    with transaction.atomic():
+        if lease:
+            lease.fence()
+        yield
+
+
+class LeasedCommand(BaseCommand):
+    """A management command that runs on at most one node at a time, under a lease named lease_name."""
+
+    lease_name = None
+
+    def get_lease_name(self):
+        return self.lease_name or self.__module__.rsplit('.', 1)[-1]
+
+    def execute(self, *args, **options):
+        with hold(self.get_lease_name()) as lease:
+            if lease is None:
+                raise LeaseHeld(f"'{self.get_lease_name()}' is already running on another node or process; skipped.")
+            return super().execute(*args, **options)
+
+    def run_from_argv(self, argv):
+        # From the command line (cron, Task Scheduler) a skipped run is not an error.
+        try:
+            super().run_from_argv(argv)
+        except LeaseHeld as e:
+            self.stdout.write(self.style.WARNING(f"⏭️ {e}"))
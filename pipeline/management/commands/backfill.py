@@ -0,0 +1,248 @@
+import datetime
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from nrldc_app.management.commands.nrldc_project import (
+    Command as NrldcCommand, NRLDC_HEADERS, nrldc_documents_url, nrldc_download_url,
+)
+from srldc_app.management.commands.srldc_project import Command as SrldcCommand, srldc_pdf_url, srldc_pdf_name
+from wrldc_app.management.commands.wrldc_project import Command as WrldcCommand, wrldc_pdf_url
+from posoco.management.commands import posoco
+from pipeline import analytics, leases
+from pipeline.cache import cached_json
+from pipeline.ratelimit import throttle
+
+SOURCES = ['NRLDC', 'SRLDC', 'WRLDC', 'POSOCO']
+PROGRESS_DIR = os.path.join('downloads', 'backfill')
+
+
+class ReportNotPublished(Exception):
+    """The upstream has no report for the requested date."""
+
+
+class DateLeased(Exception):
+    """Another node is loading this date right now."""
+
+
+def progress_path(source):
+    return os.path.join(PROGRESS_DIR, f"{source.lower()}_progress.json")
+
+
+def daterange(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += datetime.timedelta(days=1)
+
+
+class Progress:
+    """Resumable progress file: dates already loaded, dates with no report, and failures."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {'done': [], 'missing': [], 'failed': {}}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.data.update(json.load(f))
+
+    def is_done(self, day):
+        return day.isoformat() in self.data['done']
+
+    def mark(self, day, state, error=None):
+        key = day.isoformat()
+        with self.lock:
+            self.data['failed'].pop(key, None)
+            if key in self.data['missing']:
+                self.data['missing'].remove(key)
+            if state == 'failed':
+                self.data['failed'][key] = error
+            elif key not in self.data[state]:
+                self.data[state].append(key)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=4)
+            os.replace(tmp_path, self.path)
+
+
+class Command(BaseCommand):
+    help = 'Downloads, extracts and loads the reports of one source for a range of dates, resuming from a progress file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', required=True, choices=SOURCES, help='Source to backfill.')
+        parser.add_argument('--from', dest='date_from', required=True, help='First date (YYYY-MM-DD), as a daily run on that date would store it.')
+        parser.add_argument('--to', dest='date_to', required=True, help='Last date (YYYY-MM-DD), inclusive.')
+        parser.add_argument('--workers', type=int, default=4, help='Number of parallel downloads.')
+        parser.add_argument('--extract-workers', type=int, default=2, help='Number of parallel tabula extractions.')
+        parser.add_argument('--progress-file', help='Progress file path. Defaults to downloads/backfill/<source>_progress.json.')
+
+    def handle(self, *args, **options):
+        try:
+            date_from = datetime.datetime.strptime(options['date_from'], '%Y-%m-%d').date()
+            date_to = datetime.datetime.strptime(options['date_to'], '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError("Date format is incorrect. Please use YYYY-MM-DD.")
+        if date_from > date_to:
+            raise CommandError("--from must not be after --to.")
+        if options['workers'] < 1 or options['extract_workers'] < 1:
+            raise CommandError("--workers and --extract-workers must be at least 1.")
+
+        source = options['source']
+        progress = Progress(options['progress_file'] or progress_path(source))
+        days = [day for day in daterange(date_from, date_to) if not progress.is_done(day)]
+        self.stdout.write(f"🚀 Backfilling {source}: {len(days)} date(s) to load, "
+                          f"{(date_to - date_from).days + 1 - len(days)} already done.")
+        if not days:
+            return
+
+        if source == 'POSOCO':
+            self.posoco_files = self.list_posoco_files(days)
+
+        counts = {'done': 0, 'missing': 0, 'failed': 0, 'leased': 0}
+        # One lease per date, taken by the download and released once the date is loaded, so
+        # several nodes can work through the same range without loading a date twice at once.
+        self.leases = {}
+        with ThreadPoolExecutor(max_workers=options['workers']) as download_pool, \
+                ThreadPoolExecutor(max_workers=options['extract_workers']) as extract_pool:
+            downloads = {download_pool.submit(self.download, source, day): day for day in days}
+            extractions = {}
+            for future in as_completed(downloads):
+                day = downloads[future]
+                try:
+                    pdf_path, report_dir = future.result()
+                except ReportNotPublished as e:
+                    self.stdout.write(self.style.WARNING(f"⚠️ {day}: {e}"))
+                    progress.mark(day, 'missing')
+                    counts['missing'] += 1
+                    continue
+                except DateLeased as e:
+                    self.stdout.write(f"⏭️ {day}: {e}")
+                    counts['leased'] += 1
+                    continue
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"❌ {day}: download failed: {e}"))
+                    progress.mark(day, 'failed', str(e))
+                    counts['failed'] += 1
+                    continue
+                extractions[extract_pool.submit(self.extract, source, pdf_path, report_dir, day)] = day
+
+            for future in as_completed(extractions):
+                day = extractions[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"❌ {day}: extraction failed: {e}"))
+                    progress.mark(day, 'failed', str(e))
+                    counts['failed'] += 1
+                    continue
+                progress.mark(day, 'done')
+                counts['done'] += 1
+
+        if counts['done']:
+            # Once for the whole range rather than after every date.
+            analytics.refresh_after_ingest(source)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Backfill finished: {counts['done']} loaded, {counts['missing']} not published, {counts['failed']} failed, "
+            f"{counts['leased']} left to other nodes."
+        ))
+
+    # --- URL resolution ---
+
+    def list_posoco_files(self, days):
+        """Fetches the POSOCO file list once per month and maps each report date to its FilePath."""
+        files = {}
+        months = sorted({(day - datetime.timedelta(days=1)).replace(day=1) for day in days})
+        for month in months:
+            throttle(posoco.API_URL)
+            for entry in posoco.list_pdf_files(posoco.API_URL, posoco.build_payload(month)):
+                pdf_date = posoco.report_date_from_file_path(entry['FilePath'])
+                if pdf_date:
+                    files[pdf_date] = entry['FilePath']
+        return files
+
+    def resolve(self, source, day):
+        """Returns (url, local file name, headers) of the report a daily run on `day` would have loaded."""
+        pdf_date = day - datetime.timedelta(days=1)
+        if source == 'SRLDC':
+            return srldc_pdf_url(pdf_date), srldc_pdf_name(pdf_date), {}
+        if source == 'WRLDC':
+            return wrldc_pdf_url(pdf_date), f"daily{pdf_date.strftime('%d%m%y')}.pdf", {}
+        if source == 'POSOCO':
+            file_path = self.posoco_files.get(pdf_date)
+            if not file_path:
+                raise ReportNotPublished(f"No POSOCO file listed for {pdf_date}.")
+            url = posoco.BASE_URL.rstrip('/') + '/' + file_path.lstrip('/')
+            return url, f"daily{pdf_date.strftime('%d%m%y')}.pdf", {}
+
+        url = nrldc_documents_url(day)
+
+        def fetch_documents():
+            throttle(url)
+            response = requests.get(url, headers=NRLDC_HEADERS, timeout=60)
+            response.raise_for_status()
+            return response.json()
+
+        data = cached_json('nrldc_documents', url, fetch_documents, cache_if=lambda d: d.get("recordsFiltered", 0) > 0)
+        if data.get("recordsFiltered", 0) == 0:
+            raise ReportNotPublished(f"No NRLDC report listed for {day}.")
+        file_info = data["data"][0]
+        return nrldc_download_url(file_info["file_name"]), f"{file_info['title']}.pdf", NRLDC_HEADERS
+
+    # --- Stages ---
+
+    def download(self, source, day):
+        lease = leases.acquire(f"backfill:{source}:{day.isoformat()}")
+        if lease is None:
+            raise DateLeased("another node is loading this date.")
+        try:
+            result = self.fetch(source, day)
+        except BaseException:
+            lease.release()
+            raise
+        self.leases[day] = lease
+        return result
+
+    def fetch(self, source, day):
+        url, pdf_name, headers = self.resolve(source, day)
+        report_dir = os.path.join('downloads', source, f"report_{day.isoformat()}_00-00-00")
+        os.makedirs(report_dir, exist_ok=True)
+        pdf_path = os.path.join(report_dir, pdf_name)
+        if os.path.exists(pdf_path):
+            return pdf_path, report_dir
+
+        throttle(url)
+        response = requests.get(url, headers=headers, stream=True, timeout=120)
+        if response.status_code == 404:
+            if not os.listdir(report_dir):
+                os.rmdir(report_dir)
+            raise ReportNotPublished(f"{url} returned 404.")
+        response.raise_for_status()
+        tmp_path = f"{pdf_path}.part"
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=8192):
+                f.write(chunk)
+        os.replace(tmp_path, pdf_path)
+        self.stdout.write(self.style.SUCCESS(f"✅ {day}: downloaded {pdf_path}"))
+        return pdf_path, report_dir
+
+    def extract(self, source, pdf_path, report_dir, day):
+        lease = self.leases.pop(day)
+        try:
+            command_class = {
+                'NRLDC': NrldcCommand, 'SRLDC': SrldcCommand, 'WRLDC': WrldcCommand, 'POSOCO': posoco.Command,
+            }[source]
+            command = command_class(stdout=self.stdout, stderr=self.stderr)
+            # A failed write rolls the date back and marks it failed instead of done, so it is
+            # retried (and find_gaps does not skip it).
+            command.report_stages(report_dir, day).load(pdf_path, lease)
+        finally:
+            lease.release()
+            # Worker threads each hold their own connection; release it once the date is loaded.
+            connections.close_all()
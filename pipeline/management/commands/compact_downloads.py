@@ -0,0 +1,100 @@
+import datetime
+import os
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from pipeline import compaction
+
+SOURCES = ['NRLDC', 'SRLDC', 'WRLDC', 'POSOCO']
+
+
+def folder_date(name, prefix):
+    """The date in a report_<YYYY-MM-DD>_* folder or merged_reports_<YYYY-MM-DD>_* file name, or None."""
+    if not name.startswith(prefix):
+        return None
+    try:
+        return datetime.date.fromisoformat(name[len(prefix):len(prefix) + 10])
+    except ValueError:
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Deduplicates PDFs, compresses JSON and packs old report folders under downloads/ into monthly bundles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--downloads-dir', default=compaction.DOWNLOADS_DIR, help='Root of the per-source download folders.')
+        parser.add_argument('--compress-after', type=int, default=3, metavar='DAYS', help='Compress JSON files older than this many days.')
+        parser.add_argument('--bundle-after', type=int, default=60, metavar='DAYS', help='Pack report folders older than this many days into monthly bundles.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be compacted.')
+
+    def report_dirs(self, downloads_dir, source):
+        """Returns [(date, folder path)] for the report_<date>_* folders of a source."""
+        source_dir = os.path.join(downloads_dir, source)
+        if not os.path.isdir(source_dir):
+            return []
+        folders = []
+        for name in sorted(os.listdir(source_dir)):
+            day = folder_date(name, 'report_')
+            if day and os.path.isdir(os.path.join(source_dir, name)):
+                folders.append((day, os.path.join(source_dir, name)))
+        return folders
+
+    def handle(self, *args, **options):
+        downloads_dir = options['downloads_dir']
+        dry_run = options['dry_run']
+        today = datetime.date.today()
+        compress_before = today - datetime.timedelta(days=options['compress_after'])
+        bundle_before = today - datetime.timedelta(days=options['bundle_after'])
+
+        # --- Deduplicate PDFs ---
+        pdfs = []
+        for source in SOURCES:
+            for root, _, files in os.walk(os.path.join(downloads_dir, source)):
+                pdfs.extend(os.path.join(root, name) for name in files if name.lower().endswith('.pdf'))
+        if dry_run:
+            self.stdout.write(f"🔍 {len(pdfs)} PDFs would be checked for duplicates.")
+        else:
+            linked, saved = compaction.dedupe_files(pdfs)
+            self.stdout.write(f"🔗 Hard-linked {linked} duplicate PDFs, {saved / 1024 / 1024:.1f} MB saved.")
+
+        # --- Compress JSON ---
+        to_compress = []
+        for source in SOURCES:
+            for day, folder in self.report_dirs(downloads_dir, source):
+                if day < compress_before:
+                    to_compress.extend(
+                        os.path.join(folder, name) for name in os.listdir(folder) if name.endswith('.json')
+                    )
+        merged_dir = os.path.join(downloads_dir, 'overall_json')
+        if os.path.isdir(merged_dir):
+            for name in os.listdir(merged_dir):
+                day = folder_date(name, 'merged_reports_')
+                if day and day < compress_before and name.endswith('.json'):
+                    to_compress.append(os.path.join(merged_dir, name))
+        if dry_run:
+            self.stdout.write(f"🔍 {len(to_compress)} JSON files would be compressed ({compaction.compression_suffix()}).")
+        else:
+            saved = sum(compaction.compress_file(path) for path in to_compress)
+            self.stdout.write(
+                f"🗜️ Compressed {len(to_compress)} JSON files ({compaction.compression_suffix()}), {saved / 1024 / 1024:.1f} MB saved."
+            )
+
+        # --- Bundle old report folders ---
+        for source in SOURCES:
+            by_month = defaultdict(list)
+            for day, folder in self.report_dirs(downloads_dir, source):
+                if day < bundle_before:
+                    by_month[f"{day:%Y-%m}"].append(folder)
+            for month, folders in sorted(by_month.items()):
+                if dry_run:
+                    self.stdout.write(f"🔍 {source} {month}: {len(folders)} folders would be bundled.")
+                    continue
+                try:
+                    bundled = compaction.bundle_folders(source, month, folders, downloads_dir)
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"❌ {source} {month}: bundling failed: {e}"))
+                    continue
+                self.stdout.write(self.style.SUCCESS(
+                    f"📦 {source} {month}: {len(folders)} folders ({bundled} files) packed into {source}_{month}.zip."
+                ))
@@ -0,0 +1,148 @@
+import datetime
+import json
+import os
+import shutil
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+from django.db.models import Count, Max
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from pipeline.analytics import column_kind, to_float
+from pipeline.models import ReportArtifact
+from pipeline.tables import iter_tables
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional; only this command needs it
+    pyarrow = None
+
+STATE_FILE = '_export_state.json'
+
+
+def arrow_type(field):
+    """Maps a Django model field to the Parquet column type it is exported as."""
+    if isinstance(field, (models.AutoField, models.BigAutoField, models.IntegerField)):
+        return pyarrow.int64()
+    if isinstance(field, models.FloatField):
+        return pyarrow.float64()
+    if isinstance(field, models.BooleanField):
+        return pyarrow.bool_()
+    if isinstance(field, models.DateTimeField):
+        return pyarrow.timestamp('us', tz=settings.TIME_ZONE if settings.USE_TZ else None)
+    if isinstance(field, models.DateField):
+        return pyarrow.date32()
+    if isinstance(field, models.CharField) and column_kind(field) == 'float':
+        # POSOCO's and WRLDC's numbers are stored as text; blanks and '-' become nulls.
+        return pyarrow.float64()
+    return pyarrow.string()
+
+
+def arrow_column(field, values):
+    if isinstance(field, models.CharField) and column_kind(field) == 'float':
+        return pyarrow.array(to_float(np.array(values, dtype=object)), type=pyarrow.float64(), from_pandas=True)
+    return pyarrow.array(values, type=arrow_type(field))
+
+
+def month_bounds(month):
+    """First day of the 'YYYY-MM' month and of the month after it."""
+    first = datetime.date.fromisoformat(f"{month}-01")
+    return first, (first + datetime.timedelta(days=32)).replace(day=1)
+
+
+class Command(BaseCommand):
+    help = 'Exports the report tables to a Parquet dataset partitioned by source and month, rewriting only changed partitions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default=None, help='Dataset root (default: PARQUET_EXPORT_DIR).')
+        parser.add_argument('--full', action='store_true', help='Rewrite every partition, changed or not.')
+
+    def load_state(self, output_dir):
+        """{'exported_at': ISO time, 'partitions': {key: [rows, max_pk]}}; empty before the first export."""
+        try:
+            with open(os.path.join(output_dir, STATE_FILE), 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # State files of the earlier row-digest format hold no export time; every partition is rewritten once.
+        return state if 'partitions' in state else {}
+
+    def save_state(self, output_dir, state):
+        path = os.path.join(output_dir, STATE_FILE)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(f"{path}.tmp", path)
+
+    def month_summaries(self, model):
+        """{'YYYY-MM': [rows, max_pk]} for the table, from one GROUP BY month query."""
+        summaries = (
+            model.objects.order_by().annotate(month=TruncMonth('report_date')).values('month')
+            .annotate(rows=Count('pk'), max_pk=Max('pk'))
+        )
+        return {f"{row['month']:%Y-%m}": [row['rows'], row['max_pk']] for row in summaries}
+
+    def reloaded_months(self, source, since):
+        """Months with a report of source indexed again since the last export; upserts change values in place."""
+        if since is None:
+            return set()
+        days = ReportArtifact.objects.filter(source=source, updated_at__gt=since).dates('report_date', 'month')
+        return {f"{day:%Y-%m}" for day in days}
+
+    def write_partition(self, path, fields, rows):
+        os.makedirs(path, exist_ok=True)
+        schema = pyarrow.schema([(field.attname, arrow_type(field)) for field in fields])
+        table = pyarrow.Table.from_arrays(
+            [arrow_column(field, [row[i] for row in rows]) for i, field in enumerate(fields)], schema=schema,
+        )
+        file_path = os.path.join(path, 'part-0.parquet')
+        pyarrow.parquet.write_table(table, f"{file_path}.tmp", compression='zstd')
+        os.replace(f"{file_path}.tmp", file_path)
+
+    def handle(self, *args, **options):
+        if pyarrow is None:
+            raise CommandError("export_parquet needs the 'pyarrow' package: pip install pyarrow")
+
+        output_dir = options['output_dir'] or settings.PARQUET_EXPORT_DIR
+        os.makedirs(output_dir, exist_ok=True)
+        previous = self.load_state(output_dir)
+        old_partitions = {} if options['full'] else previous.get('partitions', {})
+        since = None if options['full'] or not previous else datetime.datetime.fromisoformat(previous['exported_at'])
+        # Taken before reading, so rows written while the export runs are picked up by the next one.
+        started_at = timezone.now()
+        partitions = {}
+        written = unchanged = removed = 0
+
+        for source, table_key, model in iter_tables():
+            fields = model._meta.concrete_fields
+            columns = [field.attname for field in fields]
+            reloaded = self.reloaded_months(source, since)
+
+            # --- Only the months whose rows changed are read back ---
+            for month, summary in sorted(self.month_summaries(model).items()):
+                key = f"{table_key}/source={source}/month={month}"
+                partitions[key] = summary
+                if old_partitions.get(key) == summary and month not in reloaded:
+                    unchanged += 1
+                    continue
+                first, after = month_bounds(month)
+                rows = list(
+                    model.objects.filter(report_date__gte=first, report_date__lt=after)
+                    .order_by('report_date', 'pk').values_list(*columns).iterator(chunk_size=5000)
+                )
+                self.write_partition(os.path.join(output_dir, *key.split('/')), fields, rows)
+                written += 1
+                self.stdout.write(f"📝 {key}: {len(rows)} rows")
+
+        # Partitions whose rows have all been deleted since the last export.
+        for key in set(previous.get('partitions', {})) - set(partitions):
+            shutil.rmtree(os.path.join(output_dir, *key.split('/')), ignore_errors=True)
+            removed += 1
+
+        self.save_state(output_dir, {'exported_at': started_at.isoformat(), 'partitions': partitions})
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Parquet export: {written} partitions written, {unchanged} unchanged, {removed} removed -> {output_dir}"
+        ))
@@ -0,0 +1,128 @@
+import datetime
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pipeline import coverage
+from pipeline.management.commands.backfill import PROGRESS_DIR, SOURCES, Progress, daterange, progress_path
+from report_dashboard import jobs
+from report_dashboard.models import JobQueueEntry
+
+# The dates the last --queue scan queued, so the next scan can say how many were filled.
+STATE_PATH = os.path.join(PROGRESS_DIR, 'gaps.json')
+
+
+def contiguous_runs(days):
+    """Splits sorted dates into (first, last) runs of consecutive days."""
+    runs = []
+    for day in days:
+        if runs and day - runs[-1][1] == datetime.timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
+
+
+class Command(BaseCommand):
+    help = 'Finds dates a source has no report data for and queues backfills to fetch them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=SOURCES, action='append', help='Source to check (repeatable). Defaults to all.')
+        parser.add_argument('--from', dest='date_from', help='First date to check (YYYY-MM-DD). Defaults to GAP_SCAN_DAYS ago.')
+        parser.add_argument('--to', dest='date_to', help='Last date to check, inclusive (YYYY-MM-DD). Defaults to yesterday.')
+        parser.add_argument('--queue', action='store_true', help='Queue backfill jobs for the gaps on the backfill lane.')
+        parser.add_argument('--max-days', type=int, default=None, help='Most dates to queue in one scan (default: GAP_MAX_QUEUED_DAYS).')
+        parser.add_argument(
+            '--retry-known', action='store_true',
+            help='Also queue dates an earlier backfill found unpublished or loaded without rows.',
+        )
+
+    def parse_date(self, value, default):
+        if not value:
+            return default
+        try:
+            return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError("Date format is incorrect. Please use YYYY-MM-DD.")
+
+    def load_state(self):
+        if not os.path.exists(STATE_PATH):
+            return {}
+        with open(STATE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_state(self, queued):
+        os.makedirs(PROGRESS_DIR, exist_ok=True)
+        tmp_path = f"{STATE_PATH}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'queued': queued}, f, indent=4)
+        os.replace(tmp_path, STATE_PATH)
+
+    def handle(self, *args, **options):
+        today = datetime.date.today()
+        date_to = self.parse_date(options['date_to'], today - datetime.timedelta(days=1))
+        date_from = self.parse_date(options['date_from'], today - datetime.timedelta(days=settings.GAP_SCAN_DAYS))
+        if date_from > date_to:
+            raise CommandError("--from must not be after --to.")
+        max_days = options['max_days'] if options['max_days'] is not None else settings.GAP_MAX_QUEUED_DAYS
+        sources = options['source'] or SOURCES
+
+        # --- Find the gaps: the date series minus the dates with rows (one grouped query per table) ---
+        series = set(daterange(date_from, date_to))
+        previously_queued = self.load_state().get('queued', {})
+        gaps, filled, previously = {}, 0, 0
+        for source in sources:
+            present = coverage.dates_with_rows(source)
+            missing = series - present
+            queued_before = {datetime.date.fromisoformat(day) for day in previously_queued.get(source, [])}
+            previously += len(queued_before)
+            filled += len(queued_before & present)
+
+            known = set()
+            if not options['retry_known']:
+                # Dates the backfill already tried: not published upstream, or loaded and empty.
+                progress = Progress(progress_path(source))
+                known = {datetime.date.fromisoformat(day) for day in progress.data['missing'] + progress.data['done']}
+            gaps[source] = sorted(missing - known)
+            skipped = len(missing & known)
+            self.stdout.write(
+                f"🔍 {source}: {len(gaps[source])} missing date(s) between {date_from} and {date_to}"
+                + (f" ({skipped} already tried by a backfill, skipped)" if skipped else "")
+                + (f": {', '.join(day.isoformat() for day in gaps[source][:10])}" if gaps[source] else "")
+                + (" ..." if len(gaps[source]) > 10 else "")
+            )
+
+        total = sum(len(days) for days in gaps.values())
+        if previously:
+            self.stdout.write(f"📈 {filled} of the {previously} date(s) queued by the last scan are now loaded.")
+
+        if not options['queue']:
+            self.stdout.write(self.style.SUCCESS(f"✅ {total} gap(s) found. Run with --queue to backfill them."))
+            return
+
+        # --- Queue backfills: newest gaps first, one job per run of consecutive dates ---
+        # The backfill lane runs one job at a time and each backfill throttles per host, so a
+        # long list of gaps is worked through at the upstream rate limits.
+        newest = sorted(((day, source) for source, days in gaps.items() for day in days), reverse=True)[:max_days]
+        queued = {}
+        for source in sources:
+            chosen = sorted(day for day, day_source in newest if day_source == source)
+            if not chosen:
+                continue
+            queued[source] = [day.isoformat() for day in chosen]
+            for first, last in contiguous_runs(chosen):
+                entry, created = jobs.enqueue(
+                    'backfill', ['--source', source, '--from', first.isoformat(), '--to', last.isoformat()],
+                    JobQueueEntry.Lane.BACKFILL,
+                )
+                state = 'queued' if created else f'already {entry.status.lower()}'
+                self.stdout.write(f"📥 {source} {first} to {last}: backfill {state} (job {entry.pk}).")
+        self.save_state(queued)
+
+        queued_days = sum(len(days) for days in queued.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} gap(s) found, {queued_days} queued for backfill"
+            + (f", {total - queued_days} left for the next scan." if total > queued_days else ".")
+        ))
@@ -0,0 +1,53 @@
+import datetime
+import os
+from glob import glob
+
+from django.core.management.base import BaseCommand
+
+from pipeline.artifacts import record_artifact
+from pipeline.models import ReportArtifact
+
+SOURCES = ['NRLDC', 'SRLDC', 'WRLDC', 'POSOCO']
+
+
+class Command(BaseCommand):
+    help = 'Seeds the report artifact index from report folders already under downloads/.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--downloads-dir', default='downloads', help='Root of the per-source download folders.')
+        parser.add_argument(
+            '--overwrite',
+            action='store_true',
+            help='Re-index dates that already have an entry (by default they are left alone).'
+        )
+
+    def handle(self, *args, **options):
+        indexed = skipped = 0
+        for source in SOURCES:
+            source_dir = os.path.join(options['downloads_dir'], source)
+            if not os.path.isdir(source_dir):
+                continue
+
+            # report_<YYYY-MM-DD>_<HH-MM-SS>; the latest folder of a day wins, as it did in the old merge.
+            latest = {}
+            for name in sorted(os.listdir(source_dir)):
+                try:
+                    day = datetime.date.fromisoformat(name[len('report_'):len('report_') + 10])
+                except ValueError:
+                    continue
+                if name.startswith('report_') and os.path.isdir(os.path.join(source_dir, name)):
+                    latest[day] = os.path.join(source_dir, name)
+
+            known = set(ReportArtifact.objects.filter(source=source).values_list('report_date', flat=True))
+            for day, report_dir in sorted(latest.items()):
+                if day in known and not options['overwrite']:
+                    skipped += 1
+                    continue
+                json_files = sorted(glob(os.path.join(report_dir, '*.json')), key=os.path.getmtime)
+                if not json_files:
+                    continue
+                pdf_files = glob(os.path.join(report_dir, '*.pdf'))
+                record_artifact(source, day, json_files[-1], pdf_files[0] if pdf_files else None)
+                indexed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Indexed {indexed} reports ({skipped} already indexed)."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from pipeline import analytics
+from pipeline.tables import REPORT_TABLES
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the memory-mapped analytics columns from the report tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=list(REPORT_TABLES), help='Only refresh this source (default: all).')
+
+    def handle(self, *args, **options):
+        for table_key, rows in analytics.refresh(options['source']).items():
+            self.stdout.write(f"📊 {table_key}: {rows} rows")
+        self.stdout.write(self.style.SUCCESS("✅ Analytics store refreshed."))
@@ -0,0 +1,225 @@
+import datetime
+import glob
+import gzip
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from django.core.management.base import BaseCommand
+
+SOURCES = ['NRLDC', 'SRLDC', 'WRLDC', 'POSOCO']
+
+
+class StandinState:
+    """Fixtures, fault-injection settings and request counters shared by all handler threads."""
+
+    def __init__(self, fixtures_dir, latency, jitter, error_rate, bandwidth):
+        self.fixtures = {
+            source: sorted(glob.glob(os.path.join(fixtures_dir, source, '**', '*.pdf'), recursive=True))
+            for source in SOURCES
+        }
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.bandwidth = bandwidth
+        self.lock = threading.Lock()
+        self.stats = {'requests': {}, 'errors_injected': 0, 'bytes_sent': 0, 'bytes_received': 0, 'pushes': 0}
+
+    def fixture_for(self, source, key):
+        """Picks a recorded PDF for source; the same key always maps to the same file."""
+        files = self.fixtures[source]
+        if not files:
+            return None
+        return files[zlib.crc32(key.encode('utf-8')) % len(files)]
+
+    def count(self, route, **increments):
+        with self.lock:
+            self.stats['requests'][route] = self.stats['requests'].get(route, 0) + 1
+            for name, value in increments.items():
+                self.stats[name] += value
+
+
+def posoco_file_list(payload):
+    """Builds a retData listing with one PDF per day of the requested financial-year month."""
+    fy_start = int(payload.get('_fileDate', '2025-26')[:4])
+    month = int(payload.get('_month', '01'))
+    year = fy_start if month >= 4 else fy_start + 1
+    day = datetime.date(year, month, 1)
+    today = datetime.date.today()
+    entries = []
+    while day.month == month and day <= today:
+        entries.append({
+            'FilePath': f"standin/posoco/{day.strftime('%Y/%m')}/NLDC_PSP_{day.strftime('%d.%m.%y')}.pdf",
+            'MimeType': 'application/pdf',
+        })
+        day += datetime.timedelta(days=1)
+    return {'retData': list(reversed(entries))}
+
+
+def make_handler(state):
+    class StandinHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def inject_faults(self, route):
+            delay = state.latency + random.uniform(0, state.jitter)
+            if delay:
+                time.sleep(delay / 1000)
+            if state.error_rate and random.random() < state.error_rate:
+                state.count(route, errors_injected=1)
+                self.send_json({'error': 'injected failure'}, status=503)
+                return True
+            return False
+
+        def send_body(self, body, content_type):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            chunk_size = 16384
+            for start in range(0, len(body), chunk_size):
+                chunk = body[start:start + chunk_size]
+                self.wfile.write(chunk)
+                if state.bandwidth:
+                    time.sleep(len(chunk) / state.bandwidth)
+            with state.lock:
+                state.stats['bytes_sent'] += len(body)
+
+        def send_json(self, data, status=200):
+            body = json.dumps(data).encode('utf-8')
+            if status != 200:
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            self.send_body(body, 'application/json')
+
+        def send_pdf(self, source, key):
+            path = state.fixture_for(source, key)
+            if path is None:
+                self.send_json({'error': f'no {source} fixtures'}, status=404)
+                return
+            with open(path, 'rb') as f:
+                self.send_body(f.read(), 'application/pdf')
+
+        def read_body(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            with state.lock:
+                state.stats['bytes_received'] += len(body)
+            if self.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            return body
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            path = unquote(url.path)
+            query = parse_qs(url.query)
+
+            if path == '/stats':
+                with state.lock:
+                    stats = json.loads(json.dumps(state.stats))
+                self.send_json(stats)
+                return
+
+            routes = [
+                (r'^/nrldc/get-documents-list/\d+$', 'nrldc_list'),
+                (r'^/nrldc/download-file$', 'nrldc_pdf'),
+                (r'^/srldc/\d{4}/\w+/(\d{2}-\d{2}-\d{4})-psp\.pdf$', 'srldc_pdf'),
+                (r'^/wrldc/PSP/\d{4}/\w+/WRLDC_PSP_Report_(\d{2}-\d{2}-\d{4})\.pdf$', 'wrldc_pdf'),
+                (r'^/posoco-cdn/(.+\.pdf)$', 'posoco_pdf'),
+            ]
+            for pattern, route in routes:
+                match = re.match(pattern, path)
+                if not match:
+                    continue
+                state.count(route)
+                if self.inject_faults(route):
+                    return
+                if route == 'nrldc_list':
+                    day = datetime.date.fromisoformat(query.get('start_date', [datetime.date.today().isoformat()])[0])
+                    self.send_json({
+                        'recordsFiltered': 1,
+                        'data': [{'file_name': f"daily{day.strftime('%d%m%y')}.pdf", 'title': f"daily{day.strftime('%d%m%y')}"}],
+                    })
+                elif route == 'nrldc_pdf':
+                    self.send_pdf('NRLDC', query.get('any', [''])[0])
+                elif route == 'srldc_pdf':
+                    self.send_pdf('SRLDC', match.group(1))
+                elif route == 'wrldc_pdf':
+                    self.send_pdf('WRLDC', match.group(1))
+                else:
+                    self.send_pdf('POSOCO', match.group(1))
+                return
+
+            state.count('not_found')
+            self.send_json({'error': 'not found'}, status=404)
+
+        def do_POST(self):
+            path = urlsplit(self.path).path
+            if path == '/posoco/api/v1/file':
+                state.count('posoco_list')
+                payload = json.loads(self.read_body() or b'{}')
+                if not self.inject_faults('posoco_list'):
+                    self.send_json(posoco_file_list(payload))
+                return
+            if path.startswith('/push/'):
+                state.count('push')
+                body = self.read_body()
+                if not self.inject_faults('push'):
+                    json.loads(body)
+                    state.count('push_ok', pushes=1)
+                    self.send_json({'status': 'success'})
+                return
+            state.count('not_found')
+            self.send_json({'error': 'not found'}, status=404)
+
+    return StandinHandler
+
+
+class Command(BaseCommand):
+    help = 'Serves the NRLDC, SRLDC, WRLDC, Grid-India and merge-push endpoints locally from recorded PDFs, for offline load tests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8090)
+        parser.add_argument('--fixtures-dir', default='downloads', help='Directory holding <SOURCE>/**/*.pdf fixtures.')
+        parser.add_argument('--latency', type=float, default=0, help='Added latency per request, in milliseconds.')
+        parser.add_argument('--jitter', type=float, default=0, help='Random extra latency of up to this many milliseconds.')
+        parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with HTTP 503 (0-1).')
+        parser.add_argument('--bandwidth', type=int, default=0, help='Per-response bandwidth limit in bytes per second (0 = unlimited).')
+
+    def handle(self, *args, **options):
+        state = StandinState(
+            options['fixtures_dir'], options['latency'], options['jitter'], options['error_rate'], options['bandwidth']
+        )
+        for source in SOURCES:
+            self.stdout.write(f"📄 {source}: {len(state.fixtures[source])} fixture PDF(s)")
+
+        base = f"http://{options['host']}:{options['port']}"
+        self.stdout.write("\nPoint the commands at this server with:")
+        self.stdout.write(f"  NRLDC_BASE_URL={base}/nrldc")
+        self.stdout.write(f"  SRLDC_BASE_URL={base}/srldc/")
+        self.stdout.write(f"  WRLDC_BASE_URL={base}/wrldc/PSP/")
+        self.stdout.write(f"  POSOCO_API_URL={base}/posoco/api/v1/file")
+        self.stdout.write(f"  POSOCO_CDN_URL={base}/posoco-cdn/")
+        self.stdout.write(f"  MERGE_PUSH_URL={base}/push/api.grid.php")
+        self.stdout.write(f"Request counters: {base}/stats\n")
+
+        server = ThreadingHTTPServer((options['host'], options['port']), make_handler(state))
+        self.stdout.write(self.style.SUCCESS(f"✅ Stand-in server listening on {base} (Ctrl+C to stop)"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
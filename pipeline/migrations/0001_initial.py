@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=20)),
+                ('report_date', models.DateField()),
+                ('report_dir', models.CharField(blank=True, max_length=500)),
+                ('pdf_path', models.CharField(blank=True, max_length=500)),
+                ('completed_stage', models.CharField(blank=True, choices=[('download', 'Download'), ('extract', 'Extract'), ('clean', 'Clean'), ('persist', 'Persist'), ('json', 'JSON')], max_length=20, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('source', 'report_date')},
+            },
+        ),
+    ]
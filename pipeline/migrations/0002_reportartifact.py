@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=20)),
+                ('report_date', models.DateField()),
+                ('json_path', models.CharField(max_length=500)),
+                ('json_sha256', models.CharField(max_length=64)),
+                ('pdf_path', models.CharField(blank=True, max_length=500)),
+                ('pdf_sha256', models.CharField(blank=True, max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('source', 'report_date')},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0002_reportartifact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicationObservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=20)),
+                ('report_date', models.DateField()),
+                ('first_seen_at', models.DateTimeField()),
+                ('last_modified', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'unique_together': {('source', 'report_date')},
+            },
+        ),
+    ]
@@ -0,0 +1,83 @@
+from django.db import models
+
+
+class ReportCheckpoint(models.Model):
+    """Last pipeline stage completed for one source's report, so a failed run can resume."""
+
+    class Stage(models.TextChoices):
+        DOWNLOAD = 'download', 'Download'
+        EXTRACT = 'extract', 'Extract'
+        CLEAN = 'clean', 'Clean'
+        PERSIST = 'persist', 'Persist'
+        JSON = 'json', 'JSON'
+
+    source = models.CharField(max_length=20)
+    report_date = models.DateField()
+    report_dir = models.CharField(max_length=500, blank=True)
+    pdf_path = models.CharField(max_length=500, blank=True)
+    completed_stage = models.CharField(max_length=20, choices=Stage.choices, null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} | {self.report_date} | {self.completed_stage or 'not started'}"
+
+    class Meta:
+        unique_together = ('source', 'report_date')
+
+
+class ReportArtifact(models.Model):
+    """Index of the latest JSON (and source PDF) written for one source's report date."""
+
+    source = models.CharField(max_length=20)
+    report_date = models.DateField()
+    json_path = models.CharField(max_length=500)
+    json_sha256 = models.CharField(max_length=64)
+    pdf_path = models.CharField(max_length=500, blank=True)
+    pdf_sha256 = models.CharField(max_length=64, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} | {self.report_date} | {self.json_path}"
+
+    class Meta:
+        unique_together = ('source', 'report_date')
+
+
+class PublicationObservation(models.Model):
+    """When a source's report for a day was first fetched, and the upstream Last-Modified if it sent one."""
+
+    source = models.CharField(max_length=20)
+    report_date = models.DateField()
+    first_seen_at = models.DateTimeField()
+    last_modified = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def published_at(self):
+        """Best estimate of the publication time: Last-Modified when it is plausible, else first sight."""
+        if self.last_modified and self.last_modified <= self.first_seen_at:
+            return self.last_modified
+        return self.first_seen_at
+
+    def __str__(self):
+        return f"{self.source} | {self.report_date} | {self.published_at}"
+
+    class Meta:
+        unique_together = ('source', 'report_date')
+
+
+class JobLease(models.Model):
+    """
+    A named, expiring lock shared by every node through the database (see pipeline.leases).
+    token goes up by one on every acquisition and acts as a fencing token.
+    """
+
+    name = models.CharField(max_length=200, unique=True)
+    owner = models.CharField(max_length=200, blank=True)
+    token = models.BigIntegerField(default=0)
+    acquired_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} | {self.owner or 'free'} | token {self.token}"
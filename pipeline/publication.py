@@ -0,0 +1,125 @@
+"""
+When does each source publish? Observations and the polling plan derived from them.
+
+The fetchers call note_response() with the response of the report they downloaded (fresh=False
+when they fell back to an older report). Once the report's rows are persisted (the report_persisted
+signal), a PublicationObservation is recorded the first time today's report is fetched; the note
+is dropped when the run finishes, whatever happened. From those observations,
+poll_interval() makes run_scheduler poll often around the usual publication time for that source
+and weekday, and rarely well before it.
+"""
+import datetime
+import threading
+from email.utils import parsedate_to_datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from django.conf import settings
+from django.dispatch import receiver
+from django.utils import timezone
+
+from pipeline import signals
+from pipeline.models import PublicationObservation
+
+_note = threading.local()
+
+
+# --- Recording ---
+
+def note_response(response, fresh=True):
+    """Remembers, for this thread's current download, whether it is today's report and its Last-Modified."""
+    last_modified = None
+    header = response.headers.get('Last-Modified')
+    if header:
+        try:
+            last_modified = parsedate_to_datetime(header)
+        except (TypeError, ValueError):
+            pass
+    _note.value = {'fresh': fresh, 'last_modified': last_modified, 'seen_at': timezone.now()}
+
+
+def clear_note():
+    _note.value = None
+
+
+def record_download(source, report_date):
+    """Records the first fetch of (source, report_date) if the download noted it as fresh. Returns the observation."""
+    note = getattr(_note, 'value', None)
+    _note.value = None
+    if not note or not note['fresh'] or report_date != to_local(note['seen_at']).date():
+        # A fallback to an older report, a local copy or a backfill says nothing about publication time.
+        return None
+    observation, _ = PublicationObservation.objects.get_or_create(
+        source=source, report_date=report_date,
+        defaults={'first_seen_at': note['seen_at'], 'last_modified': note['last_modified']},
+    )
+    return observation
+
+
+@receiver(signals.report_persisted, dispatch_uid='publication.record_download')
+def _record_on_persist(sender, report_date, **kwargs):
+    record_download(sender, report_date)
+
+
+@receiver(signals.run_finished, dispatch_uid='publication.clear_note')
+def _clear_on_run_finished(sender, **kwargs):
+    clear_note()
+
+
+# --- Prediction ---
+
+def to_local(moment):
+    return moment.astimezone(ZoneInfo(settings.SCHEDULER_TIME_ZONE))
+
+
+def local_now():
+    return to_local(timezone.now())
+
+
+def minutes_after_midnight(moment, day):
+    """Minutes from local midnight of `day` to `moment` (negative if published the evening before)."""
+    tz = ZoneInfo(settings.SCHEDULER_TIME_ZONE)
+    midnight = datetime.datetime.combine(day, datetime.time(), tz)
+    return (moment.astimezone(tz) - midnight).total_seconds() / 60
+
+
+def publication_window(source, weekday):
+    """
+    Returns (early, expected, late) minutes after midnight, the 10th/50th/90th percentile of past
+    publication times on this weekday (or all weekdays while this one has too few), or None
+    while there is not enough history.
+    """
+    options = settings.PUBLICATION_POLLING
+    since = timezone.now().date() - datetime.timedelta(days=options['history_days'])
+    observations = list(PublicationObservation.objects.filter(source=source, report_date__gte=since))
+    samples = {
+        obs.report_date: minutes_after_midnight(obs.published_at, obs.report_date) for obs in observations
+    }
+    same_day = [minutes for day, minutes in samples.items() if day.weekday() == weekday]
+    chosen = same_day if len(same_day) >= options['min_samples'] else list(samples.values())
+    if len(chosen) < options['min_samples']:
+        return None
+    early, expected, late = np.percentile(chosen, [10, 50, 90])
+    return float(early), float(expected), float(late)
+
+
+def poll_interval(source, now=None):
+    """
+    Minutes to wait before polling source again: dense from a little before the earliest usual
+    publication time until the latest, normal shortly after, sparse otherwise. None without history.
+    """
+    now = now or local_now()
+    window = publication_window(source, now.weekday())
+    if window is None:
+        return None
+    options = settings.PUBLICATION_POLLING
+    early, _, late = window
+    minute = minutes_after_midnight(now, now.date())
+    if early - options['lead_minutes'] <= minute <= late:
+        return options['dense_minutes']
+    if late < minute <= late + options['trail_minutes']:
+        return options['normal_minutes']
+    if minute < early - options['lead_minutes']:
+        # Sleep until the dense phase starts rather than polling sparsely into it.
+        return max(options['dense_minutes'], min(options['sparse_minutes'], early - options['lead_minutes'] - minute))
+    return options['sparse_minutes']
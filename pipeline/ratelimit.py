@@ -0,0 +1,49 @@
+"""Per-host token-bucket rate limiting for requests to the RLDC/Grid-India servers."""
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available, then takes it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(host):
+    """Returns the shared bucket for host, configured from UPSTREAM_RATE_LIMITS."""
+    with _buckets_lock:
+        if host not in _buckets:
+            limits = settings.UPSTREAM_RATE_LIMITS
+            rate, capacity = limits.get(host, limits['default'])
+            _buckets[host] = TokenBucket(rate, capacity)
+        return _buckets[host]
+
+
+def throttle(url):
+    """Waits for a token for url's host before a request is sent."""
+    get_bucket(urlsplit(url).netloc).acquire()
@@ -0,0 +1,19 @@
+"""
+Signals sent as a report goes through the ingest, so the modules that react to an ingest
+(analytics, coverage, publication, the artifact index, the run history) hook themselves in
+instead of the stage runner calling each of them.
+"""
+from django.dispatch import Signal
+
+# run_finished statuses, the same values as report_dashboard's JobRun.Status.
+SUCCESS, FAILED, NO_REPORT = 'SUCCESS', 'FAILED', 'NO_REPORT'
+
+# A report date's rows were written, by a daily run or a backfill. sender is the source; kwargs: report_date.
+report_persisted = Signal()
+
+# A report's JSON was written. sender is the source; kwargs: report_date, json_path and pdf_path.
+report_written = Signal()
+
+# A ReportRun ended. sender is the source; kwargs: report_date, status, error, started_at, resumed,
+# completed_stage, pdf_path, timings ({stage: seconds} for the stages run this time) and tables_found.
+run_finished = Signal()
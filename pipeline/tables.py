@@ -0,0 +1,48 @@
+"""The report tables each source's ingest fills, keyed as in the source's JSON output, and bulk writes into them."""
+from django.db import connections, router, transaction
+
+from nrldc_app.models import Nrldc2AData, Nrldc2CData
+from posoco.models import PosocoTableA, PosocoTableG
+from srldc_app.models import Srldc2AData, Srldc2CData
+from wrldc_app.models import Wrldc2AData, Wrldc2CData
+
+REPORT_TABLES = {
+    'NRLDC': {'nrldc_table_2A': Nrldc2AData, 'nrldc_table_2C': Nrldc2CData},
+    'SRLDC': {'srldc_table_2A': Srldc2AData, 'srldc_table_2C': Srldc2CData},
+    'WRLDC': {'wrldc_table_2A': Wrldc2AData, 'wrldc_table_2C': Wrldc2CData},
+    'POSOCO': {'posoco_table_a': PosocoTableA, 'posoco_table_g': PosocoTableG},
+}
+
+
+def iter_tables():
+    """Yields (source, table_key, model) for every report table."""
+    for source, tables in REPORT_TABLES.items():
+        for table_key, model in tables.items():
+            yield source, table_key, model
+
+
+def upsert_rows(model, rows, unique_fields=('report_date', 'state')):
+    """
+    Writes rows (dicts of field values) with one INSERT ... ON DUPLICATE KEY UPDATE (ON CONFLICT on
+    SQLite) per batch, replacing the values of rows that already exist. Returns the rows written.
+    """
+    # The last row wins when a key repeats, as it did with update_or_create.
+    by_key = {tuple(row[field] for field in unique_fields): row for row in rows}
+    if not by_key:
+        return 0
+    objs = [model(**row) for row in by_key.values()]
+    update_fields = [name for name in next(iter(by_key.values())) if name not in unique_fields]
+    options = {'update_conflicts': True, 'update_fields': update_fields}
+    if connections[router.db_for_write(model)].features.supports_update_conflicts_with_target:
+        # MySQL updates on any unique key and does not take a conflict target.
+        options['unique_fields'] = list(unique_fields)
+    model.objects.bulk_create(objs, batch_size=500, **options)
+    return len(objs)
+
+
+def replace_rows(model, report_date, rows):
+    """Replaces a date's rows with rows, for tables without a unique key to upsert on. Returns the rows written."""
+    with transaction.atomic():
+        model.objects.filter(report_date=report_date).delete()
+        model.objects.bulk_create([model(report_date=report_date, **row) for row in rows], batch_size=500)
+    return len(rows)
@@ -0,0 +1,66 @@
+import datetime
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from pipeline import signals
+
+
+def send_run_finished(source, status, report_date=datetime.date(2025, 3, 1), **kwargs):
+    """Sends run_finished as a ReportRun that stopped before downloading anything would."""
+    fields = {
+        'error': '', 'started_at': timezone.now(), 'resumed': False, 'completed_stage': None,
+        'pdf_path': None, 'timings': {}, 'tables_found': None,
+    }
+    fields.update(kwargs)
+    signals.run_finished.send(sender=source, report_date=report_date, status=status, **fields)
+
+
+class InlineExecutor:
+    """Stands in for ThreadPoolExecutor: runs each task on submit, so it sees the test's transaction."""
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+
+class TempDirTestCase(TestCase):
+    """Runs each test in an empty working directory, with the coverage cache in memory and the data directories in it."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.addCleanup(os.chdir, cwd)
+        settings_override = override_settings(
+            COVERAGE_CACHE_ALIAS='default',
+            ARCHIVE_DIR=os.path.join(self.tmp_dir, 'archive'),
+            ANALYTICS_DIR=os.path.join(self.tmp_dir, 'analytics'),
+            PARQUET_EXPORT_DIR=os.path.join(self.tmp_dir, 'parquet'),
+            LOG_DIR=os.path.join(self.tmp_dir, 'logs'),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        caches['default'].clear()
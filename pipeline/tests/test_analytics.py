@@ -0,0 +1,52 @@
+import datetime
+
+import numpy as np
+
+from pipeline import analytics, signals
+from pipeline.tests.base import TempDirTestCase, send_run_finished
+from wrldc_app.models import Wrldc2CData
+
+
+class AnalyticsStoreTests(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        for day, state, demand, shortage in [
+            (datetime.date(2025, 1, 5), 'Gujarat', 100.0, '1,250'),
+            (datetime.date(2025, 1, 20), 'Gujarat', 140.0, '-'),
+            (datetime.date(2025, 2, 3), 'Gujarat', 90.0, '12.5'),
+            (datetime.date(2025, 1, 5), 'Goa', 7.0, None),
+        ]:
+            Wrldc2CData.objects.create(
+                report_date=day, state=state, max_demand_day=demand, shortage_max_demand=shortage, time='19:00',
+            )
+
+    def test_text_numbers_are_parsed_and_labels_coded(self):
+        analytics.refresh('WRLDC')
+        table = analytics.load_table('wrldc_table_2C')
+
+        self.assertEqual(len(table), 4)
+        shortages = np.asarray(table['shortage_max_demand'])
+        self.assertEqual(sorted(shortages[~np.isnan(shortages)].tolist()), [12.5, 1250.0])
+        self.assertEqual(int(np.isnan(shortages).sum()), 2)
+        self.assertEqual(sorted(table.labels('state')), ['Goa', 'Gujarat'])
+        self.assertEqual(table.labels('time'), ['19:00'])
+
+    def test_monthly_aggregates_per_label_and_month(self):
+        analytics.refresh('WRLDC')
+
+        self.assertEqual(analytics.monthly('wrldc_table_2C', 'max_demand_day'), {
+            'Gujarat': {'2025-01': 140.0, '2025-02': 90.0},
+            'Goa': {'2025-01': 7.0},
+        })
+        self.assertEqual(
+            analytics.monthly('wrldc_table_2C', 'max_demand_day', how='mean', end=datetime.date(2025, 1, 31)),
+            {'Gujarat': {'2025-01': 120.0}, 'Goa': {'2025-01': 7.0}},
+        )
+
+    def test_only_a_successful_run_refreshes_its_source(self):
+        send_run_finished('WRLDC', signals.FAILED)
+        self.assertIsNone(analytics.load_table('wrldc_table_2C'))
+
+        send_run_finished('WRLDC', signals.SUCCESS)
+        self.assertEqual(len(analytics.load_table('wrldc_table_2C')), 4)
+        self.assertIsNone(analytics.load_table('nrldc_table_2C'))
@@ -0,0 +1,33 @@
+import json
+import os
+
+from django.conf import settings
+
+from pipeline import archive
+from pipeline.tests.base import TempDirTestCase
+
+
+class ArchiveTests(TempDirTestCase):
+    def test_index_lines_point_at_each_record(self):
+        archive.append('WRLDC', '2025-03-01', {'state': 'Gujarat'})
+        archive.append('WRLDC', '2025-03-02', {'state': 'महाराष्ट्र'})
+
+        index = archive.read_index('WRLDC')
+        with open(os.path.join(settings.ARCHIVE_DIR, 'WRLDC.jsonl'), 'rb') as f:
+            for day, (offset, length) in index.items():
+                f.seek(offset)
+                # Lengths are in bytes, so records with non-ASCII text are read whole.
+                self.assertEqual(json.loads(f.read(length))['date'], day)
+        self.assertEqual(index['2025-03-02'][0], index['2025-03-01'][1])
+
+    def test_the_latest_append_of_a_date_wins_and_ranges_are_bounded(self):
+        for day, value in [('2025-03-01', 1), ('2025-03-02', 2), ('2025-03-03', 3), ('2025-03-01', 10)]:
+            archive.append('NRLDC', day, {'value': value})
+
+        self.assertEqual(archive.read_range('NRLDC'), [
+            ('2025-03-01', {'value': 10}), ('2025-03-02', {'value': 2}), ('2025-03-03', {'value': 3}),
+        ])
+        self.assertEqual(archive.read_range('NRLDC', '2025-03-02', '2025-03-02'), [('2025-03-02', {'value': 2})])
+        self.assertEqual(archive.read_last('NRLDC', 2), [('2025-03-02', {'value': 2}), ('2025-03-03', {'value': 3})])
+        self.assertEqual(archive.read_range('SRLDC'), [])
+        self.assertFalse(os.path.exists(os.path.join(settings.ARCHIVE_DIR, 'NRLDC.lock')))
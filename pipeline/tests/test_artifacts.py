@@ -0,0 +1,45 @@
+import datetime
+import json
+
+from pipeline import archive, artifacts, signals
+from pipeline.models import ReportArtifact
+from pipeline.tests.base import TempDirTestCase
+from report_dashboard.models import AutomationJob
+
+REPORT_DATE = datetime.date(2025, 3, 2)
+
+
+class ArtifactIndexTests(TempDirTestCase):
+    def write(self, name, data):
+        with open(name, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        signals.report_written.send(sender='NRLDC', report_date=REPORT_DATE, json_path=name, pdf_path=None)
+
+    def test_the_latest_written_json_is_indexed_archived_and_marked_available(self):
+        AutomationJob.objects.create(script_name='nrldc_project')
+        self.write('first.json', {'nrldc_table_2A': [{'state': 'PUNJAB'}]})
+        self.write('second.json', {'nrldc_table_2A': [{'state': 'DELHI'}]})
+
+        artifact = ReportArtifact.objects.get()
+        self.assertEqual(artifact.json_path, 'second.json')
+        self.assertEqual(
+            artifacts.artifacts_between(REPORT_DATE, REPORT_DATE + datetime.timedelta(days=1)),
+            {('NRLDC', REPORT_DATE): artifact},
+        )
+        self.assertEqual(artifacts.artifacts_between(REPORT_DATE + datetime.timedelta(days=1), REPORT_DATE + datetime.timedelta(days=2)), {})
+        self.assertEqual(artifacts.load_artifact_json(artifact), {'nrldc_table_2A': [{'state': 'DELHI'}]})
+        self.assertEqual(AutomationJob.objects.get().data_available_date, REPORT_DATE)
+        self.assertEqual(archive.read_last('NRLDC', 1), [('2025-03-02', {'nrldc_table_2A': [{'state': 'DELHI'}]})])
+
+    def test_a_file_changed_or_removed_after_indexing_is_refused(self):
+        self.write('report.json', {'nrldc_table_2A': []})
+        artifact = ReportArtifact.objects.get()
+
+        with open('report.json', 'w', encoding='utf-8') as f:
+            f.write('{}')
+        with self.assertRaises(artifacts.StaleArtifact):
+            artifacts.load_artifact_json(artifact)
+
+        artifact.json_path = 'gone.json'
+        with self.assertRaises(artifacts.StaleArtifact):
+            artifacts.load_artifact_json(artifact)
@@ -0,0 +1,60 @@
+import datetime
+import io
+import json
+from unittest import mock
+
+from django.core.management import call_command
+
+from pipeline.management.commands import backfill
+from pipeline.tests.base import InlineExecutor, TempDirTestCase
+
+
+def day(n):
+    return datetime.date(2025, 3, n)
+
+
+@mock.patch.object(backfill, 'ThreadPoolExecutor', InlineExecutor)
+@mock.patch.object(backfill, 'connections', mock.Mock())
+@mock.patch.object(backfill.analytics, 'refresh_after_ingest')
+@mock.patch('pipeline.leases.Lease.start_heartbeat')
+class BackfillTests(TempDirTestCase):
+    def backfill(self, outcomes):
+        """Runs SRLDC over 1-4 March; outcomes maps a date to what its download raises, if anything."""
+        def fetch(command, source, date):
+            if date in outcomes:
+                raise outcomes[date]
+            return f"downloads/{date}.pdf", f"downloads/report_{date}"
+
+        with mock.patch.object(backfill.Command, 'fetch', fetch), \
+                mock.patch.object(backfill.SrldcCommand, 'report_stages') as report_stages:
+            call_command(
+                'backfill', '--source', 'SRLDC', '--from', '2025-03-01', '--to', '2025-03-04', stdout=io.StringIO(),
+            )
+        return sorted(call.args[1] for call in report_stages.call_args_list)
+
+    def progress(self):
+        with open(backfill.progress_path('SRLDC'), encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_a_range_resumes_from_its_progress_file(self, start_heartbeat, refresh):
+        backfill.Progress(backfill.progress_path('SRLDC')).mark(day(1), 'done')
+
+        loaded = self.backfill({day(3): backfill.ReportNotPublished('404'), day(4): OSError('timed out')})
+        self.assertEqual(loaded, [day(2)])
+        self.assertEqual(self.progress(), {
+            'done': ['2025-03-01', '2025-03-02'], 'missing': ['2025-03-03'], 'failed': {'2025-03-04': 'timed out'},
+        })
+        refresh.assert_called_once_with('SRLDC')
+
+        # Dates not loaded yet are tried again; the loaded ones are not.
+        self.assertEqual(self.backfill({}), [day(3), day(4)])
+        self.assertEqual(self.progress(), {
+            'done': ['2025-03-01', '2025-03-02', '2025-03-03', '2025-03-04'], 'missing': [], 'failed': {},
+        })
+
+    def test_dates_leased_by_another_node_are_left_to_it(self, start_heartbeat, refresh):
+        lease = backfill.leases.acquire('backfill:SRLDC:2025-03-02', start_heartbeat=False)
+        self.addCleanup(lease.release)
+
+        self.assertEqual(self.backfill({}), [day(1), day(3), day(4)])
+        self.assertNotIn('2025-03-02', self.progress()['done'])
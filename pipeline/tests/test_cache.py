@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from pipeline import cache
+
+
+class InlineThread:
+    """Runs a background refresh at start(), so the test can see its effect."""
+
+    def __init__(self, target, args):
+        self.target, self.args = target, args
+
+    def start(self):
+        self.target(*self.args)
+
+
+@override_settings(UPSTREAM_CACHE_ALIAS='default', UPSTREAM_CACHE_TTLS={'documents': (300, 1800)})
+@mock.patch('pipeline.cache.threading.Thread', InlineThread)
+class CachedJsonTests(SimpleTestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.fetch = mock.Mock(side_effect=[['a.pdf'], ['a.pdf', 'b.pdf'], ['a.pdf', 'b.pdf', 'c.pdf']])
+
+    def get_at(self, seconds, **kwargs):
+        with mock.patch('pipeline.cache.time.time', return_value=1_000_000 + seconds):
+            return cache.cached_json('documents', 'psp', self.fetch, **kwargs)
+
+    def test_fresh_entries_are_served_without_calling_upstream(self):
+        self.assertEqual(self.get_at(0), ['a.pdf'])
+        self.assertEqual(self.get_at(299), ['a.pdf'])
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_stale_entries_are_served_and_refreshed_then_expire(self):
+        self.get_at(0)
+        # Past the TTL: the cached list is returned while it is fetched again behind it.
+        self.assertEqual(self.get_at(400), ['a.pdf'])
+        self.assertEqual(self.get_at(401), ['a.pdf', 'b.pdf'])
+        # Past the stale window of the refreshed entry: fetched before returning.
+        self.assertEqual(self.get_at(400 + 2100), ['a.pdf', 'b.pdf', 'c.pdf'])
+        self.assertEqual(self.fetch.call_count, 3)
+
+    def test_bypass_and_results_not_worth_caching(self):
+        self.assertEqual(self.get_at(0, cache_if=lambda data: len(data) > 1), ['a.pdf'])
+        self.assertEqual(self.get_at(1), ['a.pdf', 'b.pdf'])
+        self.assertEqual(self.get_at(2, bypass=True), ['a.pdf', 'b.pdf', 'c.pdf'])
+        self.assertEqual(self.fetch.call_count, 3)
+
+    def test_endpoints_without_a_ttl_are_not_cached(self):
+        fetch = mock.Mock(return_value=[])
+        cache.cached_json('other', 'psp', fetch)
+        cache.cached_json('other', 'psp', fetch)
+        self.assertEqual(fetch.call_count, 2)
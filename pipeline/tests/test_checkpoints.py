@@ -0,0 +1,119 @@
+import contextlib
+import datetime
+import hashlib
+import io
+import json
+import os
+
+from django.core.management.base import CommandError
+
+from nrldc_app.models import Nrldc2AData
+from pipeline import archive
+from pipeline.checkpoints import ReportRun, ReportStages
+from pipeline.models import ReportArtifact, ReportCheckpoint
+from pipeline.tables import upsert_rows
+from pipeline.tests.base import TempDirTestCase
+from report_dashboard.models import AutomationJob, JobRun
+
+REPORT_DATE = datetime.date(2025, 3, 1)
+
+
+class ReportRunTests(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.report_dir = os.path.join(self.tmp_dir, 'report')
+        os.makedirs(self.report_dir)
+        self.pdf_path = os.path.join(self.report_dir, 'report.pdf')
+        with open(self.pdf_path, 'wb') as f:
+            f.write(b'%PDF')
+
+    def not_again(self, *args):
+        raise AssertionError('a completed stage was run again')
+
+    def run_until_persist(self, persist):
+        run = ReportRun('NRLDC', REPORT_DATE)
+        run.download(lambda: (self.pdf_path, self.report_dir))
+        tables = run.stage('extract', lambda: ['table 2A', 'table 2C'])
+        cleaned = run.stage('clean', lambda found: [name.upper() for name in found], tables)
+        run.stage('persist', persist, cleaned)
+        return run
+
+    def test_failed_persist_is_retried_by_the_next_run(self):
+        def broken_persist(cleaned):
+            raise CommandError('1 row(s) could not be saved to the database.')
+
+        with self.assertRaises(CommandError):
+            self.run_until_persist(broken_persist)
+        checkpoint = ReportCheckpoint.objects.get(source='NRLDC', report_date=REPORT_DATE)
+        self.assertEqual(checkpoint.completed_stage, 'clean')
+        self.assertTrue(checkpoint.last_error.startswith('persist:'))
+        self.assertEqual(JobRun.objects.get().status, JobRun.Status.FAILED)
+
+        persisted = []
+        run = ReportRun('NRLDC', REPORT_DATE)
+        self.assertTrue(run.resumed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(run.download(self.not_again), (self.pdf_path, self.report_dir))
+        tables = run.stage('extract', self.not_again)
+        cleaned = run.stage('clean', self.not_again, tables)
+        self.assertEqual(cleaned, ['TABLE 2A', 'TABLE 2C'])
+        run.stage('persist', persisted.append, cleaned)
+
+        self.assertEqual(persisted, [['TABLE 2A', 'TABLE 2C']])
+        checkpoint.refresh_from_db()
+        self.assertEqual(checkpoint.completed_stage, 'persist')
+        self.assertIsNone(checkpoint.last_error)
+
+
+class FinishedRunTests(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.report_dir = os.path.join(self.tmp_dir, 'report')
+        os.makedirs(self.report_dir)
+        self.pdf_path = os.path.join(self.report_dir, 'report.pdf')
+        with open(self.pdf_path, 'wb') as f:
+            f.write(b'%PDF-1.4 test')
+        AutomationJob.objects.create(script_name='nrldc_project')
+
+    def write_json(self, rows):
+        json_path = os.path.join(self.report_dir, 'nrldc.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({'nrldc_table_2A': rows}, f)
+        return json_path
+
+    def test_finished_run_is_recorded_with_its_stage_timings_and_indexed(self):
+        stages = ReportStages(
+            'NRLDC', REPORT_DATE,
+            lambda pdf_path: ['table 2A', 'table 2C'],
+            lambda tables: [{'state': 'Punjab', 'total': 10.0}, {'state': 'Delhi', 'total': 5.0}],
+            lambda rows: upsert_rows(Nrldc2AData, [{'report_date': REPORT_DATE, **row} for row in rows]),
+            self.write_json,
+        )
+        run = ReportRun('NRLDC', REPORT_DATE)
+        run.download(lambda: (self.pdf_path, self.report_dir))
+        json_path = stages.process(run, self.pdf_path)
+
+        job_run = JobRun.objects.get()
+        self.assertEqual(job_run.status, JobRun.Status.SUCCESS)
+        self.assertEqual((job_run.script_name, job_run.source, job_run.report_date), ('nrldc_project', 'NRLDC', REPORT_DATE))
+        self.assertEqual((job_run.tables_found, job_run.rows_upserted, job_run.bytes_downloaded), (2, 2, 13))
+        for field in ('download_seconds', 'extract_seconds', 'clean_seconds', 'persist_seconds', 'json_seconds'):
+            self.assertIsNotNone(getattr(job_run, field), field)
+        self.assertIsNone(job_run.push_seconds)
+        self.assertFalse(job_run.resumed)
+
+        artifact = ReportArtifact.objects.get(source='NRLDC', report_date=REPORT_DATE)
+        self.assertEqual(artifact.json_path, json_path)
+        with open(json_path, 'rb') as f:
+            self.assertEqual(artifact.json_sha256, hashlib.sha256(f.read()).hexdigest())
+        self.assertEqual(archive.read_last('NRLDC', 1)[0][1]['nrldc_table_2A'][0]['state'], 'Punjab')
+        self.assertEqual(AutomationJob.objects.get().data_available_date, REPORT_DATE)
+
+    def test_run_without_a_report_is_recorded_as_such(self):
+        run = ReportRun('NRLDC', REPORT_DATE)
+        self.assertEqual(run.download(lambda: (None, None)), (None, None))
+
+        job_run = JobRun.objects.get()
+        self.assertEqual(job_run.status, JobRun.Status.NO_REPORT)
+        self.assertIsNone(job_run.bytes_downloaded)
+        self.assertFalse(ReportArtifact.objects.exists())
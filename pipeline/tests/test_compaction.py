@@ -0,0 +1,59 @@
+import io
+import os
+import zipfile
+
+from django.core.management import call_command
+
+from pipeline import compaction
+from pipeline.tests.base import TempDirTestCase
+
+PDF = b'%PDF-1.4 same report'
+
+
+class CompactionTests(TempDirTestCase):
+    def write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_identical_pdfs_are_hard_linked_once(self):
+        first = self.write('downloads/NRLDC/report_2025-01-01_09-00-00/a.pdf', PDF)
+        second = self.write('downloads/NRLDC/report_2025-01-01_10-00-00/a.pdf', PDF)
+        other = self.write('downloads/NRLDC/report_2025-01-02_09-00-00/b.pdf', b'%PDF-1.4 other')
+
+        self.assertEqual(compaction.dedupe_files([first, second, other]), (1, len(PDF)))
+        self.assertTrue(os.path.samefile(first, second))
+        self.assertEqual(compaction.dedupe_files([first, second, other]), (0, 0))
+
+    def test_compressed_and_bundled_files_read_back_unchanged(self):
+        downloads = 'downloads'
+        january = [f'downloads/NRLDC/report_2025-01-0{day}_09-00-00' for day in (1, 2)]
+        for folder in january:
+            self.write(f'{folder}/report.pdf', PDF)
+            self.write(f'{folder}/tables.json', b'{"nrldc_table_2A": []}')
+        compaction.compress_file(f'{january[0]}/tables.json')
+        self.assertEqual(compaction.read_report_bytes(f'{january[0]}/tables.json'), b'{"nrldc_table_2A": []}')
+
+        self.assertEqual(compaction.bundle_folders('NRLDC', '2025-01', january, downloads), 4)
+        self.assertFalse(any(os.path.exists(folder) for folder in january))
+        with zipfile.ZipFile('downloads/bundles/NRLDC_2025-01.zip') as bundle:
+            # The PDF is stored once for both days.
+            self.assertEqual(len([name for name in bundle.namelist() if name.startswith('pdf/')]), 1)
+        for folder in january:
+            self.assertEqual(compaction.read_report_bytes(f'{folder}/tables.json', downloads), b'{"nrldc_table_2A": []}')
+            with compaction.open_report_file(f'{folder}/report.pdf', downloads) as f:
+                self.assertEqual(f.read(), PDF)
+            self.assertTrue(compaction.report_file_exists(f'{folder}/report.pdf', downloads))
+        self.assertFalse(compaction.report_file_exists('downloads/NRLDC/report_2025-01-03_09-00-00/report.pdf', downloads))
+
+    def test_command_compresses_recent_json_and_bundles_old_folders(self):
+        old = self.write('downloads/SRLDC/report_2020-01-05_09-00-00/tables.json', b'{}')
+        recent = self.write('downloads/SRLDC/report_2099-01-05_09-00-00/tables.json', b'{}')
+        call_command('compact_downloads', stdout=io.StringIO())
+
+        self.assertTrue(os.path.exists('downloads/bundles/SRLDC_2020-01.zip'))
+        self.assertFalse(os.path.exists(os.path.dirname(old)))
+        self.assertEqual(compaction.read_report_bytes(old), b'{}')
+        # Folders from the last few days are left as they are.
+        self.assertTrue(os.path.exists(recent))
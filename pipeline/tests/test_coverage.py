@@ -0,0 +1,56 @@
+import datetime
+
+from django.test import override_settings
+from django.urls import reverse
+
+from nrldc_app.models import Nrldc2AData
+from pipeline import coverage, signals
+from pipeline.tests.base import TempDirTestCase
+
+DAY = datetime.date(2025, 3, 1)
+
+
+class CoverageTests(TempDirTestCase):
+    def add_rows(self, day, states):
+        for state in states:
+            Nrldc2AData.objects.create(report_date=day, state=state)
+
+    def nrldc_2a(self, start, end):
+        return next(table for table in coverage.calendar(start, end)['tables'] if table['table'] == 'nrldc_table_2A')
+
+    def test_calendar_marks_missing_and_short_days(self):
+        self.add_rows(DAY, ['Punjab', 'Delhi'])
+        self.add_rows(DAY + datetime.timedelta(days=1), ['Punjab', 'Delhi'])
+        self.add_rows(DAY + datetime.timedelta(days=3), ['Punjab'])
+
+        table = self.nrldc_2a(DAY, DAY + datetime.timedelta(days=3))
+        self.assertEqual(table['cells'], [[2, 2], [2, 2], [0, 0], [1, 1]])
+        self.assertEqual(table['days_covered'], 3)
+
+    def test_cached_dates_are_dropped_when_the_source_persists_rows(self):
+        self.add_rows(DAY, ['Punjab'])
+        self.assertEqual(coverage.dates_with_rows('NRLDC'), {DAY})
+
+        self.add_rows(DAY + datetime.timedelta(days=1), ['Punjab'])
+        self.assertEqual(coverage.dates_with_rows('NRLDC'), {DAY})
+        signals.report_persisted.send(sender='SRLDC', report_date=DAY)
+        self.assertEqual(coverage.dates_with_rows('NRLDC'), {DAY})
+        signals.report_persisted.send(sender='NRLDC', report_date=DAY)
+        self.assertEqual(coverage.dates_with_rows('NRLDC'), {DAY, DAY + datetime.timedelta(days=1)})
+
+
+class CoverageViewTests(TempDirTestCase):
+    def get(self, **params):
+        return self.client.get(reverse('coverage'), params)
+
+    def test_renders_a_range(self):
+        self.assertEqual(self.get(**{'from': '2025-01-01', 'to': '2025-03-01'}).status_code, 200)
+
+    @override_settings(COVERAGE_MAX_DAYS=30)
+    def test_rejects_ranges_over_the_cap_and_unrepresentable_dates(self):
+        self.assertEqual(self.get(**{'from': '2025-01-01', 'to': '2025-01-30'}).status_code, 200)
+        self.assertEqual(self.get(**{'from': '2025-01-01', 'to': '2025-01-31'}).status_code, 400)
+        self.assertEqual(self.get(**{'from': '0001-01-01', 'to': '9999-12-31'}).status_code, 400)
+        self.assertEqual(self.get(**{'from': 'yesterday'}).status_code, 400)
+        # The default start, a year before `to`, is before the first representable date.
+        self.assertEqual(self.get(to='0001-06-01').status_code, 400)
@@ -0,0 +1,75 @@
+import datetime
+import io
+import os
+import unittest
+
+from django.conf import settings
+from django.core.management import call_command
+
+from pipeline.models import ReportArtifact
+from pipeline.tables import upsert_rows
+from pipeline.tests.base import TempDirTestCase
+from posoco.models import PosocoTableA
+from wrldc_app.models import Wrldc2CData
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+DAY = datetime.date(2025, 3, 1)
+
+
+@unittest.skipIf(pyarrow is None, 'export_parquet needs pyarrow')
+class ExportParquetTests(TempDirTestCase):
+    def export(self, *args):
+        out = io.StringIO()
+        call_command('export_parquet', *args, stdout=out)
+        return out.getvalue()
+
+    def partition(self, table_key, source, month):
+        return pyarrow.parquet.read_table(os.path.join(
+            settings.PARQUET_EXPORT_DIR, table_key, f"source={source}", f"month={month}", 'part-0.parquet',
+        ))
+
+    def test_numbers_stored_as_text_are_exported_as_floats(self):
+        Wrldc2CData.objects.create(report_date=DAY, state='Gujarat', max_demand_day=19.5, shortage_max_demand='1,250',
+                                   ace_max='-', time='19:00')
+        PosocoTableA.objects.create(report_date=DAY, category='energy', nr='512.3', wr='', total=None)
+        self.export()
+
+        wrldc = self.partition('wrldc_table_2C', 'WRLDC', '2025-03')
+        self.assertEqual(wrldc.schema.field('shortage_max_demand').type, pyarrow.float64())
+        self.assertEqual(wrldc.schema.field('max_demand_day').type, pyarrow.float64())
+        self.assertEqual(wrldc.schema.field('state').type, pyarrow.string())
+        self.assertEqual(wrldc.schema.field('time').type, pyarrow.string())
+        self.assertEqual(wrldc.schema.field('report_date').type, pyarrow.date32())
+        row = wrldc.to_pylist()[0]
+        self.assertEqual((row['shortage_max_demand'], row['ace_max'], row['time']), (1250.0, None, '19:00'))
+
+        posoco = self.partition('posoco_table_a', 'POSOCO', '2025-03').to_pylist()[0]
+        self.assertEqual((posoco['category'], posoco['nr'], posoco['wr'], posoco['total']), ('energy', 512.3, None, None))
+
+    def test_only_changed_months_are_rewritten(self):
+        upsert_rows(Wrldc2CData, [
+            {'report_date': DAY, 'state': 'Gujarat', 'max_demand_day': 19.5},
+            {'report_date': DAY - datetime.timedelta(days=1), 'state': 'Gujarat', 'max_demand_day': 18.0},
+        ])
+        self.assertIn('2 partitions written', self.export())
+        self.assertIn('0 partitions written, 2 unchanged', self.export())
+
+        # A new row changes its month's summary.
+        Wrldc2CData.objects.create(report_date=DAY + datetime.timedelta(days=1), state='Goa', max_demand_day=1.0)
+        self.assertIn('📝 wrldc_table_2C/source=WRLDC/month=2025-03: 2 rows', self.export())
+
+        # An upsert changes values in place; the re-indexed report marks its month.
+        upsert_rows(Wrldc2CData, [{'report_date': DAY, 'state': 'Gujarat', 'max_demand_day': 21.0}])
+        ReportArtifact.objects.create(source='WRLDC', report_date=DAY, json_path='w.json', json_sha256='0')
+        output = self.export()
+        self.assertIn('1 partitions written', output)
+        self.assertIn(21.0, self.partition('wrldc_table_2C', 'WRLDC', '2025-03').column('max_demand_day').to_pylist())
+
+        Wrldc2CData.objects.filter(report_date__lt=DAY).delete()
+        self.assertIn('1 removed', self.export())
+        self.assertFalse(os.path.exists(os.path.join(settings.PARQUET_EXPORT_DIR, 'wrldc_table_2C', 'source=WRLDC', 'month=2025-02')))
@@ -0,0 +1,77 @@
+import datetime
+import io
+import json
+import os
+
+from django.core.cache import caches
+from django.core.management import call_command
+
+from nrldc_app.models import Nrldc2AData
+from pipeline.management.commands.find_gaps import contiguous_runs
+from pipeline.tests.base import TempDirTestCase
+from report_dashboard.models import JobQueueEntry
+
+REPORT_DATE = datetime.date(2025, 3, 1)
+
+
+class FindGapsTests(TempDirTestCase):
+    def day(self, n):
+        return REPORT_DATE + datetime.timedelta(days=n)
+
+    def find_gaps(self, *args):
+        out = io.StringIO()
+        call_command('find_gaps', '--source', 'NRLDC', '--from', self.day(0).isoformat(), '--to', self.day(9).isoformat(),
+                     *args, stdout=out)
+        return out.getvalue()
+
+    def write_progress(self, done=(), missing=()):
+        os.makedirs(os.path.join('downloads', 'backfill'))
+        with open(os.path.join('downloads', 'backfill', 'nrldc_progress.json'), 'w', encoding='utf-8') as f:
+            json.dump({'done': [self.day(n).isoformat() for n in done],
+                       'missing': [self.day(n).isoformat() for n in missing], 'failed': {}}, f)
+
+    def queued_ranges(self):
+        return [entry.args for entry in JobQueueEntry.objects.filter(script_name='backfill').order_by('pk')]
+
+    def test_contiguous_runs(self):
+        days = [self.day(n) for n in (0, 1, 2, 5, 7, 8)]
+        self.assertEqual(contiguous_runs(days), [
+            (self.day(0), self.day(2)), (self.day(5), self.day(5)), (self.day(7), self.day(8)),
+        ])
+        self.assertEqual(contiguous_runs([]), [])
+
+    def test_gaps_are_the_dates_without_rows_less_the_ones_already_tried(self):
+        for n in (0, 1, 4, 5, 6, 9):
+            Nrldc2AData.objects.create(report_date=self.day(n), state='PUNJAB')
+        self.write_progress(done=[3], missing=[7])
+
+        output = self.find_gaps('--queue')
+        self.assertIn('NRLDC: 2 missing date(s)', output)
+        self.assertIn('2 already tried by a backfill', output)
+        self.assertEqual(self.queued_ranges(), [
+            ['--source', 'NRLDC', '--from', self.day(2).isoformat(), '--to', self.day(2).isoformat()],
+            ['--source', 'NRLDC', '--from', self.day(8).isoformat(), '--to', self.day(8).isoformat()],
+        ])
+
+    def test_retry_known_includes_dates_already_tried(self):
+        for n in (0, 1, 4, 5, 6, 9):
+            Nrldc2AData.objects.create(report_date=self.day(n), state='PUNJAB')
+        self.write_progress(done=[3], missing=[7])
+
+        self.find_gaps('--queue', '--retry-known')
+        self.assertEqual(self.queued_ranges(), [
+            ['--source', 'NRLDC', '--from', self.day(2).isoformat(), '--to', self.day(3).isoformat()],
+            ['--source', 'NRLDC', '--from', self.day(7).isoformat(), '--to', self.day(8).isoformat()],
+        ])
+
+    def test_max_days_queues_the_newest_gaps_and_reports_filled_ones(self):
+        output = self.find_gaps('--queue', '--max-days', '3')
+        self.assertIn('7 left for the next scan', output)
+        self.assertEqual(self.queued_ranges(), [
+            ['--source', 'NRLDC', '--from', self.day(7).isoformat(), '--to', self.day(9).isoformat()],
+        ])
+
+        Nrldc2AData.objects.create(report_date=self.day(8), state='PUNJAB')
+        caches['default'].clear()
+        output = self.find_gaps()
+        self.assertIn('1 of the 3 date(s) queued by the last scan are now loaded', output)
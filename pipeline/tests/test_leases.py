@@ -0,0 +1,121 @@
+import datetime
+import io
+import os
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from nrldc_app.management.commands.nrldc_project import Command as NrldcCommand
+from pipeline import leases
+from pipeline.checkpoints import ReportRun, ReportStages
+from pipeline.models import JobLease, ReportCheckpoint
+from pipeline.tests.base import TempDirTestCase
+
+REPORT_DATE = datetime.date(2025, 3, 1)
+
+
+def expire(name):
+    JobLease.objects.filter(name=name).update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+
+
+class LeaseTests(TestCase):
+    def test_held_lease_is_not_handed_out_again(self):
+        lease = leases.acquire('nrldc_project', start_heartbeat=False)
+        self.assertIsNotNone(lease)
+        self.assertTrue(leases.is_held('nrldc_project'))
+        self.assertIsNone(leases.acquire('nrldc_project', start_heartbeat=False))
+
+        lease.release()
+        self.assertFalse(leases.is_held('nrldc_project'))
+        self.assertIsNotNone(leases.acquire('nrldc_project', start_heartbeat=False))
+
+    def test_expired_lease_is_taken_over_and_fences_out_the_old_holder(self):
+        old = leases.acquire('nrldc_project', start_heartbeat=False)
+        expire('nrldc_project')
+        new = leases.acquire('nrldc_project', start_heartbeat=False)
+        self.assertEqual(new.token, old.token + 1)
+
+        with self.assertRaises(leases.LeaseLost), transaction.atomic():
+            old.fence()
+        self.assertTrue(old.lost.is_set())
+        self.assertFalse(old.renew())
+        with transaction.atomic():
+            new.fence()
+        self.assertTrue(new.renew())
+
+    def test_expired_lease_fails_its_own_fence(self):
+        lease = leases.acquire('nrldc_project', start_heartbeat=False)
+        expire('nrldc_project')
+        with self.assertRaises(leases.LeaseLost), transaction.atomic():
+            lease.fence()
+
+    def test_hold_sets_the_current_lease_for_the_thread(self):
+        self.assertIsNone(leases.current())
+        with leases.hold('nrldc_project') as lease:
+            self.assertIs(leases.current(), lease)
+            with leases.hold('nrldc_project') as second:
+                self.assertIsNone(second)
+        self.assertIsNone(leases.current())
+        self.assertFalse(leases.is_held('nrldc_project'))
+
+
+class LeasedCommandTests(TestCase):
+    def setUp(self):
+        self.lease = leases.acquire('nrldc_project', start_heartbeat=False)
+
+    @mock.patch.object(NrldcCommand, 'handle')
+    def test_held_lease_skips_the_run(self, handle):
+        with self.assertRaises(leases.LeaseHeld):
+            call_command('nrldc_project', stdout=io.StringIO())
+        handle.assert_not_called()
+
+    @mock.patch.object(NrldcCommand, 'handle')
+    @mock.patch('django.core.management.base.connections')
+    def test_skip_is_not_an_error_on_the_command_line(self, connections, handle):
+        out = io.StringIO()
+        NrldcCommand(stdout=out).run_from_argv(['manage.py', 'nrldc_project'])
+        handle.assert_not_called()
+        self.assertIn("'nrldc_project' is already running on another node or process; skipped.", out.getvalue())
+
+
+class FencedPersistTests(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.report_dir = os.path.join(self.tmp_dir, 'report')
+        os.makedirs(self.report_dir)
+        self.pdf_path = os.path.join(self.report_dir, 'report.pdf')
+        with open(self.pdf_path, 'wb') as f:
+            f.write(b'%PDF')
+        self.persisted = []
+        self.stages = ReportStages(
+            'NRLDC', REPORT_DATE, lambda pdf_path: ['table 2A'], lambda tables: tables, self.persisted.append,
+            lambda cleaned: None,
+        )
+
+    def take_over(self, name):
+        expire(name)
+        leases.acquire(name, start_heartbeat=False)
+
+    def test_persist_is_fenced_by_the_current_lease(self):
+        with leases.hold('nrldc_project'):
+            self.take_over('nrldc_project')
+            run = ReportRun('NRLDC', REPORT_DATE)
+            run.download(lambda: (self.pdf_path, self.report_dir))
+            with self.assertRaises(leases.LeaseLost):
+                self.stages.process(run, self.pdf_path)
+        self.assertEqual(self.persisted, [])
+        self.assertEqual(ReportCheckpoint.objects.get().completed_stage, 'clean')
+
+    def test_backfill_load_is_fenced_by_the_dates_lease(self):
+        lease = leases.acquire('backfill:NRLDC:2025-03-01', start_heartbeat=False)
+        self.take_over('backfill:NRLDC:2025-03-01')
+        with self.assertRaises(leases.LeaseLost):
+            self.stages.load(self.pdf_path, lease)
+        self.assertEqual(self.persisted, [])
+
+        lease = leases.acquire('backfill:NRLDC:2025-03-02', start_heartbeat=False)
+        self.stages.load(self.pdf_path, lease)
+        self.assertEqual(self.persisted, [['table 2A']])
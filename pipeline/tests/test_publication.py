@@ -0,0 +1,73 @@
+import datetime
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.test import TestCase
+
+from pipeline import publication, signals
+from pipeline.models import PublicationObservation
+from pipeline.tests.base import send_run_finished
+
+TZ = ZoneInfo(settings.SCHEDULER_TIME_ZONE)
+
+
+class FakeResponse:
+    def __init__(self, last_modified=None):
+        self.headers = {'Last-Modified': last_modified} if last_modified else {}
+
+
+class RecordingTests(TestCase):
+    def setUp(self):
+        publication.clear_note()
+        self.addCleanup(publication.clear_note)
+
+    def persisted(self, report_date):
+        signals.report_persisted.send(sender='NRLDC', report_date=report_date)
+
+    def test_fresh_download_is_recorded_when_persisted_with_the_time_it_was_seen(self):
+        seen_at = datetime.datetime(2025, 3, 1, 9, 30, tzinfo=TZ)
+        with mock.patch('pipeline.publication.timezone.now', return_value=seen_at):
+            publication.note_response(FakeResponse('Sat, 01 Mar 2025 03:00:00 GMT'))
+        self.persisted(datetime.date(2025, 3, 1))
+
+        observation = PublicationObservation.objects.get()
+        self.assertEqual(observation.first_seen_at, seen_at)
+        self.assertEqual(observation.published_at, datetime.datetime(2025, 3, 1, 3, tzinfo=datetime.timezone.utc))
+
+    def test_fallback_backfill_and_finished_runs_record_nothing(self):
+        publication.note_response(FakeResponse(), fresh=False)
+        self.persisted(publication.local_now().date())
+
+        # A backfilled date is not the day the note was taken.
+        publication.note_response(FakeResponse())
+        self.persisted(datetime.date(2020, 1, 1))
+
+        publication.note_response(FakeResponse())
+        send_run_finished('NRLDC', signals.FAILED)
+        self.persisted(publication.local_now().date())
+
+        self.assertFalse(PublicationObservation.objects.exists())
+
+
+class PollIntervalTests(TestCase):
+    def setUp(self):
+        # Ten Saturdays published between 10:00 and 10:45 local time.
+        for week in range(10):
+            day = datetime.date(2025, 3, 1) - datetime.timedelta(weeks=week)
+            PublicationObservation.objects.create(
+                source='NRLDC', report_date=day,
+                first_seen_at=datetime.datetime.combine(day, datetime.time(10, 5 * week), TZ),
+            )
+
+    def at(self, hour, minute=0):
+        return datetime.datetime(2025, 3, 8, hour, minute, tzinfo=TZ)
+
+    def test_polls_densely_around_the_usual_time_and_rarely_before(self):
+        options = settings.PUBLICATION_POLLING
+        with mock.patch('pipeline.publication.timezone.now', return_value=self.at(8)):
+            self.assertEqual(publication.poll_interval('NRLDC', self.at(10, 20)), options['dense_minutes'])
+            self.assertEqual(publication.poll_interval('NRLDC', self.at(11, 30)), options['normal_minutes'])
+            self.assertEqual(publication.poll_interval('NRLDC', self.at(4)), options['sparse_minutes'])
+            self.assertEqual(publication.poll_interval('NRLDC', self.at(9, 30)), 14.5)
+            self.assertIsNone(publication.poll_interval('SRLDC', self.at(10)))
@@ -1,25 +1,38 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.conf import settings
 import os
 import requests
 import tabula
 import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime , timedelta 
 from posoco.models import PosocoTableA, PosocoTableG
+from pipeline import publication
+from pipeline.cache import cached_json
+from pipeline.checkpoints import ReportRun, ReportStages
+from pipeline.leases import LeasedCommand
+from pipeline.tables import replace_rows
 import pandas as pd # Add this import at the top of your file
 
 # --- Constants ---
-API_URL = "https://webapi.grid-india.in/api/v1/file"
-BASE_URL = "https://webcdn.grid-india.in/"
+API_URL = settings.UPSTREAM_URLS["POSOCO_API"]
+BASE_URL = settings.UPSTREAM_URLS["POSOCO_CDN"]
 SAVE_DIR = "downloads/POSOCO"
-
-payload = {
-    "_source": "GRDW",
-    "_type": "DAILY_PSP_REPORT",
-    "_fileDate": "2025-26",  # Note: This might need adjustment for the current year.
-    "_month": "09"
-}
+SYNC_DIR = os.path.join(SAVE_DIR, "files")
+MANIFEST_PATH = os.path.join(SAVE_DIR, "manifest.json")
 
 # --- Helper Functions ---
+def build_payload(target_date):
+    """Builds the file-list payload for the financial year (Apr-Mar) and month of target_date."""
+    fy_start = target_date.year if target_date.month >= 4 else target_date.year - 1
+    return {
+        "_source": "GRDW",
+        "_type": "DAILY_PSP_REPORT",
+        "_fileDate": f"{fy_start}-{str(fy_start + 1)[-2:]}",
+        "_month": target_date.strftime("%m"),
+    }
+
 def make_report_dir(base_dir):
     """Create a timestamped subfolder inside POSOCO/."""
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -27,13 +40,34 @@ def make_report_dir(base_dir):
     os.makedirs(report_dir, exist_ok=True)
     return report_dir, timestamp
 
-def fetch_latest_pdf(api_url, base_url, payload, report_dir, timestamp):
-    """Fetches and downloads the latest PDF report."""
+def report_date_from_file_path(file_path):
+    """Parses the report date out of a FilePath such as .../NLDC_PSP_24.08.25.pdf; None if absent."""
+    match = re.search(r'(\d{2})[.\-_](\d{2})[.\-_](\d{4}|\d{2})(?!\d)', os.path.basename(file_path))
+    if not match:
+        return None
+    day, month, year = match.groups()
     try:
-        # API call
+        return datetime.strptime(f"{day}-{month}-{year[-2:]}", "%d-%m-%y").date()
+    except ValueError:
+        return None
+
+
+def fetch_file_list(api_url, payload, bypass=False):
+    """Returns the file-list API response for payload, served from the shared metadata cache."""
+    def fetch():
         response = requests.post(api_url, json=payload)
         response.raise_for_status()
-        data = response.json()
+        return response.json()
+
+    key = f"{api_url}:{json.dumps(payload, sort_keys=True, separators=(',', ':'))}"
+    return cached_json("posoco_file_list", key, fetch, bypass=bypass, cache_if=lambda d: bool(d.get("retData")))
+
+
+def fetch_latest_pdf(api_url, base_url, payload, report_dir, timestamp, pdf_date=None, bypass_cache=False):
+    """Fetches and downloads the latest PDF report."""
+    try:
+        # API call
+        data = fetch_file_list(api_url, payload, bypass=bypass_cache)
 
         if "retData" not in data or not data["retData"]:
             print("⚠️ No files found in response")
@@ -54,7 +88,7 @@ def fetch_latest_pdf(api_url, base_url, payload, report_dir, timestamp):
         # --- FIX STARTS HERE ---
 
         # 1. Calculate yesterday's date
-        yesterday = datetime.now() - timedelta(days=1)
+        yesterday = pdf_date or (datetime.now() - timedelta(days=1))
         # 2. Format as 'dailyDDMMYY.pdf'
         pdf_name = f"daily{yesterday.strftime('%d%m%y')}.pdf"
 
@@ -66,6 +100,8 @@ def fetch_latest_pdf(api_url, base_url, payload, report_dir, timestamp):
         print(f"⬇️ Downloading latest PDF: {download_url}")
         file_response = requests.get(download_url, stream=True)
         file_response.raise_for_status()
+        # The listing's latest file is an older report when the expected one is not out yet.
+        publication.note_response(file_response, fresh=report_date_from_file_path(file_path) == yesterday.date())
 
         with open(local_path, "wb") as f:
             for chunk in file_response.iter_content(1024):
@@ -77,10 +113,97 @@ def fetch_latest_pdf(api_url, base_url, payload, report_dir, timestamp):
         print(f"❌ An error occurred during download: {e}")
         return None
 
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """Loads the {FilePath: entry} manifest of files already fetched by sync mode."""
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, manifest_path=MANIFEST_PATH):
+    """Writes the manifest atomically so an interrupted run never leaves it half-written."""
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def list_pdf_files(api_url, payload, bypass_cache=False):
+    """Returns the PDF entries of the file list for the given payload."""
+    data = fetch_file_list(api_url, payload, bypass=bypass_cache)
+    return [f for f in data.get("retData") or [] if f.get("MimeType") == "application/pdf" and f.get("FilePath")]
+
+
+def download_file(base_url, file_path, dest_dir):
+    """Downloads a single FilePath into dest_dir and returns the local path."""
+    local_path = os.path.join(dest_dir, os.path.basename(file_path))
+    download_url = base_url.rstrip("/") + "/" + file_path.lstrip("/")
+    file_response = requests.get(download_url, stream=True)
+    file_response.raise_for_status()
+    tmp_path = f"{local_path}.part"
+    with open(tmp_path, "wb") as f:
+        for chunk in file_response.iter_content(8192):
+            f.write(chunk)
+    os.replace(tmp_path, local_path)
+    return local_path
+
+
+def sync_files(api_url, base_url, payload, dest_dir=SYNC_DIR, manifest_path=MANIFEST_PATH, workers=4, bypass_cache=False):
+    """
+    Downloads every PDF in the file list that is not yet in the manifest, in parallel.
+    Returns (downloaded, skipped, failed) counts; a rerun with nothing new transfers nothing.
+    The files are only downloaded; load_synced_files() loads them into the database.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    manifest = load_manifest(manifest_path)
+    pdf_files = list_pdf_files(api_url, payload, bypass_cache=bypass_cache)
+    new_files = [f for f in pdf_files if f["FilePath"] not in manifest]
+    skipped = len(pdf_files) - len(new_files)
+
+    if not new_files:
+        print(f"✅ Nothing new to download ({skipped} file(s) already in manifest).")
+        return 0, skipped, 0
+
+    print(f"⬇️ Downloading {len(new_files)} new file(s) with {workers} worker(s)...")
+    downloaded, failed = 0, 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(download_file, base_url, f["FilePath"], dest_dir): f for f in new_files}
+            for future in as_completed(futures):
+                file_path = futures[future]["FilePath"]
+                try:
+                    local_path = future.result()
+                except Exception as e:  # a disk error on one file must not lose the others
+                    print(f"❌ Failed to download {file_path}: {e}")
+                    failed += 1
+                    continue
+                # Results are handled here, on the calling thread, so the manifest needs no lock.
+                manifest[file_path] = {
+                    "local_path": local_path,
+                    "downloaded_at": datetime.now().isoformat(timespec="seconds"),
+                }
+                downloaded += 1
+                print(f"✅ Saved {local_path}")
+    finally:
+        # Files already downloaded stay recorded even if the run is interrupted.
+        save_manifest(manifest, manifest_path)
+    return downloaded, skipped, failed
+
+def read_tables(pdf_file):
+    """Extract stage: reads every table in the PDF with tabula."""
+    try:
+        return tabula.read_pdf(pdf_file, pages="all", multiple_tables=True, lattice=True)
+    except Exception as e:
+        print(f"❌ Error reading PDF with Tabula: {e}")
+        return []
+
+
 # --- THIS FUNCTION HAS BEEN UPDATED ---
-def extract_tables_from_pdf(pdf_file, report_dir, timestamp):
+def clean_tables(tables):
     """
-    Extracts tables, renames headings, and saves as JSON.
+    Finds tables A and G and renames their headings.
     This version uses flexible matching to handle unpredictable keys.
     """
     # This helper function provides the flexible matching logic
@@ -123,12 +246,6 @@ def extract_tables_from_pdf(pdf_file, report_dir, timestamp):
             
         return key # Fallback to the original key if no match is found
 
-    try:
-        tables = tabula.read_pdf(pdf_file, pages="all", multiple_tables=True, lattice=True)
-    except Exception as e:
-        print(f"❌ Error reading PDF with Tabula: {e}")
-        tables = []
-
     final_json = {"POSOCO": {"posoco_table_a": [], "posoco_table_g": []}}
 
     # Initialize variables to hold the found tables
@@ -188,8 +305,12 @@ def extract_tables_from_pdf(pdf_file, report_dir, timestamp):
         }
         print("⚠️ No valid tables found in PDF. Using empty template.")
 
-    # Save the final JSON to a file
-    date_str = datetime.now().strftime("%Y-%m-%d")
+    return final_json
+
+
+def write_json(final_json, report_dir, report_date):
+    """JSON stage: saves the cleaned tables as posoco_report_tables_<report_date>.json in report_dir and returns its path."""
+    date_str = report_date.strftime("%Y-%m-%d")
     json_name = f"posoco_report_tables_{date_str}.json"
     output_json = os.path.join(report_dir, json_name)
 
@@ -197,77 +318,150 @@ def extract_tables_from_pdf(pdf_file, report_dir, timestamp):
         json.dump(final_json, f, indent=4, ensure_ascii=False)
 
     print(f"✅ JSON with shortened keys saved successfully at: {output_json}")
+    return output_json
 
-    return final_json
 
+def save_to_db(final_json, report_date=None):
+    """Replaces the report date's rows in both tables with the processed JSON data; a failure is reported and re-raised."""
+    today = report_date or datetime.now().date()
 
-def save_to_db(final_json):
-    """Saves the processed JSON data to the Django database."""
-    today = datetime.now().date()
+    def table_rows(table_key, key_field, columns):
+        table_data = final_json.get("POSOCO", {}).get(table_key, [])
+        rows = []
+        for key, values in (table_data[0] if table_data and table_data[0] else {}).items():
+            if values is None or not isinstance(values, dict):
+                continue
+            if all(v is None for v in values.values()):
+                continue
+            rows.append({key_field: key, **{field: values.get(column) for field, column in columns.items()}})
+        return rows
 
     try:
-        # Save data from Table A
-        table_a_data = final_json.get("POSOCO", {}).get("posoco_table_a", [])
-        if table_a_data and table_a_data[0]:
-            for category, values in table_a_data[0].items():
-                if values is None or not isinstance(values, dict):
-                    continue
-                if all(v is None for v in values.values()):
-                    continue
-                PosocoTableA.objects.update_or_create(
-                    category=category,
-                    report_date=today,
-                    defaults={
-                        'nr': values.get("NR"),
-                        'wr': values.get("WR"),
-                        'sr': values.get("SR"),
-                        'er': values.get("ER"),
-                        'ner': values.get("NER"),
-                        'total': values.get("TOTAL"),
-                    }
-                )
-
-        # Save data from Table G
-        table_g_data = final_json.get("POSOCO", {}).get("posoco_table_g", [])
-        if table_g_data and table_g_data[0]:
-            for fuel, values in table_g_data[0].items():
-                if values is None or not isinstance(values, dict):
-                    continue
-                if all(v is None for v in values.values()):
-                    continue
-                PosocoTableG.objects.update_or_create(
-                    fuel_type=fuel,
-                    report_date=today,
-                    defaults={
-                        'nr': values.get("NR"),
-                        'wr': values.get("WR"),
-                        'sr': values.get("SR"),
-                        'er': values.get("ER"),
-                        'ner': values.get("NER"),
-                        'all_india': values.get("All India"),
-                        'share_percent': values.get("% Share"),
-                    }
-                )
-        print("✅ Data saved to database successfully")
+        # These tables have no unique key to upsert on, so each date's rows are replaced in one bulk insert.
+        table_a_rows = table_rows("posoco_table_a", "category", {
+            'nr': "NR", 'wr': "WR", 'sr': "SR", 'er': "ER", 'ner': "NER", 'total': "TOTAL",
+        })
+        if table_a_rows:
+            replace_rows(PosocoTableA, today, table_a_rows)
+
+        table_g_rows = table_rows("posoco_table_g", "fuel_type", {
+            'nr': "NR", 'wr': "WR", 'sr': "SR", 'er': "ER", 'ner': "NER", 'all_india': "All India", 'share_percent': "% Share",
+        })
+        if table_g_rows:
+            replace_rows(PosocoTableG, today, table_g_rows)
+        print(f"✅ Data saved to database successfully ({len(table_a_rows)} Table A and {len(table_g_rows)} Table G row(s))")
     except Exception as e:
         print(f"❌ An error occurred while saving to the database: {e}")
+        # The persist stage must fail so the run resumes here rather than counting the day as loaded.
+        raise
 
 
 # --- Django Management Command ---
-class Command(BaseCommand):
+class Command(LeasedCommand):
     help = "Downloads the latest NLDC PSP PDF, extracts key tables with shortened headings, and saves them to a file and the database."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            type=str,
+            help='Run as if on this date (YYYY-MM-DD); the report covers the day before. Defaults to today.'
+        )
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='Download every file in the month\'s list that is not yet in the local manifest, load the new files into the database, then exit.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of parallel downloads in --sync mode.'
+        )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Bypass the shared metadata cache and always query the file list.'
+        )
+
+    def persist(self, final_json, report_date):
+        if final_json and (final_json["POSOCO"]["posoco_table_a"] or final_json["POSOCO"]["posoco_table_g"]):
+            save_to_db(final_json, report_date=report_date)
+        else:
+            self.stdout.write(self.style.WARNING("Could not extract any data from the PDF to save."))
+
+    def report_stages(self, report_dir, report_date):
+        return ReportStages(
+            'POSOCO', report_date, read_tables, clean_tables,
+            lambda final_json: self.persist(final_json, report_date),
+            lambda final_json: write_json(final_json, report_dir, report_date),
+        )
+
+    def load_synced_files(self, manifest_path=MANIFEST_PATH):
+        """
+        Extracts and loads every synced file the manifest does not mark as loaded yet, so a file
+        whose load failed is retried by the next sync without being downloaded again.
+        Returns (loaded, failed) counts.
+        """
+        manifest = load_manifest(manifest_path)
+        loaded, failed = 0, 0
+        for file_path, entry in sorted(manifest.items()):
+            if entry.get("loaded_at"):
+                continue
+            pdf_date = report_date_from_file_path(file_path)
+            if pdf_date is None:
+                self.stdout.write(self.style.WARNING(f"⚠️ No report date in {file_path}; not loaded."))
+                continue
+            # Rows carry the run date, the day after the report's date, as with the daily run.
+            run_date = pdf_date + timedelta(days=1)
+            try:
+                self.report_stages(os.path.dirname(entry["local_path"]), run_date).load(entry["local_path"])
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"❌ Failed to load {file_path}: {e}"))
+                failed += 1
+                continue
+            entry["loaded_at"] = datetime.now().isoformat(timespec="seconds")
+            save_manifest(manifest, manifest_path)
+            loaded += 1
+        return loaded, failed
+
     def handle(self, *args, **options):
+        if options.get('date'):
+            try:
+                run_date = datetime.strptime(options['date'], '%Y-%m-%d')
+            except ValueError:
+                raise CommandError("Date format is incorrect. Please use YYYY-MM-DD.")
+        else:
+            run_date = datetime.now()
+        pdf_date = run_date - timedelta(days=1)
+        payload = build_payload(pdf_date)
+
+        if options['sync']:
+            self.stdout.write(f"🔄 Syncing POSOCO file list for FY {payload['_fileDate']}, month {payload['_month']}...")
+            try:
+                downloaded, skipped, failed = sync_files(
+                    API_URL, BASE_URL, payload, workers=options['workers'], bypass_cache=options['no_cache']
+                )
+            except requests.exceptions.RequestException as e:
+                raise CommandError(f"❌ Failed to fetch the file list: {e}")
+            self.stdout.write(self.style.SUCCESS(f"✅ Sync finished: {downloaded} downloaded, {skipped} already present, {failed} failed."))
+            loaded, load_failed = self.load_synced_files()
+            self.stdout.write(self.style.SUCCESS(f"✅ Loaded {loaded} synced file(s) into the database, {load_failed} failed."))
+            return
+
         self.stdout.write("🚀 Starting POSOCO report download and processing...")
-        report_dir, timestamp = make_report_dir(SAVE_DIR)
-        pdf_path = fetch_latest_pdf(API_URL, BASE_URL, payload, report_dir, timestamp)
+        run = ReportRun("POSOCO", run_date.date())
+
+        def download():
+            report_dir, timestamp = make_report_dir(SAVE_DIR)
+            pdf_path = fetch_latest_pdf(
+                API_URL, BASE_URL, payload, report_dir, timestamp, pdf_date=pdf_date, bypass_cache=options['no_cache']
+            )
+            return pdf_path, report_dir
+
+        pdf_path, report_dir = run.download(download)
 
         if pdf_path:
-            final_json = extract_tables_from_pdf(pdf_path, report_dir, timestamp)
-            if final_json and (final_json["POSOCO"]["posoco_table_a"] or final_json["POSOCO"]["posoco_table_g"]):
-                save_to_db(final_json)
-            else:
-                self.stdout.write(self.style.WARNING("Could not extract any data from the PDF to save."))
+            self.report_stages(report_dir, run_date.date()).process(run, pdf_path)
         else:
             self.stdout.write(self.style.ERROR("Failed to download PDF. Aborting process."))
 
@@ -1,3 +1,79 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import os
+from unittest import mock
 
-# Create your tests here.
+from pipeline.tests.base import TempDirTestCase
+from posoco.management.commands import posoco
+from posoco.models import PosocoTableA
+
+FILES = [
+    {'FilePath': '/psp/2025/NLDC_PSP_01.03.25.pdf', 'MimeType': 'application/pdf'},
+    {'FilePath': '/psp/2025/NLDC_PSP_02.03.25.pdf', 'MimeType': 'application/pdf'},
+    {'FilePath': '/psp/2025/notes.xlsx', 'MimeType': 'application/vnd.ms-excel'},
+]
+MANIFEST = os.path.join('sync', 'manifest.json')
+CLEANED = {
+    'POSOCO': {
+        'posoco_table_a': [{'demand_evening_peak': {'NR': 50.0, 'TOTAL': 200.0}}],
+        'posoco_table_g': [{'coal': {'NR': 10.0, 'All India': 30.0}}],
+    },
+}
+
+
+def fake_download(base_url, file_path, dest_dir):
+    if file_path.endswith('02.03.25.pdf'):
+        raise OSError('disk full')
+    local_path = os.path.join(dest_dir, os.path.basename(file_path))
+    with open(local_path, 'wb') as f:
+        f.write(b'%PDF')
+    return local_path
+
+
+def fake_list(api_url, payload, bypass_cache=False):
+    return [f for f in FILES if f['MimeType'] == 'application/pdf']
+
+
+@mock.patch.object(posoco, 'list_pdf_files', fake_list)
+@mock.patch.object(posoco, 'download_file', side_effect=fake_download)
+class SyncTests(TempDirTestCase):
+    def sync(self):
+        with mock.patch('builtins.print'):
+            return posoco.sync_files('api', 'cdn', {}, dest_dir='files', manifest_path=MANIFEST, workers=2)
+
+    def test_only_files_missing_from_the_manifest_are_downloaded(self, download):
+        os.makedirs('sync')
+        with open(MANIFEST, 'w', encoding='utf-8') as f:
+            json.dump({FILES[0]['FilePath']: {'local_path': 'files/old.pdf', 'downloaded_at': '2025-03-02T09:00:00'}}, f)
+
+        self.assertEqual(self.sync(), (0, 1, 1))
+        self.assertEqual([call.args[1] for call in download.call_args_list], [FILES[1]['FilePath']])
+
+    def test_a_failed_download_keeps_the_manifest_and_the_other_files(self, download):
+        self.assertEqual(self.sync(), (1, 0, 1))
+        manifest = posoco.load_manifest(MANIFEST)
+        self.assertEqual(list(manifest), [FILES[0]['FilePath']])
+
+        # The failed file is tried again; the recorded one is not.
+        download.reset_mock()
+        self.assertEqual(self.sync(), (0, 1, 1))
+        self.assertEqual(download.call_count, 1)
+        self.assertEqual(list(posoco.load_manifest(MANIFEST)), [FILES[0]['FilePath']])
+
+    @mock.patch.object(posoco, 'read_tables', lambda pdf_path: [])
+    @mock.patch.object(posoco, 'clean_tables', lambda tables: CLEANED)
+    def test_synced_files_are_loaded_once_under_their_run_date(self, download):
+        self.sync()
+        command = posoco.Command(stdout=io.StringIO())
+        with mock.patch('builtins.print'):
+            self.assertEqual(command.load_synced_files(MANIFEST), (1, 0))
+            self.assertEqual(command.load_synced_files(MANIFEST), (0, 0))
+
+        run_date = datetime.date(2025, 3, 2)
+        self.assertEqual(
+            sorted(PosocoTableA.objects.filter(report_date=run_date).values_list('category', 'nr', 'total')),
+            [('demand_evening_peak', '50.0', '200.0')],
+        )
+        self.assertTrue(os.path.exists(os.path.join('files', 'posoco_report_tables_2025-03-02.json')))
+        self.assertIn('loaded_at', posoco.load_manifest(MANIFEST)[FILES[0]['FilePath']])
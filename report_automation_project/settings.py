@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +46,7 @@ INSTALLED_APPS = [
     'tailwind',
     'theme',
     'merger',
+    'pipeline',
 ]
 
 
@@ -104,6 +106,146 @@ DATABASES = {
 }
 
 
+# Caches
+# The 'upstream' cache is file-backed so all processes share upstream metadata responses;
+# 'coverage' likewise, so an ingest in the worker invalidates what the web server shows.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'upstream': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'upstream',
+    },
+    'coverage': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'coverage',
+    },
+}
+
+UPSTREAM_CACHE_ALIAS = 'upstream'
+
+# Dates per report table behind the coverage calendar (pipeline.coverage). Ingests invalidate
+# them; the TTL only catches rows written some other way, e.g. through the admin.
+COVERAGE_CACHE_ALIAS = 'coverage'
+COVERAGE_CACHE_TTL = 24 * 60 * 60
+# Longest range the coverage calendar draws at once (about three years).
+COVERAGE_MAX_DAYS = 3 * 366
+
+# endpoint: (fresh seconds, stale-while-revalidate seconds)
+UPSTREAM_CACHE_TTLS = {
+    'nrldc_documents': (300, 1800),
+    'posoco_file_list': (600, 3600),
+}
+
+# Upstream endpoints. Each can be overridden from the environment, e.g. to point the
+# fetchers and the merge push at the local stand-in server (manage.py upstream_standin).
+
+UPSTREAM_URLS = {
+    'NRLDC': os.environ.get('NRLDC_BASE_URL', 'https://nrldc.in'),
+    'SRLDC': os.environ.get('SRLDC_BASE_URL', 'https://www.srldc.in/var/ftp/reports/psp/'),
+    'WRLDC': os.environ.get('WRLDC_BASE_URL', 'https://reporting.wrldc.in:8081/PSP/'),
+    'POSOCO_API': os.environ.get('POSOCO_API_URL', 'https://webapi.grid-india.in/api/v1/file'),
+    'POSOCO_CDN': os.environ.get('POSOCO_CDN_URL', 'https://webcdn.grid-india.in/'),
+}
+
+MERGE_PUSH_URL = os.environ.get('MERGE_PUSH_URL', 'http://172.16.7.118:8003/api/tamilnadu/wind/api.grid.php')
+
+# Merged payloads go through merger.PushOutbox; drain_push_outbox delivers them and re-sends anything that failed.
+# Set MERGE_PUSH_GZIP only when the receiver accepts Content-Encoding: gzip.
+MERGE_PUSH_GZIP = os.environ.get('MERGE_PUSH_GZIP', '') == '1'
+MERGE_PUSH_TIMEOUT = 30
+MERGE_PUSH_MAX_ATTEMPTS = 10
+# (first retry delay, longest retry delay) in seconds; the delay doubles after each failure.
+MERGE_PUSH_BACKOFF = (60, 3600)
+MERGE_PUSH_WORKERS = 4
+# Send only the regions that changed since the last delivery; enable once the receiver merges partial payloads.
+MERGE_PUSH_PARTIAL = os.environ.get('MERGE_PUSH_PARTIAL', '') == '1'
+
+# Every merged payload is delivered to all of these at once, each with its own outbox rows.
+# type: 'http' (url, gzip), 'directory' (path; latest payload per date) or 'queue' (path; one
+# message file per payload under <path>/new/). Optional per sink: timeout, max_attempts, partial.
+MERGE_SINKS = {
+    'grid_api': {
+        'type': 'http',
+        'url': MERGE_PUSH_URL,
+        'gzip': MERGE_PUSH_GZIP,
+        'partial': MERGE_PUSH_PARTIAL,
+    },
+    # 'drop_folder': {'type': 'directory', 'path': BASE_DIR / 'downloads' / 'merged_drop'},
+    # 'local_queue': {'type': 'queue', 'path': BASE_DIR / 'downloads' / 'merge_queue', 'max_attempts': 3},
+}
+
+# Append-only JSON Lines archives of each source's report data and of merged payloads (pipeline.archive).
+ARCHIVE_DIR = os.path.join(BASE_DIR, 'downloads', 'archive')
+
+# Parquet dataset written by export_parquet: <table>/source=<SOURCE>/month=<YYYY-MM>/part-0.parquet.
+PARQUET_EXPORT_DIR = os.path.join(BASE_DIR, 'exports', 'parquet')
+
+# Memory-mapped column files behind the dashboard analytics API (pipeline.analytics).
+ANALYTICS_DIR = os.path.join(BASE_DIR, 'cache', 'analytics')
+
+# host: (requests per second, burst size); 'default' applies to hosts not listed.
+UPSTREAM_RATE_LIMITS = {
+    'default': (1.0, 2),
+}
+
+# run_worker: how many jobs run at once, and per lane the claim order (lower first) and how
+# many of that lane's jobs may run at the same time.
+JOB_WORKER_CONCURRENCY = 3
+JOB_LANES = {
+    'manual': {'priority': 0, 'max_running': 3},
+    'scheduled': {'priority': 1, 'max_running': 2},
+    'backfill': {'priority': 2, 'max_running': 1},
+}
+
+# Seconds a job lease (pipeline.leases) stays valid without a heartbeat; holders renew it every third of this.
+JOB_LEASE_TTL = 120
+
+# run_scheduler: each fetcher is queued inside its daily window (local time in SCHEDULER_TIME_ZONE)
+# and re-queued every retry_minutes until its data for the day is in. merge_reports follows once
+# every source has data, or at the merge deadline with whatever is there.
+SCHEDULER_TIME_ZONE = 'Asia/Kolkata'
+SCHEDULE = {
+    'nrldc_project': {'window': ('08:00', '20:00'), 'retry_minutes': 30},
+    'srldc_project': {'window': ('08:00', '20:00'), 'retry_minutes': 30},
+    'wrldc_project': {'window': ('08:00', '20:00'), 'retry_minutes': 30},
+    'posoco': {'window': ('08:00', '20:00'), 'retry_minutes': 30},
+}
+MERGE_SCHEDULE = {'script': 'merge_reports', 'deadline': '20:30', 'retry_minutes': 30}
+
+# find_gaps looks back GAP_SCAN_DAYS for dates a source has no rows for and queues backfills for
+# at most GAP_MAX_QUEUED_DAYS of them per scan; run_scheduler runs it once a day from 'at'.
+GAP_SCAN_DAYS = 90
+GAP_MAX_QUEUED_DAYS = 31
+GAP_SCHEDULE = {'script': 'find_gaps', 'at': '21:00', 'args': ['--queue']}
+
+# merge_reports only queues payloads in the push outbox; run_scheduler queues drain_push_outbox to
+# deliver them whenever entries are due, at most every retry_minutes.
+OUTBOX_SCHEDULE = {'script': 'drain_push_outbox', 'retry_minutes': 1}
+
+# Once a source has min_samples recorded publication times (pipeline.publication), its polls
+# inside the window follow them instead of retry_minutes: every dense_minutes from lead_minutes
+# before the usual earliest time until the usual latest, every normal_minutes for trail_minutes
+# after that, and every sparse_minutes otherwise.
+PUBLICATION_POLLING = {
+    'history_days': 120,
+    'min_samples': 5,
+    'lead_minutes': 20,
+    'trail_minutes': 90,
+    'dense_minutes': 5,
+    'normal_minutes': 15,
+    'sparse_minutes': 60,
+}
+
+# The fetchers write their logs (nrldc.log, srldc.log) to LOG_DIR, and each job the worker runs streams
+# its output to job-<id>-<script>.log there. The dashboard's log panel can tail any *.log file
+# directly inside it, at most LOG_TAIL_MAX_BYTES per request.
+LOG_DIR = os.path.join(BASE_DIR, 'logs')
+LOG_TAIL_MAX_BYTES = 64 * 1024
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -1,17 +1,32 @@
 # report_dashboard/admin.py
 
 from django.contrib import admin
-from .models import AutomationJob
+from .models import AutomationJob, JobQueueEntry, JobRun
 
 @admin.register(AutomationJob)
 class AutomationJobAdmin(admin.ModelAdmin):
     list_display = (
         'script_name', 
         'status', 
-        'is_data_available_today', 
+        'data_available_date',
         'last_run_time', 
         'last_success_time'
     )
-    list_filter = ('status', 'is_data_available_today')
+    list_filter = ('status', 'data_available_date')
     search_fields = ('script_name',)
-    ordering = ('script_name',)
\ No newline at end of file
+    ordering = ('script_name',)
+
+
+@admin.register(JobQueueEntry)
+class JobQueueEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'script_name', 'lane', 'status', 'created_at', 'started_at', 'finished_at')
+    list_filter = ('status', 'lane', 'script_name')
+    readonly_fields = ('output',)
+    ordering = ('-created_at',)
+
+
+@admin.register(JobRun)
+class JobRunAdmin(admin.ModelAdmin):
+    list_display = ('script_name', 'report_date', 'status', 'started_at', 'duration_seconds', 'rows_upserted')
+    list_filter = ('status', 'script_name')
+    ordering = ('-started_at',)
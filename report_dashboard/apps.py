@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ReportDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'report_dashboard'
+
+    def ready(self):
+        # Connects the run history's receiver of pipeline.signals.run_finished.
+        from report_dashboard import history  # noqa: F401
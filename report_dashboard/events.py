@@ -0,0 +1,100 @@
+"""
+Server-sent job status for the dashboard.
+
+One poller per server process watches MAX(AutomationJob.updated_at) and, when it moves, reads the
+job list once and hands it to every connected stream. The poller only runs while at least one
+browser is connected, so idle tabs cost one open socket and a keep-alive comment now and then.
+"""
+import asyncio
+import json
+
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import AutomationJob
+
+POLL_INTERVAL = 0.5
+KEEPALIVE_INTERVAL = 15
+
+STATUS_FIELDS = (
+    'script_name', 'status', 'last_run_time', 'last_success_time', 'data_available_date', 'log_message',
+)
+
+
+def serialize_jobs(rows, today):
+    """Turns AutomationJob.values(*STATUS_FIELDS) rows into the status API's JSON shape."""
+    job_list = []
+    for job_data in rows:
+        job_data = dict(job_data)
+        job_data['is_data_available_today'] = job_data.pop('data_available_date') == today
+        if job_data['last_run_time']:
+            job_data['last_run_time'] = job_data['last_run_time'].strftime('%b %d, %Y, %I:%M %p')
+        if job_data['last_success_time']:
+            job_data['last_success_time'] = job_data['last_success_time'].strftime('%b %d, %Y, %I:%M %p')
+        job_list.append(job_data)
+    return job_list
+
+
+async def job_status_snapshot():
+    rows = [row async for row in AutomationJob.objects.values(*STATUS_FIELDS)]
+    return serialize_jobs(rows, timezone.now().date())
+
+
+class JobStatusBroadcaster:
+    def __init__(self):
+        self.subscribers = set()
+        self.task = None
+        self.latest = None
+
+    def subscribe(self):
+        # Each stream only ever needs the newest snapshot, so its queue holds one.
+        queue = asyncio.Queue(maxsize=1)
+        self.subscribers.add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.poll())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, payload):
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+    async def poll(self):
+        last_seen = None
+        while self.subscribers:
+            try:
+                marker = (await AutomationJob.objects.aaggregate(latest=Max('updated_at')))['latest']
+                if marker != last_seen or self.latest is None:
+                    last_seen = marker
+                    self.latest = json.dumps(await job_status_snapshot())
+                    self.publish(self.latest)
+            except Exception:
+                # A database hiccup must not end the stream; try again on the next tick.
+                pass
+            await asyncio.sleep(POLL_INTERVAL)
+        self.latest = None
+
+
+broadcaster = JobStatusBroadcaster()
+
+
+async def job_status_events():
+    """Yields the SSE stream for one browser: the current state, then every change."""
+    queue = broadcaster.subscribe()
+    try:
+        yield "retry: 2000\n\n"
+        if broadcaster.latest:
+            yield f"data: {broadcaster.latest}\n\n"
+        while True:
+            try:
+                payload = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"data: {payload}\n\n"
+    finally:
+        broadcaster.unsubscribe(queue)
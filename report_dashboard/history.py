@@ -0,0 +1,30 @@
+"""Keeps every ReportRun in JobRun, with its stage timings, from the pipeline.signals.run_finished it sends."""
+import os
+
+from django.dispatch import receiver
+
+from pipeline import signals
+from pipeline.checkpoints import STAGES
+from pipeline.tables import REPORT_TABLES
+
+from .models import SOURCE_SCRIPTS, JobRun
+
+
+def _count_rows(source, report_date):
+    """Rows the report date has in the source's tables once persisted; the persist stage upserts every one."""
+    return sum(model.objects.filter(report_date=report_date).count() for model in REPORT_TABLES.get(source, {}).values())
+
+
+@receiver(signals.run_finished, dispatch_uid='history.record_run')
+def record_run(sender, report_date, status, error, started_at, resumed, completed_stage, pdf_path, timings,
+               tables_found, **kwargs):
+    fields = {JobRun.STAGE_FIELDS[stage]: seconds for stage, seconds in timings.items()}
+    reached = STAGES.index(completed_stage) if completed_stage else -1
+    if 'download' in timings and reached >= 0 and pdf_path and os.path.exists(pdf_path):
+        fields['bytes_downloaded'] = os.path.getsize(pdf_path)
+    if 'persist' in timings and reached >= STAGES.index('persist'):
+        fields['rows_upserted'] = _count_rows(sender, report_date)
+    JobRun.record(
+        SOURCE_SCRIPTS.get(sender, sender), started_at, status, source=sender, report_date=report_date,
+        resumed=resumed, error=error, tables_found=tables_found, **fields,
+    )
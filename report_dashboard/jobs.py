@@ -0,0 +1,242 @@
+"""
+Job queue for the management commands the dashboard runs.
+
+The dashboard (and the scheduler and backfills) call enqueue(); the long-running run_worker
+process claims queued entries in priority order and runs them in-process with call_command,
+so a run no longer pays for a fresh interpreter and Django/pandas import. The worker keeps at
+most JOB_WORKER_CONCURRENCY jobs running, respects each lane's max_running, and never runs two
+entries of the same script at once. The command's output (self.stdout, self.stderr and anything
+it print()s) is streamed line by line to the entry's log file in LOG_DIR, so the dashboard can
+tail a run while it is going. AutomationJob status, last_success_time and log_message are updated
+from the outcome (SKIPPED when the command's lease was held elsewhere, which neither succeeds
+nor fails the job), and the end of the output is kept on the entry. While an entry runs, its worker holds the lease job:<pk>, so workers on
+other nodes can tell a running entry from one whose worker died.
+"""
+import contextlib
+import datetime
+import os
+import sys
+import threading
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from pipeline import leases
+
+from .models import AutomationJob, JobQueueEntry
+
+# How much of a job's output is kept in JobQueueEntry.output / AutomationJob.log_message.
+OUTPUT_LIMIT = 20000
+
+_capture = threading.local()
+_install_lock = threading.Lock()
+
+
+class _ThreadStream:
+    """
+    Stands in for sys.stdout / sys.stderr: on a thread running a job, writes go to that job's
+    output, elsewhere to the original stream. Jobs run side by side on threads, so the
+    process-wide contextlib.redirect_stdout would mix their output.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def _target(self):
+        return getattr(_capture, 'output', None) or self.stream
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+@contextlib.contextmanager
+def _capture_prints(output):
+    """Sends what the job print()s on this thread to `output`, along with its self.stdout."""
+    with _install_lock:
+        if not isinstance(sys.stdout, _ThreadStream):
+            sys.stdout = _ThreadStream(sys.stdout)
+        if not isinstance(sys.stderr, _ThreadStream):
+            sys.stderr = _ThreadStream(sys.stderr)
+    _capture.output = output
+    try:
+        yield
+    finally:
+        _capture.output = None
+
+
+def lane_priority(lane):
+    return settings.JOB_LANES.get(lane, {}).get('priority', 0)
+
+
+def enqueue(script_name, args=(), lane=JobQueueEntry.Lane.MANUAL):
+    """
+    Queues a run and returns (entry, created). An identical run that is already queued or
+    running is returned instead (a second click joins it); a more urgent lane moves it forward.
+    """
+    args = [str(arg) for arg in args]
+    priority = lane_priority(lane)
+    with transaction.atomic():
+        # Locking the job's row serialises concurrent clicks on the same script.
+        list(AutomationJob.objects.select_for_update().filter(script_name=script_name))
+        for entry in JobQueueEntry.objects.filter(
+            script_name=script_name, status__in=[JobQueueEntry.Status.QUEUED, JobQueueEntry.Status.RUNNING],
+        ):
+            if entry.args != args:
+                continue
+            if entry.status == JobQueueEntry.Status.QUEUED and priority < entry.priority:
+                JobQueueEntry.objects.filter(pk=entry.pk).update(lane=lane, priority=priority)
+            return entry, False
+        return JobQueueEntry.objects.create(script_name=script_name, args=args, lane=lane, priority=priority), True
+
+
+def _read_output(path):
+    """The last OUTPUT_LIMIT bytes of a run's log file."""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        f.seek(max(0, size - OUTPUT_LIMIT))
+        text = f.read().decode('utf-8', errors='replace')
+    return text if size <= OUTPUT_LIMIT else '...\n' + text
+
+
+def claim_next(exclude_scripts=()):
+    """Claims the most urgent queued entry that may start now, or returns None."""
+    running = JobQueueEntry.objects.filter(status=JobQueueEntry.Status.RUNNING)
+    busy_scripts = set(running.values_list('script_name', flat=True)) | set(exclude_scripts)
+    running_by_lane = dict(running.values_list('lane').annotate(count=Count('id')))
+    full_lanes = [
+        lane for lane, options in settings.JOB_LANES.items()
+        if running_by_lane.get(lane, 0) >= options.get('max_running', settings.JOB_WORKER_CONCURRENCY)
+    ]
+
+    candidates = (
+        JobQueueEntry.objects.filter(status=JobQueueEntry.Status.QUEUED)
+        .exclude(script_name__in=busy_scripts).exclude(lane__in=full_lanes)
+        .order_by('priority', 'created_at')
+    )
+    for entry in candidates[:20]:
+        # Another worker may claim the same entry; only the one whose update lands runs it.
+        claimed = JobQueueEntry.objects.filter(pk=entry.pk, status=JobQueueEntry.Status.QUEUED).update(
+            status=JobQueueEntry.Status.RUNNING, started_at=timezone.now(),
+        )
+        if claimed:
+            entry.refresh_from_db()
+            return entry
+    return None
+
+
+def _update_job(script_name, **fields):
+    AutomationJob.objects.filter(script_name=script_name).update(updated_at=timezone.now(), **fields)
+
+
+def run_entry(entry):
+    """Runs a claimed entry in this process and records the outcome. Returns the entry."""
+    _update_job(
+        entry.script_name, status=AutomationJob.Status.RUNNING, last_run_time=entry.started_at,
+        log_message=f"Running ({entry.lane})... Output: {entry.log_name}",
+    )
+    os.makedirs(settings.LOG_DIR, exist_ok=True)
+    log_path = os.path.join(settings.LOG_DIR, entry.log_name)
+    # Line-buffered, so each line is on disk for the log tail as soon as it is written.
+    output = open(log_path, 'a', encoding='utf-8', buffering=1)
+    lease = None
+    try:
+        lease = leases.acquire(f"job:{entry.pk}")
+        with _capture_prints(output):
+            call_command(entry.script_name, *entry.args, stdout=output, stderr=output)
+        entry.status = JobQueueEntry.Status.SUCCESS
+    except leases.LeaseHeld as e:
+        output.write(f"⏭️ {e}\n")
+        entry.status = JobQueueEntry.Status.SKIPPED
+    except BaseException as e:  # SystemExit from a command must not take the worker down
+        output.write(f"\n❌ {type(e).__name__}: {e}\n")
+        entry.status = JobQueueEntry.Status.FAILED
+    finally:
+        entry.finished_at = timezone.now()
+        output.close()
+        entry.output = _read_output(log_path)
+        try:
+            entry.save(update_fields=['status', 'finished_at', 'output'])
+            job_fields = {'log_message': entry.output}
+            if entry.status == JobQueueEntry.Status.SUCCESS:
+                job_fields.update(status=AutomationJob.Status.SUCCESS, last_success_time=entry.finished_at)
+            elif entry.status == JobQueueEntry.Status.SKIPPED:
+                job_fields.update(status=AutomationJob.Status.SKIPPED)
+            else:
+                job_fields.update(status=AutomationJob.Status.FAILED)
+            _update_job(entry.script_name, **job_fields)
+        finally:
+            if lease:
+                lease.release()
+            connections.close_all()
+    return entry
+
+
+def recover_interrupted():
+    """Fails entries left RUNNING by a worker that stopped; returns how many there were."""
+    # Entries whose job lease is still renewed belong to a live worker, possibly on another node.
+    started_before = timezone.now() - datetime.timedelta(seconds=settings.JOB_LEASE_TTL)
+    interrupted = [
+        entry for entry in JobQueueEntry.objects.filter(status=JobQueueEntry.Status.RUNNING, started_at__lt=started_before)
+        if not leases.is_held(f"job:{entry.pk}")
+    ]
+    for entry in interrupted:
+        JobQueueEntry.objects.filter(pk=entry.pk).update(
+            status=JobQueueEntry.Status.FAILED, finished_at=timezone.now(),
+            output=entry.output + '\n❌ The worker stopped while this job was running.',
+        )
+        _update_job(entry.script_name, status=AutomationJob.Status.FAILED,
+                    log_message='The worker stopped while this job was running.')
+    return len(interrupted)
+
+
+class Worker:
+    """Keeps up to `concurrency` claimed entries running on threads."""
+
+    def __init__(self, concurrency=None):
+        self.concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+        self.running = {}
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+
+    def _run(self, entry, on_finish):
+        try:
+            run_entry(entry)
+        finally:
+            with self.lock:
+                self.running.pop(entry.pk, None)
+            self.finished.set()
+            if on_finish:
+                on_finish(entry)
+
+    def fill(self, on_start=None, on_finish=None):
+        """Claims and starts entries until the pool is full or nothing can start. Returns how many started."""
+        started = 0
+        while True:
+            with self.lock:
+                if len(self.running) >= self.concurrency:
+                    break
+                own_scripts = {entry.script_name for entry in self.running.values()}
+            entry = claim_next(exclude_scripts=own_scripts)
+            if entry is None:
+                break
+            with self.lock:
+                self.running[entry.pk] = entry
+            if on_start:
+                on_start(entry)
+            threading.Thread(target=self._run, args=(entry, on_finish), name=f"job-{entry.pk}", daemon=True).start()
+            started += 1
+        return started
+
+    def wait(self, timeout):
+        """Sleeps until a job finishes or timeout passes."""
+        self.finished.wait(timeout)
+        self.finished.clear()
@@ -0,0 +1,67 @@
+"""
+Incremental reads of the job log files for the dashboard's log panel.
+
+The client passes the byte offset it has read up to and gets back only the lines written since,
+read with seek() so a refresh costs the size of the new lines however large the file has grown.
+Only *.log files directly inside LOG_DIR can be read; names are matched against the directory
+listing, never joined into a path as given.
+"""
+import os
+
+from django.conf import settings
+
+
+def available_logs():
+    """Names of the log files that can be tailed, e.g. ['nrldc.log', 'srldc.log']."""
+    try:
+        entries = os.scandir(settings.LOG_DIR)
+    except FileNotFoundError:
+        return []
+    with entries:
+        return sorted(entry.name for entry in entries if entry.is_file() and entry.name.endswith('.log'))
+
+
+def tail(name, offset=None, max_bytes=None):
+    """
+    Returns the complete lines of log `name` from byte `offset` on, at most max_bytes of them, or
+    None for a name that is not an available log. Without an offset (first load), or when the
+    offset is past the end because the file was rotated or truncated, reading starts max_bytes
+    before the end. The response's offset is where the next read should start; more=True means
+    the client is still behind and should ask again straight away.
+    """
+    if name not in available_logs():
+        return None
+    max_bytes = max_bytes or settings.LOG_TAIL_MAX_BYTES
+    path = os.path.join(settings.LOG_DIR, name)
+
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        reset = offset is not None and offset > size
+        from_tail = offset is None or reset
+        start = max(0, size - max_bytes) if from_tail else offset
+        f.seek(start)
+        chunk = f.read(min(max_bytes, size - start))
+
+    consumed = len(chunk)
+    # Stopped at max_bytes rather than at the end of the file: the client is behind.
+    behind = consumed == max_bytes and start + consumed < size
+    if from_tail and start > 0:
+        # Landed in the middle of a line; begin at the next one.
+        skip = chunk.find(b'\n') + 1
+        chunk = chunk[skip:]
+    if chunk and not chunk.endswith(b'\n'):
+        # Leave a line that is still being written for the next read, unless it alone fills the chunk.
+        end = chunk.rfind(b'\n') + 1
+        if end or consumed < max_bytes:
+            consumed -= len(chunk) - end
+            chunk = chunk[:end]
+
+    next_offset = start + consumed
+    return {
+        'name': name,
+        'offset': next_offset,
+        'size': size,
+        'reset': reset,
+        'more': behind,
+        'lines': chunk.decode('utf-8', errors='replace').splitlines(),
+    }
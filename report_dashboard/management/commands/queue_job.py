@@ -0,0 +1,25 @@
+import argparse
+
+from django.core.management.base import BaseCommand
+
+from report_dashboard import jobs
+from report_dashboard.models import JobQueueEntry
+
+
+class Command(BaseCommand):
+    help = 'Queues a management command for run_worker, e.g. queue_job backfill --lane backfill -- --source NRLDC --from 2025-01-01 --to 2025-01-31'
+
+    def add_arguments(self, parser):
+        parser.add_argument('script_name', help='Management command to run.')
+        parser.add_argument('--lane', choices=JobQueueEntry.Lane.values, default=JobQueueEntry.Lane.MANUAL)
+        parser.add_argument('command_args', nargs=argparse.REMAINDER, help='Arguments for the command (after --).')
+
+    def handle(self, *args, **options):
+        command_args = options['command_args']
+        if command_args[:1] == ['--']:
+            command_args = command_args[1:]
+        entry, created = jobs.enqueue(options['script_name'], command_args, options['lane'])
+        if created:
+            self.stdout.write(self.style.SUCCESS(f"✅ Queued #{entry.pk}: {entry}"))
+        else:
+            self.stdout.write(f"🔁 Already {entry.status.lower()} as #{entry.pk}: {entry}")
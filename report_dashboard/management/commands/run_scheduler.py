@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from report_dashboard import jobs
+from report_dashboard.scheduler import Scheduler, local_now
+from report_dashboard.models import JobQueueEntry
+
+
+class Command(BaseCommand):
+    help = 'Stays resident and runs the fetchers inside their daily windows, then merge_reports (see SCHEDULE).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tick', type=float, default=30, metavar='SECONDS', help='How often to check the schedule.')
+        parser.add_argument(
+            '--no-worker',
+            action='store_true',
+            help='Only queue jobs; leave running them to a separate run_worker process.'
+        )
+
+    def on_start(self, entry):
+        self.stdout.write(f"▶️ #{entry.pk} {entry.script_name} ({entry.lane})")
+
+    def on_finish(self, entry):
+        style, icon = {
+            JobQueueEntry.Status.SUCCESS: (self.style.SUCCESS, '✅'),
+            JobQueueEntry.Status.SKIPPED: (self.style.WARNING, '⏭️'),
+        }.get(entry.status, (self.style.ERROR, '❌'))
+        self.stdout.write(style(f"{icon} #{entry.pk} {entry.script_name} {entry.status.lower()}."))
+
+    def handle(self, *args, **options):
+        scheduler = Scheduler()
+        # Jobs run on threads of this process, so imports and settings stay warm between runs.
+        worker = None if options['no_worker'] else jobs.Worker()
+        if worker:
+            interrupted = jobs.recover_interrupted()
+            if interrupted:
+                self.stdout.write(self.style.WARNING(f"⚠️ Marked {interrupted} jobs interrupted by the last worker as failed."))
+        self.stdout.write(f"🕒 Scheduler started ({', '.join(scheduler.schedule)}, then {scheduler.merge_schedule['script']}).")
+
+        next_tick = 0
+        while True:
+            if time.monotonic() >= next_tick:
+                close_old_connections()
+                for script_name, event in scheduler.tick():
+                    self.stdout.write(f"[{local_now():%H:%M}] {script_name}: {event}")
+                next_tick = time.monotonic() + options['tick']
+            if worker:
+                worker.fill(on_start=self.on_start, on_finish=self.on_finish)
+                worker.wait(min(1.0, options['tick']))
+            else:
+                time.sleep(max(0.0, next_tick - time.monotonic()))
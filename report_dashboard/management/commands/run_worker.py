@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from report_dashboard import jobs
+from report_dashboard.models import JobQueueEntry
+
+
+class Command(BaseCommand):
+    help = 'Runs queued dashboard jobs in this process, in priority order, with bounded concurrency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None, help='Jobs to run at once (default: JOB_WORKER_CONCURRENCY).')
+        parser.add_argument('--poll', type=float, default=1.0, metavar='SECONDS', help='How often to look for new jobs.')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty and nothing is running.')
+
+    def on_start(self, entry):
+        self.stdout.write(f"▶️ #{entry.pk} {entry.script_name} {' '.join(entry.args)} ({entry.lane})")
+
+    def on_finish(self, entry):
+        if entry.status == JobQueueEntry.Status.SUCCESS:
+            self.stdout.write(self.style.SUCCESS(f"✅ #{entry.pk} {entry.script_name} finished."))
+        elif entry.status == JobQueueEntry.Status.SKIPPED:
+            self.stdout.write(self.style.WARNING(f"⏭️ #{entry.pk} {entry.script_name} skipped; it is running elsewhere."))
+        else:
+            self.stdout.write(self.style.ERROR(f"❌ #{entry.pk} {entry.script_name} failed; see its output in the admin."))
+
+    def handle(self, *args, **options):
+        interrupted = jobs.recover_interrupted()
+        if interrupted:
+            self.stdout.write(self.style.WARNING(f"⚠️ Marked {interrupted} jobs interrupted by the last worker as failed."))
+
+        worker = jobs.Worker(options['concurrency'])
+        self.stdout.write(f"🚀 Worker started with {worker.concurrency} slots.")
+        while True:
+            worker.fill(on_start=self.on_start, on_finish=self.on_finish)
+            if options['once'] and not worker.running:
+                break
+            worker.wait(options['poll'])
+        self.stdout.write(self.style.SUCCESS("✅ Queue is empty."))
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:32
+
+from django.db import migrations, models
+from django.db.models import Max
+
+SOURCE_TABLES = {
+    'nrldc_project': [('nrldc_app', 'Nrldc2AData'), ('nrldc_app', 'Nrldc2CData')],
+    'srldc_project': [('srldc_app', 'Srldc2AData'), ('srldc_app', 'Srldc2CData')],
+    'wrldc_project': [('wrldc_app', 'Wrldc2AData'), ('wrldc_app', 'Wrldc2CData')],
+    'posoco': [('posoco', 'PosocoTableA'), ('posoco', 'PosocoTableG')],
+}
+
+
+def seed_data_available_date(apps, schema_editor):
+    """Starts each source job at the latest report date already in its tables."""
+    AutomationJob = apps.get_model('report_dashboard', 'AutomationJob')
+    for script_name, tables in SOURCE_TABLES.items():
+        dates = [
+            apps.get_model(app_label, model_name).objects.aggregate(latest=Max('report_date'))['latest']
+            for app_label, model_name in tables
+        ]
+        dates = [day for day in dates if day]
+        if dates:
+            AutomationJob.objects.filter(script_name=script_name).update(data_available_date=max(dates))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_dashboard', '0001_initial'),
+        ('nrldc_app', '0005_rename_demand_met_at_max_requirement_nrldc2cdata_demand_met_max_req_and_more'),
+        ('srldc_app', '0003_remove_srldc2adata_total'),
+        ('wrldc_app', '0005_rename_requirement_at_max_demand_wrldc2cdata_req_max_demand_and_more'),
+        ('posoco', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='automationjob',
+            name='is_data_available_today',
+        ),
+        migrations.AddField(
+            model_name='automationjob',
+            name='data_available_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(seed_data_available_date, migrations.RunPython.noop),
+    ]
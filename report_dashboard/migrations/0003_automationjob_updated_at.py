@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:41
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_dashboard', '0002_data_available_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='automationjob',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
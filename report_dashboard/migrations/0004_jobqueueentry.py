@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_dashboard', '0003_automationjob_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobQueueEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('script_name', models.CharField(max_length=100)),
+                ('args', models.JSONField(blank=True, default=list)),
+                ('lane', models.CharField(choices=[('manual', 'Manual'), ('scheduled', 'Scheduled'), ('backfill', 'Backfill')], default='manual', max_length=20)),
+                ('priority', models.SmallIntegerField(default=0)),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('SUCCESS', 'Success'), ('FAILED', 'Failed')], default='QUEUED', max_length=20)),
+                ('output', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Job queue entries',
+                'indexes': [models.Index(fields=['status', 'priority', 'created_at'], name='report_dash_status_4e1756_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_dashboard', '0004_jobqueueentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('script_name', models.CharField(max_length=100)),
+                ('source', models.CharField(blank=True, max_length=20)),
+                ('report_date', models.DateField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('SUCCESS', 'Success'), ('FAILED', 'Failed'), ('NO_REPORT', 'No report')], max_length=20)),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField()),
+                ('duration_seconds', models.FloatField()),
+                ('download_seconds', models.FloatField(blank=True, null=True)),
+                ('extract_seconds', models.FloatField(blank=True, null=True, verbose_name='Tabula seconds')),
+                ('clean_seconds', models.FloatField(blank=True, null=True, verbose_name='Cleanup seconds')),
+                ('persist_seconds', models.FloatField(blank=True, null=True, verbose_name='DB write seconds')),
+                ('json_seconds', models.FloatField(blank=True, null=True, verbose_name='JSON write seconds')),
+                ('push_seconds', models.FloatField(blank=True, null=True)),
+                ('bytes_downloaded', models.BigIntegerField(blank=True, null=True)),
+                ('tables_found', models.IntegerField(blank=True, null=True)),
+                ('rows_upserted', models.IntegerField(blank=True, null=True)),
+                ('resumed', models.BooleanField(default=False)),
+                ('error', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['script_name', 'started_at'], name='report_dash_script__b4acf0_idx'), models.Index(fields=['duration_seconds'], name='report_dash_duratio_cb560e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_dashboard', '0005_jobrun'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='automationjob',
+            name='status',
+            field=models.CharField(choices=[('IDLE', 'Idle'), ('RUNNING', 'Running'), ('SUCCESS', 'Success'), ('FAILED', 'Failed'), ('SKIPPED', 'Skipped')], default='IDLE', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='jobqueueentry',
+            name='status',
+            field=models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('SUCCESS', 'Success'), ('FAILED', 'Failed'), ('SKIPPED', 'Skipped')], default='QUEUED', max_length=20),
+        ),
+    ]
@@ -1,4 +1,14 @@
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+# The dashboard job that ingests each source.
+SOURCE_SCRIPTS = {
+    'NRLDC': 'nrldc_project',
+    'SRLDC': 'srldc_project',
+    'WRLDC': 'wrldc_project',
+    'POSOCO': 'posoco',
+}
 
 class AutomationJob(models.Model):
     class Status(models.TextChoices):
@@ -6,16 +16,130 @@ class AutomationJob(models.Model):
         RUNNING = 'RUNNING', 'Running'
         SUCCESS = 'SUCCESS', 'Success'
         FAILED = 'FAILED', 'Failed'
+        # The last run found its command already running on another node or process.
+        SKIPPED = 'SKIPPED', 'Skipped'
 
     script_name = models.CharField(max_length=100, primary_key=True)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.IDLE)
     last_run_time = models.DateTimeField(null=True, blank=True)
     last_success_time = models.DateTimeField(null=True, blank=True)
-    is_data_available_today = models.BooleanField(default=False)
+    # Latest date the job has produced data for; written by the ingest and merge commands.
+    data_available_date = models.DateField(null=True, blank=True)
     log_message = models.TextField(blank=True, null=True)
+    # Bumped on every save and by mark_data_available; the status stream watches it for changes.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.script_name
 
+    @property
+    def is_data_available_today(self):
+        return self.data_available_date == timezone.now().date()
+
+    @classmethod
+    def mark_data_available(cls, script_name, report_date):
+        """Records that script_name has data for report_date (never moves the date backwards)."""
+        return cls.objects.filter(script_name=script_name).filter(
+            Q(data_available_date__isnull=True) | Q(data_available_date__lt=report_date)
+        ).update(data_available_date=report_date, updated_at=timezone.now())
+
+    class Meta:
+        ordering = ['script_name']
+
+class JobQueueEntry(models.Model):
+    """One requested run of a management command, executed by run_worker."""
+
+    class Lane(models.TextChoices):
+        MANUAL = 'manual', 'Manual'
+        SCHEDULED = 'scheduled', 'Scheduled'
+        BACKFILL = 'backfill', 'Backfill'
+
+    class Status(models.TextChoices):
+        QUEUED = 'QUEUED', 'Queued'
+        RUNNING = 'RUNNING', 'Running'
+        SUCCESS = 'SUCCESS', 'Success'
+        FAILED = 'FAILED', 'Failed'
+        SKIPPED = 'SKIPPED', 'Skipped'
+
+    script_name = models.CharField(max_length=100)
+    args = models.JSONField(default=list, blank=True)
+    lane = models.CharField(max_length=20, choices=Lane.choices, default=Lane.MANUAL)
+    # Claim order; lower runs first. Taken from JOB_LANES when the entry is queued.
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    output = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.script_name} {' '.join(self.args)} [{self.lane}, {self.status}]"
+
+    @property
+    def log_name(self):
+        """The file in LOG_DIR the run's output is streamed to, readable through the log tail API."""
+        return f"job-{self.pk}-{self.script_name}.log"
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'priority', 'created_at'])]
+        verbose_name_plural = 'Job queue entries'
+
+class JobRun(models.Model):
+    """One run of a job: when it ran, how long each stage took and how much it moved."""
+
+    class Status(models.TextChoices):
+        SUCCESS = 'SUCCESS', 'Success'
+        FAILED = 'FAILED', 'Failed'
+        NO_REPORT = 'NO_REPORT', 'No report'
+
+    # Stage -> column holding its duration; the ingest stages are pipeline.checkpoints.STAGES.
+    STAGE_FIELDS = {
+        'download': 'download_seconds',
+        'extract': 'extract_seconds',
+        'clean': 'clean_seconds',
+        'persist': 'persist_seconds',
+        'json': 'json_seconds',
+        'push': 'push_seconds',
+    }
+
+    script_name = models.CharField(max_length=100)
+    source = models.CharField(max_length=20, blank=True)
+    report_date = models.DateField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+    duration_seconds = models.FloatField()
+    # Stage durations; empty for stages the run did not reach or skipped because it resumed.
+    download_seconds = models.FloatField(null=True, blank=True)
+    extract_seconds = models.FloatField('Tabula seconds', null=True, blank=True)
+    clean_seconds = models.FloatField('Cleanup seconds', null=True, blank=True)
+    persist_seconds = models.FloatField('DB write seconds', null=True, blank=True)
+    json_seconds = models.FloatField('JSON write seconds', null=True, blank=True)
+    push_seconds = models.FloatField(null=True, blank=True)
+    bytes_downloaded = models.BigIntegerField(null=True, blank=True)
+    tables_found = models.IntegerField(null=True, blank=True)
+    rows_upserted = models.IntegerField(null=True, blank=True)
+    resumed = models.BooleanField(default=False)
+    error = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return f"{self.script_name} | {self.started_at:%Y-%m-%d %H:%M} | {self.status} | {self.duration_seconds:.1f}s"
+
+    @classmethod
+    def record(cls, script_name, started_at, status, **fields):
+        """Saves a finished run. History is best effort: a failure here must not fail the job it describes."""
+        finished_at = timezone.now()
+        try:
+            return cls.objects.create(
+                script_name=script_name, status=status, started_at=started_at, finished_at=finished_at,
+                duration_seconds=(finished_at - started_at).total_seconds(), **fields,
+            )
+        except Exception as e:
+            print(f"⚠️ Could not record the run of {script_name}: {e}")
+            return None
+
     class Meta:
-        ordering = ['script_name']
\ No newline at end of file
+        indexes = [
+            models.Index(fields=['script_name', 'started_at']),
+            models.Index(fields=['duration_seconds']),
+        ]
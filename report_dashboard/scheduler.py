@@ -0,0 +1,108 @@
+"""
+Daily schedule for the fetchers and the merge, driven by run_scheduler.
+
+Each tick looks at the clock and at AutomationJob.data_available_date (written by the ingest and
+merge commands) and queues what is due on the 'scheduled' lane of the job queue:
+- a fetcher inside its window whose data for today is not in yet, as often as the source's
+  publication history suggests (pipeline.publication), or every retry_minutes without history;
+- merge_reports once all fetchers have today's data, or at the merge deadline regardless;
+- find_gaps once a day from GAP_SCHEDULE['at'], which queues backfills for missed days;
+- drain_push_outbox while the push outbox has due entries, which delivers what merge_reports queued.
+"""
+import datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.utils import timezone
+
+from merger import outbox
+from pipeline import publication
+
+from . import jobs
+from .models import SOURCE_SCRIPTS, AutomationJob, JobQueueEntry
+
+SCRIPT_SOURCES = {script_name: source for source, script_name in SOURCE_SCRIPTS.items()}
+
+
+def _time(value):
+    return datetime.time.fromisoformat(value)
+
+
+def local_now():
+    return timezone.now().astimezone(ZoneInfo(settings.SCHEDULER_TIME_ZONE))
+
+
+class Scheduler:
+    def __init__(self, schedule=None, merge_schedule=None, gap_schedule=None, outbox_schedule=None):
+        self.schedule = schedule or settings.SCHEDULE
+        self.merge_schedule = merge_schedule or settings.MERGE_SCHEDULE
+        self.gap_schedule = gap_schedule or settings.GAP_SCHEDULE
+        self.outbox_schedule = outbox_schedule or settings.OUTBOX_SCHEDULE
+        # script_name -> local datetime it was last queued; kept in memory, so a restart retries at once.
+        self.last_queued = {}
+        self.missed = set()
+
+    def available_dates(self):
+        scripts = list(self.schedule) + [self.merge_schedule['script']]
+        return dict(AutomationJob.objects.filter(script_name__in=scripts).values_list('script_name', 'data_available_date'))
+
+    def due(self, script_name, now, retry_minutes):
+        last = self.last_queued.get(script_name)
+        return last is None or last.date() != now.date() or now - last >= datetime.timedelta(minutes=retry_minutes)
+
+    def queue(self, script_name, now, args=()):
+        entry, created = jobs.enqueue(script_name, args, JobQueueEntry.Lane.SCHEDULED)
+        self.last_queued[script_name] = now
+        return entry, created
+
+    def tick(self, now=None):
+        """Queues whatever is due now. Returns [(script_name, what happened)] for the log."""
+        now = now or local_now()
+        today = now.date()
+        available = self.available_dates()
+        events = []
+
+        # --- Fetchers ---
+        for script_name, options in self.schedule.items():
+            if available.get(script_name) == today:
+                continue
+            opens, closes = (_time(value) for value in options['window'])
+            if not opens <= now.time() <= closes:
+                if now.time() > closes and (script_name, today) not in self.missed:
+                    self.missed.add((script_name, today))
+                    events.append((script_name, 'no data by the end of its window'))
+                continue
+            interval = None
+            if script_name in SCRIPT_SOURCES:
+                interval = publication.poll_interval(SCRIPT_SOURCES[script_name], now)
+            if self.due(script_name, now, interval or options.get('retry_minutes', 30)):
+                retry = script_name in self.last_queued and self.last_queued[script_name].date() == today
+                _, created = self.queue(script_name, now)
+                if created:
+                    events.append((script_name, 'queued (retry, not published yet)' if retry else 'queued'))
+
+        # --- Merge ---
+        merge_script = self.merge_schedule['script']
+        if available.get(merge_script) != today:
+            all_in = all(available.get(script_name) == today for script_name in self.schedule)
+            past_deadline = now.time() >= _time(self.merge_schedule['deadline'])
+            if (all_in or past_deadline) and self.due(merge_script, now, self.merge_schedule.get('retry_minutes', 30)):
+                _, created = self.queue(merge_script, now)
+                if created:
+                    events.append((merge_script, 'queued (all sources in)' if all_in else 'queued (deadline passed)'))
+
+        # --- Gap scan ---
+        gap_script = self.gap_schedule['script']
+        last = self.last_queued.get(gap_script)
+        if now.time() >= _time(self.gap_schedule['at']) and (last is None or last.date() != today):
+            _, created = self.queue(gap_script, now, self.gap_schedule.get('args', []))
+            if created:
+                events.append((gap_script, 'queued (daily gap scan)'))
+
+        # --- Push outbox ---
+        outbox_script = self.outbox_schedule['script']
+        if self.due(outbox_script, now, self.outbox_schedule.get('retry_minutes', 1)) and outbox.has_due():
+            _, created = self.queue(outbox_script, now)
+            if created:
+                events.append((outbox_script, 'queued (payloads due)'))
+        return events
@@ -0,0 +1,44 @@
+import asyncio
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from report_dashboard import events
+
+
+async def no_poll():
+    pass
+
+
+class JobStatusEventsTests(SimpleTestCase):
+    def setUp(self):
+        self.broadcaster = events.JobStatusBroadcaster()
+        self.broadcaster.poll = no_poll
+        for patcher in [
+            mock.patch.object(events, 'broadcaster', self.broadcaster),
+            mock.patch.object(events, 'KEEPALIVE_INTERVAL', 0.01),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_stream_frames_the_current_state_then_changes_and_keep_alives(self):
+        async def read():
+            self.broadcaster.latest = '[{"script_name": "posoco"}]'
+            stream = events.job_status_events()
+            frames = [await anext(stream), await anext(stream)]
+            self.broadcaster.publish('[1]')
+            # Only the newest snapshot is kept for a slow reader.
+            self.broadcaster.publish('[2]')
+            frames += [await anext(stream), await anext(stream)]
+            await stream.aclose()
+            return frames
+
+        frames = asyncio.run(read())
+        self.assertEqual(frames, [
+            'retry: 2000\n\n', 'data: [{"script_name": "posoco"}]\n\n', 'data: [2]\n\n', ': keep-alive\n\n',
+        ])
+        self.assertEqual(self.broadcaster.subscribers, set())
+
+    def test_the_stream_is_refused_under_wsgi(self):
+        self.assertEqual(self.client.get(reverse('dashboard_status_stream')).status_code, 204)
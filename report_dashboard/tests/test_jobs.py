@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from pipeline import leases
+from report_dashboard import jobs, logtail
+from report_dashboard.models import AutomationJob, JobQueueEntry
+
+
+@override_settings(JOB_LANES={
+    'manual': {'priority': 0, 'max_running': 2},
+    'scheduled': {'priority': 1, 'max_running': 1},
+    'backfill': {'priority': 2, 'max_running': 1},
+})
+class QueueTests(TestCase):
+    def test_a_second_request_joins_the_queued_run_and_moves_it_forward(self):
+        entry, created = jobs.enqueue('backfill', ['--source', 'NRLDC'], JobQueueEntry.Lane.BACKFILL)
+        self.assertTrue(created)
+        self.assertEqual(jobs.enqueue('backfill', ['--source', 'SRLDC'], JobQueueEntry.Lane.BACKFILL)[1], True)
+
+        joined, created = jobs.enqueue('backfill', ['--source', 'NRLDC'], JobQueueEntry.Lane.MANUAL)
+        self.assertFalse(created)
+        self.assertEqual(joined.pk, entry.pk)
+        entry.refresh_from_db()
+        self.assertEqual((entry.lane, entry.priority), (JobQueueEntry.Lane.MANUAL, 0))
+
+    def test_claims_follow_lane_priority_and_limits(self):
+        jobs.enqueue('find_gaps', [], JobQueueEntry.Lane.BACKFILL)
+        jobs.enqueue('merge_reports', [], JobQueueEntry.Lane.SCHEDULED)
+        jobs.enqueue('posoco', [], JobQueueEntry.Lane.SCHEDULED)
+        jobs.enqueue('nrldc_project', [], JobQueueEntry.Lane.MANUAL)
+
+        claimed = [jobs.claim_next() for _ in range(4)]
+        # The second scheduled job waits: that lane runs one at a time.
+        self.assertEqual([entry and entry.script_name for entry in claimed], ['nrldc_project', 'merge_reports', 'find_gaps', None])
+        self.assertTrue(all(entry.status == JobQueueEntry.Status.RUNNING for entry in claimed[:3]))
+
+        # A script never runs twice at once, even on a free lane.
+        jobs.enqueue('nrldc_project', ['--date', '2025-03-01'], JobQueueEntry.Lane.MANUAL)
+        self.assertIsNone(jobs.claim_next())
+
+
+@mock.patch('report_dashboard.jobs.connections')
+class RunEntryTests(TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir, ignore_errors=True)
+        settings_override = override_settings(LOG_DIR=self.log_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        AutomationJob.objects.create(script_name='nrldc_project')
+
+    def run_claimed(self, script_name, *args):
+        jobs.enqueue(script_name, args)
+        return jobs.run_entry(jobs.claim_next())
+
+    def test_run_whose_lease_is_held_elsewhere_is_skipped(self, connections):
+        lease = leases.acquire('nrldc_project', start_heartbeat=False)
+        with mock.patch('nrldc_app.management.commands.nrldc_project.Command.handle') as handle:
+            entry = self.run_claimed('nrldc_project')
+        lease.release()
+
+        handle.assert_not_called()
+        self.assertEqual(entry.status, JobQueueEntry.Status.SKIPPED)
+        self.assertIn('already running on another node or process', entry.output)
+        job = AutomationJob.objects.get()
+        self.assertEqual(job.status, AutomationJob.Status.SKIPPED)
+        self.assertIsNone(job.last_success_time)
+
+    def test_a_successful_run_and_a_failed_one_update_the_job(self, connections):
+        with mock.patch('nrldc_app.management.commands.nrldc_project.Command.handle', return_value=None):
+            entry = self.run_claimed('nrldc_project')
+        self.assertEqual(entry.status, JobQueueEntry.Status.SUCCESS)
+        job = AutomationJob.objects.get()
+        self.assertEqual((job.status, job.last_success_time), (AutomationJob.Status.SUCCESS, entry.finished_at))
+
+        with mock.patch('nrldc_app.management.commands.nrldc_project.Command.handle', side_effect=RuntimeError('no PDF')):
+            entry = self.run_claimed('nrldc_project')
+        self.assertEqual(entry.status, JobQueueEntry.Status.FAILED)
+        self.assertIn('RuntimeError: no PDF', entry.output)
+        job.refresh_from_db()
+        self.assertEqual(job.status, AutomationJob.Status.FAILED)
+        self.assertLess(job.last_success_time, entry.finished_at)
+
+    def test_output_is_streamed_to_the_runs_log_file(self, connections):
+        seen_while_running = []
+
+        def handle(command, *args, **options):
+            command.stdout.write('from self.stdout')
+            print('from print()')
+            # Importing a fetcher may open its own log in LOG_DIR too.
+            [name] = [name for name in logtail.available_logs() if name.startswith('job-')]
+            seen_while_running.extend(logtail.tail(name)['lines'])
+
+        with mock.patch('nrldc_app.management.commands.nrldc_project.Command.handle', handle):
+            entry = self.run_claimed('nrldc_project')
+
+        self.assertEqual(entry.status, JobQueueEntry.Status.SUCCESS)
+        self.assertEqual(seen_while_running, ['from self.stdout', 'from print()'])
+        self.assertIn(entry.log_name, logtail.available_logs())
+        with open(os.path.join(self.log_dir, entry.log_name), encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'from self.stdout\nfrom print()\n')
+        self.assertEqual(entry.output, 'from self.stdout\nfrom print()\n')
+        self.assertEqual(AutomationJob.objects.get().log_message, entry.output)
+
+
+class DashboardViewTests(TestCase):
+    def test_missing_jobs_are_created_and_listed(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(job.script_name for job in response.context['jobs']),
+            ['merge_reports', 'nrldc_project', 'posoco', 'srldc_project', 'wrldc_project'],
+        )
@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from report_dashboard import logtail
+
+
+class LogTailTests(SimpleTestCase):
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir, ignore_errors=True)
+        settings_override = override_settings(LOG_DIR=self.log_dir, LOG_TAIL_MAX_BYTES=64 * 1024)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def write(self, data, mode='ab', name='nrldc.log'):
+        with open(os.path.join(self.log_dir, name), mode) as f:
+            f.write(data)
+
+    def test_only_log_files_in_log_dir_are_available(self):
+        self.write(b'x\n')
+        self.write(b'x\n', name='notes.txt')
+        self.assertEqual(logtail.available_logs(), ['nrldc.log'])
+        self.assertIsNone(logtail.tail('../nrldc.log'))
+        self.assertIsNone(logtail.tail('notes.txt'))
+
+    def test_reads_from_the_offset_on(self):
+        self.write(b'one\ntwo\n')
+        first = logtail.tail('nrldc.log')
+        self.assertEqual(first['lines'], ['one', 'two'])
+        self.assertEqual(first['offset'], 8)
+
+        self.write(b'three\n')
+        second = logtail.tail('nrldc.log', first['offset'])
+        self.assertEqual(second['lines'], ['three'])
+        self.assertEqual(second['offset'], 14)
+        self.assertFalse(second['reset'])
+
+        self.assertEqual(logtail.tail('nrldc.log', second['offset'])['lines'], [])
+
+    def test_partial_line_is_left_for_the_next_read(self):
+        self.write(b'done\nhalf')
+        first = logtail.tail('nrldc.log', 0)
+        self.assertEqual(first['lines'], ['done'])
+        self.assertEqual(first['offset'], 5)
+
+        self.write(b' written\n')
+        second = logtail.tail('nrldc.log', first['offset'])
+        self.assertEqual(second['lines'], ['half written'])
+
+    def test_rotated_file_starts_again_from_the_tail(self):
+        self.write(b'old line\n' * 10)
+        offset = logtail.tail('nrldc.log')['offset']
+
+        self.write(b'new\n', mode='wb')
+        result = logtail.tail('nrldc.log', offset)
+        self.assertTrue(result['reset'])
+        self.assertEqual(result['lines'], ['new'])
+        self.assertEqual(result['offset'], 4)
+
+    def test_first_load_of_a_large_file_starts_at_a_line_boundary(self):
+        self.write(b''.join(b'line %03d\n' % i for i in range(100)))
+        result = logtail.tail('nrldc.log', max_bytes=25)
+        # The last 25 bytes start inside 'line 097'; only whole lines are returned.
+        self.assertEqual(result['lines'], ['line 098', 'line 099'])
+        self.assertEqual(result['offset'], result['size'])
+        self.assertFalse(result['more'])
+
+    def test_client_behind_is_told_to_read_again(self):
+        self.write(b''.join(b'line %03d\n' % i for i in range(10)))
+        result = logtail.tail('nrldc.log', 0, max_bytes=20)
+        self.assertEqual(result['lines'], ['line 000', 'line 001'])
+        self.assertTrue(result['more'])
+
+        lines = result['lines']
+        while result['more']:
+            result = logtail.tail('nrldc.log', result['offset'], max_bytes=20)
+            lines += result['lines']
+        self.assertEqual(lines, ['line %03d' % i for i in range(10)])
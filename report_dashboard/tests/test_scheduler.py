@@ -0,0 +1,89 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.test import TestCase
+
+from merger import outbox
+from report_dashboard.models import AutomationJob, JobQueueEntry
+from report_dashboard.scheduler import Scheduler
+
+TZ = ZoneInfo(settings.SCHEDULER_TIME_ZONE)
+
+
+SCHEDULE = {
+    'nrldc_project': {'window': ('08:00', '20:00'), 'retry_minutes': 30},
+    'posoco': {'window': ('08:00', '20:00'), 'retry_minutes': 30},
+}
+MERGE_SCHEDULE = {'script': 'merge_reports', 'deadline': '20:30', 'retry_minutes': 30}
+GAP_SCHEDULE = {'script': 'find_gaps', 'at': '21:00', 'args': ['--queue']}
+
+
+class SchedulerTests(TestCase):
+    def setUp(self):
+        for script_name in ['nrldc_project', 'posoco', 'merge_reports']:
+            AutomationJob.objects.create(script_name=script_name)
+        self.scheduler = Scheduler(SCHEDULE, MERGE_SCHEDULE, GAP_SCHEDULE)
+
+    def at(self, hour, minute=0):
+        return datetime.datetime(2025, 3, 8, hour, minute, tzinfo=TZ)
+
+    def tick(self, hour, minute=0):
+        return self.scheduler.tick(self.at(hour, minute))
+
+    def finish(self, *script_names):
+        JobQueueEntry.objects.filter(script_name__in=script_names).update(status=JobQueueEntry.Status.SUCCESS)
+
+    def test_fetchers_are_polled_inside_their_window_until_their_data_is_in(self):
+        self.assertEqual(self.tick(7), [])
+        self.assertEqual(self.tick(8), [('nrldc_project', 'queued'), ('posoco', 'queued')])
+        self.finish('nrldc_project', 'posoco')
+        self.assertEqual(self.tick(8, 10), [])
+        self.assertEqual(self.tick(8, 30), [
+            ('nrldc_project', 'queued (retry, not published yet)'), ('posoco', 'queued (retry, not published yet)'),
+        ])
+        self.finish('nrldc_project', 'posoco')
+
+        AutomationJob.mark_data_available('posoco', datetime.date(2025, 3, 8))
+        self.assertEqual(self.tick(9), [('nrldc_project', 'queued (retry, not published yet)')])
+        self.assertEqual(self.tick(20, 1), [('nrldc_project', 'no data by the end of its window')])
+        self.assertEqual(self.tick(20, 2), [])
+
+    def test_merge_waits_for_every_fetcher_or_the_deadline(self):
+        AutomationJob.mark_data_available('nrldc_project', datetime.date(2025, 3, 8))
+        self.tick(8)
+        self.finish('posoco')
+        self.assertNotIn('merge_reports', [script_name for script_name, _ in self.tick(9)])
+
+        AutomationJob.mark_data_available('posoco', datetime.date(2025, 3, 8))
+        self.assertEqual(self.tick(10), [('merge_reports', 'queued (all sources in)')])
+        AutomationJob.mark_data_available('merge_reports', datetime.date(2025, 3, 8))
+        self.finish('merge_reports')
+        self.assertEqual(self.tick(10, 30), [])
+
+        # A day whose sources never all arrive is merged at the deadline.
+        self.finish('nrldc_project', 'posoco')
+        self.assertIn(('merge_reports', 'queued (deadline passed)'), self.scheduler.tick(self.at(20, 30) + datetime.timedelta(days=1)))
+
+    def test_gap_scan_is_queued_once_a_day(self):
+        AutomationJob.mark_data_available('merge_reports', datetime.date(2025, 3, 8))
+        for script_name in SCHEDULE:
+            AutomationJob.mark_data_available(script_name, datetime.date(2025, 3, 8))
+        self.assertEqual(self.tick(20, 59), [])
+        self.assertEqual(self.tick(21), [('find_gaps', 'queued (daily gap scan)')])
+        self.finish('find_gaps')
+        self.assertEqual(self.tick(22), [])
+        self.assertEqual(JobQueueEntry.objects.get(script_name='find_gaps').args, ['--queue'])
+
+    def test_outbox_drain_is_queued_only_while_payloads_are_due(self):
+        scheduler = Scheduler(gap_schedule={'script': 'find_gaps', 'at': '23:59'})
+        self.assertEqual(scheduler.tick(self.at(6)), [])
+
+        outbox.enqueue('grid_api', datetime.date(2025, 3, 7), {'NRLDC': {}})
+        self.assertEqual(scheduler.tick(self.at(6)), [('drain_push_outbox', 'queued (payloads due)')])
+        entry = JobQueueEntry.objects.get(script_name='drain_push_outbox')
+        self.assertEqual(entry.lane, JobQueueEntry.Lane.SCHEDULED)
+
+        # Still queued, so the next tick joins it instead of adding another.
+        self.assertEqual(scheduler.tick(self.at(6, 5)), [])
+        self.assertEqual(JobQueueEntry.objects.filter(script_name='drain_push_outbox').count(), 1)
@@ -0,0 +1,30 @@
+import datetime
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from report_dashboard.models import AutomationJob
+
+
+class DataAvailabilityTests(TestCase):
+    def setUp(self):
+        AutomationJob.objects.create(script_name='nrldc_project')
+        AutomationJob.objects.create(script_name='posoco')
+
+    def test_the_available_date_never_moves_backwards(self):
+        today = timezone.now().date()
+        AutomationJob.mark_data_available('nrldc_project', today)
+        AutomationJob.mark_data_available('nrldc_project', today - datetime.timedelta(days=3))
+        self.assertEqual(AutomationJob.objects.get(script_name='nrldc_project').data_available_date, today)
+
+    def test_status_api_reads_availability_in_one_query(self):
+        AutomationJob.mark_data_available('nrldc_project', timezone.now().date())
+        AutomationJob.mark_data_available('posoco', timezone.now().date() - datetime.timedelta(days=1))
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('dashboard_status_api'))
+        self.assertEqual(
+            {job['script_name']: job['is_data_available_today'] for job in response.json()},
+            {'nrldc_project': True, 'posoco': False},
+        )
@@ -5,4 +5,10 @@ urlpatterns = [
     path('', views.dashboard_view, name='dashboard'),
     path('run/<str:script_name>/', views.run_script_view, name='run_script'),
     path('api/status/', views.dashboard_status_api, name='dashboard_status_api'),
+    path('api/status/stream/', views.dashboard_status_stream, name='dashboard_status_stream'),
+    path('api/analytics/', views.analytics_api, name='analytics_api'),
+    path('history/', views.run_history_view, name='run_history'),
+    path('coverage/', views.coverage_view, name='coverage'),
+    path('api/logs/', views.log_tail_api, name='log_list_api'),
+    path('api/logs/<str:name>/', views.log_tail_api, name='log_tail_api'),
 ]
\ No newline at end of file
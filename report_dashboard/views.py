@@ -1,23 +1,24 @@
+import datetime
+
+from django.conf import settings
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Avg, Count, Sum
+from django.db.models.functions import TruncWeek
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
-from .models import AutomationJob
-import subprocess
-import sys
-import os
+from . import jobs, logtail
+from .models import AutomationJob, JobQueueEntry, JobRun
+from .events import STATUS_FIELDS, job_status_events, serialize_jobs
 
-# Import your data models
-from nrldc_app.models import Nrldc2AData, Nrldc2CData
-from srldc_app.models import Srldc2AData, Srldc2CData 
-from wrldc_app.models import Wrldc2AData, Wrldc2CData
-from posoco.models import PosocoTableA, PosocoTableG
+from pipeline import analytics, coverage
 
 
 def dashboard_view(request):
     """
     Displays the main dashboard page. (No changes needed)
     """
-    jobs = AutomationJob.objects.all()
+    automation_jobs = AutomationJob.objects.all()
 
     script_names = [
         'nrldc_project',    # This must match nrldc_project.py
@@ -26,45 +27,39 @@ def dashboard_view(request):
         'posoco',           # This must match posoco.py
         'merge_reports'     # This must match merge_reports.py
     ]
-    if jobs.count() < len(script_names):
-        existing_scripts = list(jobs.values_list('script_name', flat=True))
+    if automation_jobs.count() < len(script_names):
+        existing_scripts = list(automation_jobs.values_list('script_name', flat=True))
         for name in script_names:
             if name not in existing_scripts:
                 AutomationJob.objects.create(script_name=name)
-        jobs = AutomationJob.objects.all()
+        automation_jobs = AutomationJob.objects.all()
 
     context = {
-        'jobs': jobs
+        'jobs': automation_jobs
     }
     return render(request, 'report_dashboard/dashboard.html', context)
 
-# --- THIS FUNCTION HAS BEEN UPDATED ---
 def run_script_view(request, script_name):
     """
-    Triggers a management command via an AJAX request and returns a JSON response.
+    Queues a management command for the run_worker process and returns a JSON response.
+    Clicking again while the same run is queued or running joins that run.
     """
     if request.method == 'POST':
         try:
-            job = AutomationJob.objects.get(script_name=script_name)
-            job.status = AutomationJob.Status.RUNNING
-            job.last_run_time = timezone.now()
-            job.log_message = "Execution started manually..."
-            job.save()
-
-            python_executable = sys.executable
-            manage_py_path = 'manage.py'
-            
-            run_date = request.POST.get('run_date')
-            
-            command = [python_executable, manage_py_path, script_name]
-            if run_date:
-                command.extend(['--date', run_date])
-                
-            # Use Popen to run the script in the background without waiting
-            subprocess.Popen(command)
+            AutomationJob.objects.get(script_name=script_name)
 
-            # CHANGED: Return a JSON response to confirm the script has started
-            return JsonResponse({'status': 'success', 'message': f'Script {script_name} started.'})
+            run_date = request.POST.get('run_date')
+            args = ['--date', run_date] if run_date else []
+            entry, created = jobs.enqueue(script_name, args, JobQueueEntry.Lane.MANUAL)
+
+            if created:
+                AutomationJob.objects.filter(script_name=script_name).update(
+                    log_message="Queued manually...", updated_at=timezone.now(),
+                )
+                message = f'Script {script_name} queued.'
+            else:
+                message = f'Script {script_name} is already {entry.status.lower()}; joined that run.'
+            return JsonResponse({'status': 'success', 'message': message, 'job_id': entry.pk})
 
         except AutomationJob.DoesNotExist:
             return JsonResponse({'status': 'error', 'message': 'Job not found.'}, status=404)
@@ -77,53 +72,142 @@ def run_script_view(request, script_name):
 
 def dashboard_status_api(request):
     """
-    API endpoint to provide job statuses. (No changes needed)
+    API endpoint to provide job statuses. Data availability is recorded by the ingest and merge
+    commands (AutomationJob.data_available_date), so a poll is a single read of the job table.
     """
-    today = timezone.now().date()
-    jobs = AutomationJob.objects.all()
-
-    for job in jobs:
-        data_exists = False
-        if job.script_name == 'nrldc_project':
-            data_exists = (Nrldc2AData.objects.filter(report_date=today).exists() or 
-                           Nrldc2CData.objects.filter(report_date=today).exists())
-        
-        elif job.script_name == 'srldc_project':
-            data_exists = (Srldc2AData.objects.filter(report_date=today).exists() or 
-                           Srldc2CData.objects.filter(report_date=today).exists())
-
-        elif job.script_name == 'wrldc_project':
-            data_exists = (Wrldc2AData.objects.filter(report_date=today).exists() or 
-                           Wrldc2CData.objects.filter(report_date=today).exists())
-
-        elif job.script_name == 'posoco':
-            data_exists = (PosocoTableA.objects.filter(report_date=today).exists() or 
-                           PosocoTableG.objects.filter(report_date=today).exists())
-
-        elif job.script_name == 'merge_reports':
-            directory_path = "downloads/overall_json/"
-            file_prefix = f"merged_reports_{today.strftime('%Y-%m-%d')}"
-            
-            if os.path.exists(directory_path):
-                for filename in os.listdir(directory_path):
-                    if filename.startswith(file_prefix):
-                        data_exists = True
-                        break
-        
-        if job.is_data_available_today != data_exists:
-            job.is_data_available_today = data_exists
-            job.save()
-    
-    job_values = jobs.values(
-        'script_name', 'status', 'last_run_time', 'last_success_time', 
-        'is_data_available_today', 'log_message'
+    rows = AutomationJob.objects.values(*STATUS_FIELDS)
+    return JsonResponse(serialize_jobs(rows, timezone.now().date()), safe=False)
+
+
+async def dashboard_status_stream(request):
+    """
+    Server-sent events version of dashboard_status_api: the job list is pushed whenever a job
+    changes. Needs the ASGI server (report_automation_project.asgi); the page polls otherwise.
+    """
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI the stream would hold a worker thread forever; 204 tells EventSource to stop.
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(job_status_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def analytics_api(request):
+    """
+    Aggregates over the analytics store, e.g.
+    ?table=nrldc_table_2C&metric=max_demand&how=max  -> per-state monthly maximum
+    ?view=generation_mix&from=2025-09-01&to=2025-09-30 -> regional generation mix
+    """
+    start = request.GET.get('from') or None
+    end = request.GET.get('to') or None
+    try:
+        if request.GET.get('view') == 'generation_mix':
+            return JsonResponse(analytics.generation_mix(start, end))
+
+        table = analytics.load_table(request.GET.get('table', ''))
+        metric = request.GET.get('metric', '')
+        if table is None:
+            return JsonResponse({'status': 'error', 'message': 'Unknown table, or the analytics store has not been built yet.'}, status=404)
+        if table.manifest['columns'].get(metric, {}).get('kind') != 'float':
+            return JsonResponse({'status': 'error', 'message': f"'{metric}' is not a numeric column of this table."}, status=400)
+        return JsonResponse(analytics.monthly(request.GET['table'], metric, request.GET.get('how', 'max'), start, end))
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+
+def log_tail_api(request, name=None):
+    """
+    Without a name, lists the log files that can be tailed. With one, returns the lines written
+    after ?offset=<bytes> (the offset from the previous response); omit it to get the end of the file.
+    """
+    if name is None:
+        return JsonResponse({'logs': logtail.available_logs()})
+    try:
+        offset = int(request.GET['offset']) if request.GET.get('offset') else None
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'offset must be a number of bytes.'}, status=400)
+    if offset is not None and offset < 0:
+        return JsonResponse({'status': 'error', 'message': 'offset must not be negative.'}, status=400)
+    result = logtail.tail(name, offset)
+    if result is None:
+        return JsonResponse({'status': 'error', 'message': 'Unknown log file.'}, status=404)
+    return JsonResponse(result)
+
+
+# Stage columns in pipeline order, with the label and bar colour the history page shows.
+HISTORY_STAGES = [
+    ('download_seconds', 'Download', '#38bdf8'),
+    ('extract_seconds', 'Tabula', '#818cf8'),
+    ('clean_seconds', 'Cleanup', '#a78bfa'),
+    ('persist_seconds', 'DB write', '#f59e0b'),
+    ('json_seconds', 'JSON write', '#34d399'),
+    ('push_seconds', 'Push', '#f472b6'),
+]
+
+
+def run_history_view(request):
+    """
+    Weekly trends of run time per job and stage, and the slowest runs, over the last ?days=90.
+    All of it comes from two aggregate queries on JobRun.
+    """
+    try:
+        days = max(1, int(request.GET.get('days', 90)))
+    except ValueError:
+        days = 90
+    since = timezone.now() - datetime.timedelta(days=days)
+    runs = JobRun.objects.filter(started_at__gte=since)
+
+    weekly = (
+        runs.filter(status=JobRun.Status.SUCCESS)
+        .annotate(week=TruncWeek('started_at')).values('script_name', 'week')
+        .annotate(
+            runs=Count('id'), duration=Avg('duration_seconds'), bytes=Sum('bytes_downloaded'),
+            tables=Avg('tables_found'), rows=Avg('rows_upserted'),
+            **{field: Avg(field) for field, _, _ in HISTORY_STAGES},
+        )
+        .order_by('script_name', '-week')
     )
-    
-    job_list = list(job_values)
-    for job_data in job_list:
-        if job_data['last_run_time']:
-            job_data['last_run_time'] = job_data['last_run_time'].strftime('%b %d, %Y, %I:%M %p')
-        if job_data['last_success_time']:
-            job_data['last_success_time'] = job_data['last_success_time'].strftime('%b %d, %Y, %I:%M %p')
-
-    return JsonResponse(job_list, safe=False)
\ No newline at end of file
+    trends = {}
+    for row in weekly:
+        # Each stage's share of the week's average run, for the stacked bar.
+        total = sum(row[field] or 0 for field, _, _ in HISTORY_STAGES) or 1
+        row['stages'] = [
+            {'label': label, 'color': color, 'seconds': row[field], 'percent': round(100 * (row[field] or 0) / total, 1)}
+            for field, label, color in HISTORY_STAGES
+        ]
+        trends.setdefault(row['script_name'], []).append(row)
+
+    slowest = list(runs.order_by('-duration_seconds')[:20])
+    for run in slowest:
+        run.stage_seconds = [getattr(run, field) for field, _, _ in HISTORY_STAGES]
+
+    context = {
+        'days': days,
+        'stages': HISTORY_STAGES,
+        'trends': trends,
+        'slowest': slowest,
+    }
+    return render(request, 'report_dashboard/history.html', context)
+
+
+def coverage_view(request):
+    """
+    Calendar heatmap of the dates each report table has rows for, over ?from=..&to=.. (default:
+    the last year, at most COVERAGE_MAX_DAYS). Served from pipeline.coverage's cached per-table date counts; the page draws
+    the cells from the embedded JSON rather than rendering thousands of template nodes.
+    """
+    today = timezone.now().date()
+    try:
+        end = datetime.date.fromisoformat(request.GET['to']) if request.GET.get('to') else today
+        start = (datetime.date.fromisoformat(request.GET['from']) if request.GET.get('from')
+                 else end - datetime.timedelta(days=364))
+    except (ValueError, OverflowError):
+        return HttpResponse('from and to must be dates (YYYY-MM-DD).', status=400)
+    if start > end:
+        start, end = end, start
+    if (end - start).days >= settings.COVERAGE_MAX_DAYS:
+        return HttpResponse(f'Pick a range of at most {settings.COVERAGE_MAX_DAYS} days.', status=400)
+    data = coverage.calendar(start, end)
+    context = {'from': start, 'to': end, 'days': data['days'], 'tables': data['tables'], 'coverage': data}
+    return render(request, 'report_dashboard/coverage.html', context)
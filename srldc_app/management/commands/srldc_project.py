@@ -5,12 +5,32 @@ from tabula.io import read_pdf
 import pandas as pd
 import json
 import logging
-from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.core.management.base import CommandError
 from srldc_app.models import Srldc2AData, Srldc2CData
+from pipeline.checkpoints import ReportRun, ReportStages
+from pipeline.leases import LeasedCommand
+from pipeline.tables import upsert_rows
+from pipeline import publication
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-class Command(BaseCommand):
+SRLDC_BASE_URL = settings.UPSTREAM_URLS['SRLDC']
+
+
+def srldc_pdf_url(pdf_date, base_url=SRLDC_BASE_URL):
+    """Returns the PSP report URL for pdf_date, e.g. .../2025/Sep25/01-09-2025-psp.pdf"""
+    year = pdf_date.year
+    month_abbr = pdf_date.strftime('%b').capitalize()
+    return f"{base_url}{year}/{month_abbr}{str(year)[-2:]}/{pdf_date.day:02d}-{pdf_date.month:02d}-{year}-psp.pdf"
+
+
+def srldc_pdf_name(pdf_date):
+    """Local file name used for the report of pdf_date, e.g. daily010925.pdf"""
+    return f"daily{pdf_date.day:02d}{pdf_date.month:02d}{str(pdf_date.year)[-2:]}.pdf"
+
+
+class Command(LeasedCommand):
     def write(self, message, level='info'):
         self.stdout.write(message)
         if level == 'info':
@@ -21,9 +41,9 @@ class Command(BaseCommand):
             self.logger.error(message)
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'logs')
-        os.makedirs(log_dir, exist_ok=True)
-        log_file = os.path.join(log_dir, 'srldc.log')
+        # Written to LOG_DIR so the dashboard's log panel can tail it.
+        os.makedirs(settings.LOG_DIR, exist_ok=True)
+        log_file = os.path.join(settings.LOG_DIR, 'srldc.log')
         self.logger = logging.getLogger('srldc_logger')
         self.logger.setLevel(logging.INFO)
         if not self.logger.hasHandlers():
@@ -196,7 +216,8 @@ class Command(BaseCommand):
         return s_val
 
 
-    def extract_tables_from_pdf(self, pdf_path, output_dir, report_date):
+    def read_tables(self, pdf_path):
+        """Extract stage: reads every table in the PDF with tabula."""
         self.logger.info("🔍 Extracting tables from PDF...")
 
 
@@ -218,13 +239,16 @@ class Command(BaseCommand):
 
         self.write(self.style.SUCCESS(f"✅ Found {len(tables)} tables."))
         self.logger.info(f"✅ Found {len(tables)} tables.")
+        return tables
 
 
+    def clean_tables(self, tables):
+        """Clean stage: cuts tables 2(A) and 2(C) out of the raw tables, renames columns and filters states."""
         all_content_df = pd.concat(tables, ignore_index=True)
         all_content_df_cleaned = all_content_df.dropna(axis=0, how='all')
 
 
-        combined_json_data = {}
+        frames = {}
 
 
         # --- Extract Table 2(A) ---
@@ -287,44 +311,8 @@ class Command(BaseCommand):
             model_fields_2A = list(column_mapping_2A.values())
             sub_2A_final = sub_2A_filtered[[col for col in model_fields_2A if col in sub_2A_filtered.columns]]
             sub_2A_final = sub_2A_final.dropna(subset=['state']).copy()
-            combined_json_data['srldc_table_2A'] = sub_2A_final.to_dict(orient='records')
+            frames['srldc_table_2A'] = sub_2A_final
             self.write(self.style.SUCCESS(f"✅ Table 2(A) extracted for combined JSON."))
-
-
-            for index, row_data in sub_2A_final.iterrows():
-                state_name = self._safe_string(row_data.get('state'))
-                if state_name:
-                    try:
-                        obj, created = Srldc2AData.objects.update_or_create(
-                            report_date=report_date,
-                            state=state_name,
-                            defaults={
-                                'thermal': self._safe_float(row_data.get('thermal')),
-                                'hydro': self._safe_float(row_data.get('hydro')),
-                                'gas_naptha_diesel': self._safe_float(row_data.get('gas_naptha_diesel')),
-                                'solar': self._safe_float(row_data.get('solar')),
-                                'wind': self._safe_float(row_data.get('wind')),
-                                'others': self._safe_float(row_data.get('others')),
-                                # 'total': self._safe_float(row_data.get('total')),
-                                'net_sch': self._safe_float(row_data.get('net_sch')),
-                                'drawal': self._safe_float(row_data.get('drawal')),
-                                'ui': self._safe_float(row_data.get('ui')),
-                                'availability': self._safe_float(row_data.get('availability')),
-                                'demand_met': self._safe_float(row_data.get('demand_met')),
-                                'shortage': self._safe_float(row_data.get('shortage')),
-                            }
-                        )
-                        if created:
-                            self.write(self.style.SUCCESS(f"➕ Created Table 2A entry for {report_date} - {state_name}"))
-                            self.logger.info(f"➕ Created Table 2A entry for {report_date} - {state_name}")
-                        else:
-                            self.write(self.style.SUCCESS(f"🔄 Updated Table 2A entry for {report_date} - {state_name}"))
-                            self.logger.info(f"🔄 Updated Table 2A entry for {report_date} - {state_name}")
-                    except Exception as e:
-                        self.write(self.style.ERROR(f"❌ Error saving Table 2A row to DB (State: {state_name}): {e}"), level='error')
-                        self.logger.error(f"❌ Error saving Table 2A row to DB (State: {state_name}): {e}")
-            self.write(self.style.SUCCESS(f"✅ Table 2(A) data saved to database."))
-            self.logger.info(f"✅ Table 2(A) data saved to database.")
         else:
             self.write(self.style.WARNING("⚠️ Table 2(A) not found or extraction failed."), level='warning')
 
@@ -412,54 +400,67 @@ class Command(BaseCommand):
             sub_2C_final = sub_2C_final.dropna(subset=['state']).copy()
 
 
-            combined_json_data['srldc_table_2C'] = sub_2C_final.to_dict(orient='records')
+            frames['srldc_table_2C'] = sub_2C_final
             self.stdout.write(self.style.SUCCESS(f"✅ Table 2(C) extracted for combined JSON."))
+        else:
+            self.stdout.write(self.style.WARNING("⚠️ Table 2(C) not found or extraction failed."))
+
+        return frames
 
 
+    def persist_tables(self, frames, report_date):
+        """Persist stage: upserts the cleaned rows into Srldc2AData and Srldc2CData, one bulk write per table."""
+        if 'srldc_table_2A' in frames:
+            sub_2A_final = frames['srldc_table_2A']
+            rows = []
+            for index, row_data in sub_2A_final.iterrows():
+                state_name = self._safe_string(row_data.get('state'))
+                if state_name:
+                    rows.append({
+                        'report_date': report_date,
+                        'state': state_name,
+                        'thermal': self._safe_float(row_data.get('thermal')),
+                        'hydro': self._safe_float(row_data.get('hydro')),
+                        'gas_naptha_diesel': self._safe_float(row_data.get('gas_naptha_diesel')),
+                        'solar': self._safe_float(row_data.get('solar')),
+                        'wind': self._safe_float(row_data.get('wind')),
+                        'others': self._safe_float(row_data.get('others')),
+                        # 'total': self._safe_float(row_data.get('total')),
+                        'net_sch': self._safe_float(row_data.get('net_sch')),
+                        'drawal': self._safe_float(row_data.get('drawal')),
+                        'ui': self._safe_float(row_data.get('ui')),
+                        'availability': self._safe_float(row_data.get('availability')),
+                        'demand_met': self._safe_float(row_data.get('demand_met')),
+                        'shortage': self._safe_float(row_data.get('shortage')),
+                    })
+            saved = upsert_rows(Srldc2AData, rows)
+            self.write(self.style.SUCCESS(f"✅ Table 2(A): {saved} row(s) saved to database for {report_date}."))
+
+
+        if 'srldc_table_2C' in frames:
+            sub_2C_final = frames['srldc_table_2C']
+            rows = []
             for index, row_data in sub_2C_final.iterrows():
                 state_name = self._safe_string(row_data.get('state'))
                 if state_name:
-                    try:
-                        ace_min_val = None
-                        time_ace_min_val = None
-
-
-                        if 'ace_min' in sub_2C_final.columns:
-                            ace_min_val = self._safe_float(row_data.get('ace_min'))
-
-
-                        if 'time_ace_min' in sub_2C_final.columns:
-                            time_ace_min_val = self._safe_string(row_data.get('time_ace_min'))
-
-
-                        obj, created = Srldc2CData.objects.update_or_create(
-                            report_date=report_date,
-                            state=state_name,
-                            defaults={
-                                'max_demand': self._safe_float(row_data.get('max_demand')),
-                                'time': self._safe_string(row_data.get('time')),
-                                'shortage_max_demand': self._safe_float(row_data.get('shortage_max_demand')),
-                                'req_max_demand': self._safe_float(row_data.get('req_max_demand')),
-                                'demand_max_req': self._safe_float(row_data.get('demand_max_req')),
-                                'max_req_day': self._safe_float(row_data.get('max_req_day')),
-                                'time_max_req': self._safe_string(row_data.get('time_max_requirement')),
-                                'shortage_max_req': self._safe_float(row_data.get('shortage_max_req')),
-                                'ace_max': self._safe_float(row_data.get('ace_max')),
-                                'time_ace_max': self._safe_string(row_data.get('time_ace_max')),
-                                'ace_min': ace_min_val,
-                                'time_ace_min': time_ace_min_val,
-                            }
-                        )
-                        if created:
-                            self.stdout.write(self.style.SUCCESS(f"➕ Created Table 2C entry for {report_date} - {state_name}"))
-                            self.logger.info(f"➕ Created Table 2C entry for {report_date} - {state_name}")
-                        else:
-                            self.stdout.write(self.style.SUCCESS(f"🔄 Updated Table 2C entry for {report_date} - {state_name}"))
-                            self.logger.info(f"🔄 Updated Table 2C entry for {report_date} - {state_name}")
-                    except Exception as e:
-                        self.stdout.write(self.style.ERROR(f"❌ Error saving Table 2C row to DB (State: {state_name}): {e}"))
-                        self.logger.error(f"❌ Error saving Table 2C row to DB (State: {state_name}): {e}")
-            
+                    rows.append({
+                        'report_date': report_date,
+                        'state': state_name,
+                        'max_demand': self._safe_float(row_data.get('max_demand')),
+                        'time': self._safe_string(row_data.get('time')),
+                        'shortage_max_demand': self._safe_float(row_data.get('shortage_max_demand')),
+                        'req_max_demand': self._safe_float(row_data.get('req_max_demand')),
+                        'demand_max_req': self._safe_float(row_data.get('demand_max_req')),
+                        'max_req_day': self._safe_float(row_data.get('max_req_day')),
+                        'time_max_req': self._safe_string(row_data.get('time_max_requirement')),
+                        'shortage_max_req': self._safe_float(row_data.get('shortage_max_req')),
+                        'ace_max': self._safe_float(row_data.get('ace_max')),
+                        'time_ace_max': self._safe_string(row_data.get('time_ace_max')),
+                        'ace_min': self._safe_float(row_data.get('ace_min')) if 'ace_min' in sub_2C_final.columns else None,
+                        'time_ace_min': self._safe_string(row_data.get('time_ace_min')) if 'time_ace_min' in sub_2C_final.columns else None,
+                    })
+            saved = upsert_rows(Srldc2CData, rows)
+
             # ------- Print ace_min and time_ace_min for all states as aligned table -------
             self.stdout.write(self.style.HTTP_INFO("\n--- ACE MIN and Time for Each State (Table 2C) ---"))
             self.stdout.write(f"{'STATE':<12} | {'ACE MIN':>10} | {'TIME':>8}")
@@ -474,12 +475,13 @@ class Command(BaseCommand):
             # -------------------------------------------------------------------
 
 
-            self.stdout.write(self.style.SUCCESS(f"✅ Table 2(C) data saved to database."))
-            self.logger.info(f"✅ Table 2(C) data saved to database.")
-        else:
-            self.stdout.write(self.style.WARNING("⚠️ Table 2(C) not found or extraction failed."))
+            self.write(self.style.SUCCESS(f"✅ Table 2(C): {saved} row(s) saved to database for {report_date}."))
 
 
+    def write_json(self, frames, output_dir, report_date):
+        """JSON stage: writes the cleaned tables to srdc_report_tables_<report_date>.json in output_dir and returns its path."""
+        combined_json_data = {key: df.to_dict(orient='records') for key, df in frames.items()}
+
         if combined_json_data:
             # <<< CHANGE: Use the actual report_date for the filename, not today's date.
             report_date_str = report_date.strftime('%Y-%m-%d')
@@ -488,12 +490,26 @@ class Command(BaseCommand):
                 json.dump(combined_json_data, f, indent=4, ensure_ascii=False)
             self.stdout.write(self.style.SUCCESS(f"✅ Combined tables saved to: {combined_json_path}"))
             self.logger.info(f"✅ Combined tables saved to: {combined_json_path}")
+            return combined_json_path
         else:
             self.stdout.write(self.style.WARNING("⚠️ No tables were successfully extracted to create a combined JSON file."))
             self.logger.warning("⚠️ No tables were successfully extracted to create a combined JSON file.")
 
 
-    def download_latest_srldc_pdf(self, base_url="https://www.srldc.in/var/ftp/reports/psp/", base_download_dir="downloads"):
+    def report_stages(self, output_dir, report_date):
+        return ReportStages(
+            'SRLDC', report_date, self.read_tables, self.clean_tables,
+            lambda frames: self.persist_tables(frames, report_date),
+            lambda frames: self.write_json(frames, output_dir, report_date),
+        )
+
+
+    def _download_report(self):
+        pdf_path, _, report_dir = self.download_latest_srldc_pdf()
+        return pdf_path, report_dir
+
+
+    def download_latest_srldc_pdf(self, base_url=SRLDC_BASE_URL, base_download_dir="downloads"):
         project_name = "SRLDC"  # Add project name here
         
         base_download_dir = os.path.join(base_download_dir, project_name)
@@ -509,15 +525,8 @@ class Command(BaseCommand):
 
 
         for current_date in dates_to_try:
-            year = current_date.year
-            month_abbr = current_date.strftime('%b').capitalize()
-            day = current_date.day
-
-
-            directory_path_on_server = f"{year}/{month_abbr}{str(year)[-2:]}/"
-            file_name_on_server = f"{day:02d}-{current_date.month:02d}-{year}-psp.pdf"
-            
-            full_url = f"{base_url}{directory_path_on_server}{file_name_on_server}"
+            full_url = srldc_pdf_url(current_date, base_url)
+            file_name_on_server = full_url.rsplit('/', 1)[-1]
             
             now_str = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
             report_dir = os.path.join(base_download_dir, f"report_{now_str}")
@@ -525,7 +534,7 @@ class Command(BaseCommand):
             self.stdout.write(f"📁 Checking/Created report directory: {report_dir}")
 
 
-            local_pdf_filename = f"daily{current_date.day:02d}{current_date.month:02d}{str(current_date.year)[-2:]}.pdf"
+            local_pdf_filename = srldc_pdf_name(current_date)
             local_file_path = os.path.join(report_dir, local_pdf_filename)
 
 
@@ -544,6 +553,10 @@ class Command(BaseCommand):
             try:
                 response = requests.get(full_url, stream=True)
                 response.raise_for_status()
+                # A daily run loads the previous day's report (as backfill's resolve() does), so that
+                # PDF is the one being published today; only an older one would say nothing about it.
+                expected_date = (today - datetime.timedelta(days=1)).date()
+                publication.note_response(response, fresh=current_date.date() >= expected_date)
                 with open(local_file_path, 'wb') as pdf_file:
                     for chunk in response.iter_content(chunk_size=8192):
                         pdf_file.write(chunk)
@@ -577,14 +590,15 @@ class Command(BaseCommand):
             self.logger.warning("JAVA_HOME environment variable not set. tabula-py may fail.")
 
 
-        pdf_path, _, report_output_dir = self.download_latest_srldc_pdf()
         report_date = datetime.datetime.now().date()
+        run = ReportRun("SRLDC", report_date)
+        pdf_path, report_output_dir = run.download(self._download_report)
 
         if pdf_path is None:
             self.stdout.write(self.style.WARNING("No PDF report was successfully downloaded or found locally. Exiting."))
             self.logger.warning("No PDF report was successfully downloaded or found locally. Exiting.")
             return
 
-        self.extract_tables_from_pdf(pdf_path, report_output_dir, report_date)
+        self.report_stages(report_output_dir, report_date).process(run, pdf_path)
         self.stdout.write(self.style.SUCCESS(f"Finished processing. Files saved in: {report_output_dir}"))
         self.logger.info(f"Finished processing. Files saved in: {report_output_dir}")
\ No newline at end of file
@@ -5,15 +5,28 @@ from tabula.io import read_pdf
 import pandas as pd
 import json
 import logging
-from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.core.management.base import CommandError
 from wrldc_app.models import Wrldc2AData, Wrldc2CData
+from pipeline.checkpoints import ReportRun, ReportStages
+from pipeline.leases import LeasedCommand
+from pipeline.tables import upsert_rows
+from pipeline import publication
 import numpy as np
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+WRLDC_BASE_URL = settings.UPSTREAM_URLS['WRLDC']
 
-class Command(BaseCommand):
+
+def wrldc_pdf_url(pdf_date, base_url=WRLDC_BASE_URL):
+    """Returns the PSP report URL for pdf_date, e.g. .../2025/September/WRLDC_PSP_Report_01-09-2025.pdf"""
+    year = pdf_date.year
+    return f"{base_url}{year}/{pdf_date.strftime('%B')}/WRLDC_PSP_Report_{pdf_date.day:02d}-{pdf_date.month:02d}-{year}.pdf"
+
+
+class Command(LeasedCommand):
     help = 'Download the new report and extract tables 2(A) and 2(C) to a single JSON file and save to DB'
 
     # List of expected state names for validation
@@ -118,7 +131,8 @@ class Command(BaseCommand):
         # Reset index after dropping rows
         return raw_sub_df.reset_index(drop=True), None
 
-    def extract_tables_from_pdf(self, pdf_path, output_dir, report_date):
+    def read_tables(self, pdf_path):
+        """Extract stage: reads every table in the PDF with tabula."""
         self.stdout.write("🔍 Extracting tables from PDF...")
 
         try:
@@ -136,11 +150,14 @@ class Command(BaseCommand):
             raise CommandError("❌ No tables found in the PDF.")
 
         self.stdout.write(self.style.SUCCESS(f"✅ Found {len(tables)} potential tables. Starting table extraction..."))
+        return tables
 
+    def clean_tables(self, tables):
+        """Clean stage: cuts tables 2(A) and 2(C) out of the raw tables and normalises them."""
         all_content_df = pd.concat(tables, ignore_index=True)
         all_content_df_cleaned = all_content_df.dropna(axis=0, how='all')
         
-        combined_json_data = {}
+        frames = {}
 
         # --- Extract Table 2(A) using the robust subtable function and new marker ---
         # Using a flexible regex that looks for the table number and key English phrases
@@ -210,35 +227,8 @@ class Command(BaseCommand):
             self.stdout.write(f"States found for Table 2A after filtering: {sub_2A_final['state'].tolist()}")
 
 
-            combined_json_data['wrldc_table_2A'] = sub_2A_final.to_dict(orient='records')
+            frames['wrldc_table_2A'] = sub_2A_final
             self.stdout.write(self.style.SUCCESS(f"✅ Table 2(A) extracted for combined JSON."))
-
-
-            for index, row_data in sub_2A_final.iterrows():
-                try:
-                    Wrldc2AData.objects.update_or_create(
-                        report_date=report_date,
-                        state=row_data['state'],
-                        defaults={
-                            'thermal': row_data.get('thermal'),
-                            'hydro': row_data.get('hydro'),
-                            'gas': row_data.get('gas'),
-                            'solar': row_data.get('solar'),
-                            'wind': row_data.get('wind'),
-                            'others': row_data.get('others'),
-                            'total': row_data.get('total'),
-                            'net_sch': row_data.get('net_sch'),
-                            'drawal': row_data.get('drawal'),
-                            'ui': row_data.get('ui'),
-                            'availability': row_data.get('availability'),
-                            'requirement': row_data.get('requirement'),
-                            'shortage': row_data.get('shortage'),
-                            'consumption': row_data.get('consumption'),
-                        }
-                    )
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"❌ Error saving Table 2A row to DB (State: {row_data.get('state')}): {e}"))
-            self.stdout.write(self.style.SUCCESS(f"✅ Table 2(A) data saved to database."))
         else:
             self.stdout.write(self.style.WARNING("⚠️ Table 2(A) not found or extraction failed."))
 
@@ -317,42 +307,87 @@ class Command(BaseCommand):
             self.stdout.write(f"States found for Table 2C after filtering: {sub_2C_final['state'].tolist()}")
 
 
-            combined_json_data['wrldc_table_2C'] = sub_2C_final.to_dict(orient='records')
+            frames['wrldc_table_2C'] = sub_2C_final
             self.stdout.write(self.style.SUCCESS(f"✅ Table 2(C) extracted for combined JSON."))
-
-
-            for index, row_data in sub_2C_final.iterrows():
-                try:
-                    Wrldc2CData.objects.update_or_create(
-                        report_date=report_date, state=row_data['state'],
-                        defaults={
-                            'max_demand_day': row_data.get('max_demand_day'),
-                            'time': row_data.get('time'),
-                            'shortage_max_demand': row_data.get('shortage_max_demand'),
-                            'req_max_demand': row_data.get('req_max_demand'),
-                            'ace_max': row_data.get('ace_max'),
-                            'time_ace_max': row_data.get('time_ace_max'),
-                            'ace_min': row_data.get('ace_min'),
-                            'time_ace_min': row_data.get('time_ace_min'),
-                        }
-                    )
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"❌ Error saving Table 2C row to DB (State: {row_data.get('state')}): {e}"))
-            self.stdout.write(self.style.SUCCESS(f"✅ Table 2(C) data saved to database."))
         else:
             self.stdout.write(self.style.WARNING("⚠️ Table 2(C) not found or extraction failed."))
 
+        return frames
+
+    def persist_tables(self, frames, report_date):
+        """Persist stage: upserts the cleaned rows into Wrldc2AData and Wrldc2CData, one bulk write per table."""
+        if 'wrldc_table_2A' in frames:
+            sub_2A_final = frames['wrldc_table_2A']
+            rows = [
+                {
+                    'report_date': report_date,
+                    'state': row_data['state'],
+                    'thermal': row_data.get('thermal'),
+                    'hydro': row_data.get('hydro'),
+                    'gas': row_data.get('gas'),
+                    'solar': row_data.get('solar'),
+                    'wind': row_data.get('wind'),
+                    'others': row_data.get('others'),
+                    'total': row_data.get('total'),
+                    'net_sch': row_data.get('net_sch'),
+                    'drawal': row_data.get('drawal'),
+                    'ui': row_data.get('ui'),
+                    'availability': row_data.get('availability'),
+                    'requirement': row_data.get('requirement'),
+                    'shortage': row_data.get('shortage'),
+                    'consumption': row_data.get('consumption'),
+                }
+                for index, row_data in sub_2A_final.iterrows() if pd.notna(row_data['state'])
+            ]
+            saved = upsert_rows(Wrldc2AData, rows)
+            self.stdout.write(self.style.SUCCESS(f"✅ Table 2(A): {saved} row(s) saved to database for {report_date}."))
+
+        if 'wrldc_table_2C' in frames:
+            sub_2C_final = frames['wrldc_table_2C']
+            rows = [
+                {
+                    'report_date': report_date,
+                    'state': row_data['state'],
+                    'max_demand_day': row_data.get('max_demand_day'),
+                    'time': row_data.get('time'),
+                    'shortage_max_demand': row_data.get('shortage_max_demand'),
+                    'req_max_demand': row_data.get('req_max_demand'),
+                    'ace_max': row_data.get('ace_max'),
+                    'time_ace_max': row_data.get('time_ace_max'),
+                    'ace_min': row_data.get('ace_min'),
+                    'time_ace_min': row_data.get('time_ace_min'),
+                }
+                for index, row_data in sub_2C_final.iterrows() if pd.notna(row_data['state'])
+            ]
+            saved = upsert_rows(Wrldc2CData, rows)
+            self.stdout.write(self.style.SUCCESS(f"✅ Table 2(C): {saved} row(s) saved to database for {report_date}."))
+
+    def write_json(self, frames, output_dir, report_date):
+        """JSON stage: writes the cleaned tables to wrdc_report_tables_<date>.json in output_dir and returns its path."""
+        combined_json_data = {key: df.to_dict(orient='records') for key, df in frames.items()}
 
         if combined_json_data:
-            # Save JSON file with today's date
-            date_str = datetime.datetime.now().strftime('%Y-%m-%d')
+            # Save JSON file with the report date
+            date_str = report_date.strftime('%Y-%m-%d')
             combined_json_path = os.path.join(output_dir, f'wrdc_report_tables_{date_str}.json')
             with open(combined_json_path, 'w', encoding='utf-8') as f:
                 json.dump(combined_json_data, f, indent=4, ensure_ascii=False)
             self.stdout.write(self.style.SUCCESS(f"✅ Combined tables saved to: {combined_json_path}"))
+            return combined_json_path
         else:
             self.stdout.write(self.style.WARNING("⚠️ No tables were successfully extracted to create a combined JSON file."))
 
+    def report_stages(self, output_dir, report_date):
+        return ReportStages(
+            'WRLDC', report_date, self.read_tables, self.clean_tables,
+            lambda frames: self.persist_tables(frames, report_date),
+            lambda frames: self.write_json(frames, output_dir, report_date),
+        )
+
+    def _download_report(self, new_base_url):
+        pdf_path, _, report_dir = self.download_latest_pdf(new_base_url)
+        return pdf_path, report_dir
+
     def download_latest_pdf(self, new_base_url, base_download_dir="downloads"):
         project_name = "WRLDC"
         base_download_dir = os.path.join(base_download_dir, project_name)
@@ -371,14 +406,8 @@ class Command(BaseCommand):
         dates_to_try = [today, today - datetime.timedelta(days=1)]
 
         for current_date in dates_to_try:
-            year = current_date.year
-            month_name = current_date.strftime('%B')
-            day = current_date.day
-
-            directory_path_on_server = f"{year}/{month_name}/"
-            file_name_on_server = f"WRLDC_PSP_Report_{day:02d}-{current_date.month:02d}-{year}.pdf"
-
-            full_url = f"{new_base_url}{directory_path_on_server}{file_name_on_server}"
+            full_url = wrldc_pdf_url(current_date, new_base_url)
+            file_name_on_server = full_url.rsplit('/', 1)[-1]
             
             now_str = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
             report_dir = os.path.join(base_download_dir, f"report_{now_str}")
@@ -400,6 +429,10 @@ class Command(BaseCommand):
             try:
                 response = requests.get(full_url, stream=True)
                 response.raise_for_status()
+                # A daily run loads the previous day's report (as backfill's resolve() does), so that
+                # PDF is the one being published today; only an older one would say nothing about it.
+                expected_date = (today - datetime.timedelta(days=1)).date()
+                publication.note_response(response, fresh=current_date.date() >= expected_date)
                 with open(local_file_path, 'wb') as pdf_file:
                     for chunk in response.iter_content(chunk_size=8192):
                         pdf_file.write(chunk)
@@ -431,21 +464,19 @@ class Command(BaseCommand):
         if "JAVA_HOME" not in os.environ:
             self.stdout.write(self.style.WARNING("JAVA_HOME environment variable not set. tabula-py may fail."))
 
-        new_url = "https://reporting.wrldc.in:8081/PSP/"
+        new_url = WRLDC_BASE_URL
 
         # The download function correctly finds yesterday's report and returns yesterday's date.
         # We will keep this logic as is.
-        pdf_path, report_content_date, report_output_dir = self.download_latest_pdf(new_url)
+        # Set report_date to today's date only
+        report_date = datetime.datetime.now().date()
+        run = ReportRun("WRLDC", report_date)
+        pdf_path, report_output_dir = run.download(self._download_report, new_url)
 
         if pdf_path is None:
             self.stdout.write(self.style.WARNING("No PDF report was successfully downloaded or found locally. Exiting."))
             return
-            
-        # --- CHANGE IMPLEMENTED HERE ---
-        # Set report_date to today's date only
-        report_date = datetime.datetime.now().date() 
 
-        # We pass the NEW date (`db_save_date`) to the function that saves to the database.
-        self.extract_tables_from_pdf(pdf_path, report_output_dir, report_date)
+        self.report_stages(report_output_dir, report_date).process(run, pdf_path)
         
         self.stdout.write(self.style.SUCCESS(f"Finished processing. Files saved in: {report_output_dir}"))
\ No newline at end of file